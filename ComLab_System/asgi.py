@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve the project through this entry point (e.g. ``uvicorn
+ComLab_System.asgi:application``) to get live unit status pushes from
+``/api/units/events/``. All open streams in a worker share one event broker.
 """
 
 import os
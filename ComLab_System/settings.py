@@ -41,11 +41,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Metrics and query budgets come first, so session saves and user
+    # lookups count towards request latency and query budgets
+    'mainpage.metrics.MetricsMiddleware',
+    'mainpage.querybudget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Profiling checks the token against request.user, so it needs auth first
+    'mainpage.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,10 +83,95 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts so concurrent kiosk
+            # sign-ins queue on the busy timeout instead of failing to upgrade.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file-backed test database gives each thread a real connection with
+        # file locking, which the kiosk concurrency tests rely on.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The dashboard snapshot is cached until a unit or user changes. The local
+# memory cache is per process; point this at a shared backend (Redis or
+# Memcached) when running more than one worker so invalidations reach all.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'comlab',
     }
 }
 
 
+# Activity log writer
+# With ACTIVITY_LOG_BUFFERED on, sign-in and sign-out log entries are queued
+# in memory and written in bulk once ACTIVITY_LOG_BUFFER_SIZE entries are
+# waiting, after ACTIVITY_LOG_FLUSH_SECONDS, and at shutdown. Entries then
+# reach the logs page up to that many seconds late, and a hard crash of the
+# process loses whatever is still queued.
+
+ACTIVITY_LOG_BUFFERED = False
+ACTIVITY_LOG_BUFFER_SIZE = 100
+ACTIVITY_LOG_FLUSH_SECONDS = 2
+
+
+# Activity log archive
+# `manage.py archive_logs` moves logs older than ACTIVITY_LOG_RETENTION_DAYS
+# into gzip JSONL files, one per month, under ACTIVITY_LOG_ARCHIVE_DIR. They
+# stay exportable from the logs page.
+
+ACTIVITY_LOG_RETENTION_DAYS = 180
+ACTIVITY_LOG_ARCHIVE_DIR = BASE_DIR / 'log_archive'
+
+
+# Users API
+# Largest number of operations accepted by /api/users/batch/ in one request
+
+USER_BATCH_MAX_SIZE = 1000
+
+
+# Query budgets
+# Views declare the most queries one request may run with @query_budget.
+# With QUERY_BUDGET_CHECKS on, every response carries X-Query-Count and
+# X-Query-Budget headers and requests over budget log a warning, or an
+# error with QUERY_BUDGET_STRICT on. Turn both off in production.
+
+QUERY_BUDGET_CHECKS = DEBUG
+QUERY_BUDGET_STRICT = DEBUG
+
+
+# Request profiling
+# Staff get a token from /admin/profiling/token/ and add it to a slow page
+# as ?_profile=<token> (or an X-Profile-Token header). That one request is
+# run under cProfile and saved to PROFILING_DIR; the response's
+# X-Profile-Url header links to the download. Only the newest
+# PROFILING_KEEP profiles are kept.
+
+PROFILING_ENABLED = True
+PROFILING_TOKEN_MAX_AGE = 600  # seconds
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_KEEP = 50
+
+
+# Metrics
+# /metrics serves Prometheus text: request counts, latency histograms and
+# DB time per URL name, plus units by status and signed-in users. Request
+# metrics are kept per process, so scrape every worker. Set METRICS_TOKEN
+# to require an "Authorization: Bearer <token>" header on scrapes.
+
+METRICS_ENABLED = True
+METRICS_TOKEN = None
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
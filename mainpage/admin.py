@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ComputerUser, ComputerUnit, ActivityLog
+from .models import ComputerUser, ComputerUnit, ActivityLog, Station, LabSession, StationHourUsage, LabDayUsage
 
 # Register your models here.
 
@@ -60,7 +60,39 @@ class ComputerUnitAdmin(admin.ModelAdmin):
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
     list_display = ('timestamp', 'action', 'student_id', 'full_name', 'computer_station', 'user')
+    list_select_related = ('user',)  # the user column would otherwise cost a query per row
     list_filter = ('action', 'computer_station', 'timestamp')
     search_fields = ('student_id', 'full_name', 'computer_station', 'notes')
     readonly_fields = ('timestamp',)
     ordering = ('-timestamp',)
+
+
+@admin.register(Station)
+class StationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at')
+    search_fields = ('name',)
+    readonly_fields = ('created_at',)
+    ordering = ('name',)
+
+
+@admin.register(LabSession)
+class LabSessionAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'ended_at', 'duration', 'student_id', 'computer_station', 'user')
+    list_select_related = ('user',)
+    list_filter = ('computer_station', 'started_at')
+    search_fields = ('student_id', 'computer_station')
+    ordering = ('-started_at',)
+
+
+@admin.register(StationHourUsage)
+class StationHourUsageAdmin(admin.ModelAdmin):
+    list_display = ('hour', 'computer_station', 'occupied_seconds', 'users')
+    list_filter = ('computer_station', 'hour')
+    search_fields = ('computer_station',)
+    ordering = ('-hour', 'computer_station')
+
+
+@admin.register(LabDayUsage)
+class LabDayUsageAdmin(admin.ModelAdmin):
+    list_display = ('date', 'occupied_seconds', 'users')
+    ordering = ('-date',)
@@ -0,0 +1,167 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .exports import EXPORT_FIELDS
+from .log_filters import is_student_activity, log_filter_bounds, log_matches_filters
+from .models import ActivityLog
+
+ARCHIVE_FIELDS = EXPORT_FIELDS + ('user_id', 'actor_type')
+ARCHIVE_INDEX = 'index.json'
+# Rows read, appended to the segments and deleted per step
+ARCHIVE_BATCH_SIZE = 5000
+
+
+def archive_dir():
+    """Directory holding the archived log segments"""
+    return Path(getattr(settings, 'ACTIVITY_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'log_archive'))
+
+
+def segment_name(month):
+    return f'activitylog-{month}.jsonl.gz'
+
+
+def load_index(directory=None):
+    """Return the archive index, or an empty one if nothing has been archived yet.
+
+    ``segments`` maps a local-time month (YYYY-MM) to its file name, row count,
+    committed size in bytes and first/last timestamps. ``pending_ids`` lists
+    the rows of a committed batch that may not have been deleted yet.
+    """
+    path = Path(directory or archive_dir()) / ARCHIVE_INDEX
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'segments': {}, 'pending_ids': []}
+
+
+def _save_index(directory, index):
+    # Write then rename, so a crash never leaves a half-written index
+    path = directory / ARCHIVE_INDEX
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _append_segment(directory, index, month, records):
+    segment = index['segments'].setdefault(month, {
+        'file': segment_name(month), 'rows': 0, 'bytes': 0, 'first': None, 'last': None,
+    })
+    path = directory / segment['file']
+    # Each append adds a gzip member; readers see one continuous stream
+    with open(path, 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='ab') as f:
+            for record in records:
+                f.write((json.dumps(record) + '\n').encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+    segment['rows'] += len(records)
+    segment['bytes'] = path.stat().st_size
+    timestamps = [record['timestamp'] for record in records]
+    segment['first'] = min(filter(None, [segment['first'], *timestamps]))
+    segment['last'] = max(filter(None, [segment['last'], *timestamps]))
+
+
+def _recover(directory, index):
+    """Undo appends the index never recorded and finish an interrupted delete"""
+    recorded = {segment['file'] for segment in index['segments'].values()}
+    for path in directory.glob(segment_name('*')):
+        if path.name not in recorded:
+            path.unlink()
+    for segment in index['segments'].values():
+        path = directory / segment['file']
+        if path.exists() and path.stat().st_size > segment['bytes']:
+            with open(path, 'rb+') as f:
+                f.truncate(segment['bytes'])
+    if index.get('pending_ids'):
+        ActivityLog.objects.filter(id__in=index['pending_ids']).delete()
+        index['pending_ids'] = []
+        _save_index(directory, index)
+
+
+def archive_logs(before, batch_size=ARCHIVE_BATCH_SIZE, directory=None, on_progress=None):
+    """Move activity logs older than ``before`` into monthly gzip JSONL segments.
+
+    Rows are taken oldest first, ``batch_size`` at a time. Each batch is
+    appended to its month's segment, then committed by rewriting the index
+    (new segment sizes plus the batch's ids), then deleted with a single
+    DELETE, so the table never holds a long lock. A run interrupted before
+    the index was written has its partial append truncated away by the next
+    run; one interrupted after it has the recorded ids deleted, so no row is
+    lost or archived twice. Returns the number of rows archived;
+    on_progress(total) is called after every batch.
+    """
+    directory = Path(directory or archive_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    index = load_index(directory)
+    total = 0
+
+    _recover(directory, index)
+
+    while True:
+        rows = list(
+            ActivityLog.objects.filter(timestamp__lt=before)
+            .order_by('timestamp', 'id')
+            .values_list(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            break
+
+        by_month = {}
+        for row in rows:
+            record = dict(zip(ARCHIVE_FIELDS, row))
+            month = timezone.localtime(record['timestamp']).strftime('%Y-%m')
+            record['timestamp'] = record['timestamp'].isoformat()
+            by_month.setdefault(month, []).append(record)
+        for month, records in sorted(by_month.items()):
+            _append_segment(directory, index, month, records)
+
+        ids = [row[0] for row in rows]
+        index['pending_ids'] = ids
+        _save_index(directory, index)
+        ActivityLog.objects.filter(id__in=ids).delete()
+        index['pending_ids'] = []
+        _save_index(directory, index)
+
+        total += len(rows)
+        if on_progress:
+            on_progress(total)
+    return total
+
+
+def iter_archived_logs(filters=None, directory=None):
+    """Yield archived student activity logs matching ``filters`` as EXPORT_FIELDS tuples.
+
+    ``filters`` uses the same keys as the logs page (see parse_log_filters).
+    Segments outside the requested date range are skipped using the index;
+    the rest are decompressed line by line, so memory stays flat. Rows come
+    out month by month in the order they were archived.
+    """
+    filters = filters or {}
+    directory = Path(directory or archive_dir())
+    index = load_index(directory)
+    start, end, _ = log_filter_bounds(filters)
+
+    for month, segment in sorted(index['segments'].items()):
+        if start is not None and datetime.fromisoformat(segment['last']) < start:
+            continue
+        if end is not None and datetime.fromisoformat(segment['first']) > end:
+            continue
+        path = directory / segment['file']
+        if not path.exists():
+            continue
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                record['timestamp'] = datetime.fromisoformat(record['timestamp'])
+                if is_student_activity(record) and log_matches_filters(record, filters):
+                    yield tuple(record[field] for field in EXPORT_FIELDS)
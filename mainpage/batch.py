@@ -0,0 +1,187 @@
+from collections import Counter
+from math import ceil
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard_snapshot
+from .imports import validate_user_values
+from .querybudget import bulk_statements
+from .signins import forget_signed_in_count
+from .models import ComputerUser
+
+BATCH_REQUIRED_FIELDS = ('student_id', 'first_name', 'last_name', 'contact_number', 'course', 'address')
+# Fields an update operation may change, as in the single-user update API
+BATCH_UPDATE_FIELDS = (
+    'first_name', 'last_name', 'email', 'contact_number', 'course', 'address',
+    'access_level', 'status', 'computer_station',
+)
+BATCH_OPERATIONS = ('create', 'update', 'status', 'delete')
+
+
+def max_batch_size():
+    """Largest number of operations accepted in one batch request"""
+    return getattr(settings, 'USER_BATCH_MAX_SIZE', 1000)
+
+
+def batch_extra_queries(operations):
+    """Most queries a batch can run beyond one holding a single operation of each kind.
+
+    The user lookups, bulk_create, bulk_update and delete are each split
+    into chunks the database can take; every chunk past the first is one
+    more query.
+    """
+    ops = Counter(operation.get('op') for operation in operations if isinstance(operation, dict))
+    by_id = sum(
+        1 for operation in operations
+        if isinstance(operation, dict) and operation.get('op') in ('update', 'status', 'delete') and isinstance(operation.get('id'), int)
+    )
+    max_params = connection.features.max_query_params or float('inf')
+    insert_fields = [field for field in ComputerUser._meta.concrete_fields if not field.primary_key]
+    chunks = (
+        ceil(by_id / max_params),
+        ceil((ops['update'] + ops['status'] + ops['delete'] - by_id) / max_params),
+        bulk_statements(insert_fields, ops['create']),
+        # Worst case: every update field changes
+        bulk_statements(['pk', 'pk', *BATCH_UPDATE_FIELDS, 'updated_at'], ops['update'] + ops['status']),
+        ceil(ops['delete'] / GET_ITERATOR_CHUNK_SIZE),
+    )
+    return sum(max(count - 1, 0) for count in chunks)
+
+
+class BatchError(Exception):
+    """An operation in a batch that cannot be applied"""
+
+
+def _field_values(data, names):
+    values = {}
+    for name in names:
+        if name in data:
+            value = data[name]
+            if not isinstance(value, str) and not (value is None and ComputerUser._meta.get_field(name).null):
+                raise BatchError(f'{name.replace("_", " ").title()} must be a string')
+            values[name] = value
+    error = validate_user_values(values)
+    if error:
+        raise BatchError(error)
+    return values
+
+
+def run_user_batch(operations):
+    """Apply a list of user operations in one transaction and return per-item results.
+
+    Each operation is a dict with an ``op`` of:
+    - create: ``data`` holds the new user's fields, as in the create API
+    - update: ``data`` holds the fields to change
+    - status: ``status`` is the new status
+    - delete
+    update, status and delete name their user by ``id`` or ``student_id``.
+
+    Users are looked up with one query per key type and written with one
+    bulk_create, one bulk_update and one delete, whatever the batch size.
+    Operations that fail validation get an error result and are skipped;
+    the rest are applied together. Results are returned in request order
+    as dicts with ``index``, ``success`` and either ``id``/``student_id``
+    or ``error``.
+    """
+    results = [None] * len(operations)
+    with transaction.atomic():
+        _apply_operations(operations, results)
+    return results
+
+
+def _apply_operations(operations, results):
+    # Look up every referenced user up front
+    ids, student_ids = set(), set()
+    for operation in operations:
+        if isinstance(operation, dict) and operation.get('op') in ('update', 'status', 'delete'):
+            if isinstance(operation.get('id'), int):
+                ids.add(operation['id'])
+            elif isinstance(operation.get('student_id'), str):
+                student_ids.add(operation['student_id'])
+    by_id = ComputerUser.objects.in_bulk(ids) if ids else {}
+    by_student_id = ComputerUser.objects.in_bulk(student_ids, field_name='student_id') if student_ids else {}
+    # A user named both ways must be a single instance so its changes merge
+    for student_id, user in by_student_id.items():
+        by_id.setdefault(user.pk, user)
+        by_student_id[student_id] = by_id[user.pk]
+
+    create_ids = set()
+    for operation in operations:
+        if isinstance(operation, dict) and operation.get('op') == 'create' and isinstance(operation.get('data'), dict):
+            if isinstance(operation['data'].get('student_id'), str):
+                create_ids.add(operation['data']['student_id'])
+    taken = set(ComputerUser.objects.filter(student_id__in=create_ids).values_list('student_id', flat=True)) if create_ids else set()
+
+    creates = []  # (index, ComputerUser)
+    updated = {}  # pk -> ComputerUser
+    update_fields = set()
+    deleted = set()  # pks
+
+    for index, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict) or operation.get('op') not in BATCH_OPERATIONS:
+                raise BatchError(f'op must be one of {", ".join(BATCH_OPERATIONS)}')
+            op = operation['op']
+
+            if op == 'create':
+                data = operation.get('data')
+                if not isinstance(data, dict):
+                    raise BatchError('data must be an object')
+                for name in BATCH_REQUIRED_FIELDS:
+                    if not data.get(name):
+                        raise BatchError(f'{name.replace("_", " ").title()} is required')
+                values = _field_values(data, ('student_id',) + BATCH_UPDATE_FIELDS)
+                if values['student_id'] in taken:
+                    raise BatchError('Student ID already exists')
+                taken.add(values['student_id'])
+                values.setdefault('email', '')
+                values.setdefault('computer_station', '')
+                creates.append((index, ComputerUser(**values)))
+                continue
+
+            if isinstance(operation.get('id'), int):
+                user = by_id.get(operation['id'])
+            else:
+                user = by_student_id.get(operation.get('student_id'))
+            if user is None or user.pk in deleted:
+                raise BatchError('User not found')
+
+            if op == 'delete':
+                deleted.add(user.pk)
+                # A user deleted later in the batch is not updated first
+                updated.pop(user.pk, None)
+            else:
+                if op == 'update':
+                    if not isinstance(operation.get('data'), dict):
+                        raise BatchError('data must be an object')
+                    values = _field_values(operation['data'], BATCH_UPDATE_FIELDS)
+                else:
+                    if 'status' not in operation:
+                        raise BatchError('Status is required')
+                    values = _field_values(operation, ('status',))
+                for name, value in values.items():
+                    setattr(user, name, value)
+                updated[user.pk] = user
+                update_fields.update(values)
+            results[index] = {'index': index, 'success': True, 'id': user.pk, 'student_id': user.student_id}
+        except BatchError as e:
+            results[index] = {'index': index, 'success': False, 'error': str(e)}
+
+    ComputerUser.objects.bulk_create([user for _, user in creates])
+    for index, user in creates:
+        results[index] = {'index': index, 'success': True, 'id': user.pk, 'student_id': user.student_id}
+    if updated and update_fields:
+        # bulk_update skips auto_now, so stamp updated_at ourselves
+        now = timezone.now()
+        for user in updated.values():
+            user.updated_at = now
+        ComputerUser.objects.bulk_update(list(updated.values()), [*sorted(update_fields), 'updated_at'])
+    if deleted:
+        ComputerUser.objects.filter(pk__in=deleted).delete()
+    if creates or updated:
+        # bulk writes do not send post_save
+        transaction.on_commit(invalidate_dashboard_snapshot)
+        transaction.on_commit(forget_signed_in_count)
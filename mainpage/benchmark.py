@@ -0,0 +1,161 @@
+import math
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from .models import ActivityLog, ComputerUnit, ComputerUser
+from .querybudget import get_query_budget
+
+# (label, url name, query parameters) for the read-only pages and APIs
+BENCHMARK_REQUESTS = (
+    ('dashboard', 'dashboard', {}),
+    ('computer_users', 'computer_users', {}),
+    ('computer_users_search', 'computer_users', {'search': 'santos'}),
+    ('computer_users_deep_page', 'computer_users', {'page': 100}),
+    ('computer_units', 'computer_units', {}),
+    ('logs', 'logs', {}),
+    ('logs_by_station', 'logs', {'station': 'PC-00001'}),
+    ('logs_search', 'logs', {'search': 'santos'}),
+    ('api_get_users', 'api_get_users', {}),
+    ('api_get_users_search', 'api_get_users', {'search': 'santos', 'include_total': 1}),
+    ('api_get_logs', 'api_get_logs', {}),
+    ('api_log_stations', 'api_log_stations', {}),
+    ('api_usage_heatmap', 'api_usage_heatmap', {}),
+    ('user_sign_in_page', 'user_sign_in', {}),
+)
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(label, method, path, timings, query_counts, budget):
+    timings = sorted(timings)
+    summary = {'label': label, 'method': method, 'path': path, 'requests': len(timings)}
+    for pct in PERCENTILES:
+        summary[f'p{pct}_ms'] = round(percentile(timings, pct) * 1000, 2)
+    summary['mean_ms'] = round(sum(timings) / len(timings) * 1000, 2)
+    summary['max_ms'] = round(timings[-1] * 1000, 2)
+    summary['queries'] = max(query_counts)
+    summary['query_budget'] = budget
+    return summary
+
+
+class BenchmarkRunner:
+    """Time the app's pages and APIs through the Django test client.
+
+    Each endpoint gets ``warmup`` untimed requests, then ``requests`` timed
+    ones, counting the queries each runs. With ``cold`` the cache is cleared
+    before every request, so snapshot and registry rebuilds are included.
+    The kiosk sign-in and sign-out are timed as a pair inside a transaction
+    that is rolled back, so benchmarking leaves the data unchanged.
+    """
+
+    def __init__(self, staff_user, requests=50, warmup=5, cold=False):
+        self.client = Client()
+        self.client.force_login(staff_user)
+        self.requests = requests
+        self.warmup = warmup
+        self.cold = cold
+
+    def _timed(self, method, path, **kwargs):
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        if self.cold:
+            cache.clear()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = getattr(self.client, method)(path, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method.upper()} {path} returned {response.status_code}')
+        return elapsed, count
+
+    def _run(self, label, method, path, **kwargs):
+        for _ in range(self.warmup):
+            self._timed(method, path, **kwargs)
+        timings, query_counts = [], []
+        for _ in range(self.requests):
+            elapsed, count = self._timed(method, path, **kwargs)
+            timings.append(elapsed)
+            query_counts.append(count)
+        return summarize(label, method.upper(), path, timings, query_counts, get_query_budget(resolve(path).func))
+
+    def _run_kiosk(self, student_id, unit_id):
+        path = reverse('user_sign_in')
+        timings = {'sign-in': [], 'sign-out': []}
+        query_counts = {'sign-in': [], 'sign-out': []}
+        for n in range(self.warmup + self.requests):
+            with transaction.atomic():
+                for action, data in (('sign-in', {'student_id': student_id, 'unit_id': unit_id}),
+                                     ('sign-out', {'student_id': student_id})):
+                    elapsed, count = self._timed('post', path, data=data, **AJAX)
+                    if n >= self.warmup:
+                        timings[action].append(elapsed)
+                        query_counts[action].append(count)
+                transaction.set_rollback(True)
+        budget = get_query_budget(resolve(path).func)
+        return [
+            summarize(f'kiosk_{action.replace("-", "_")}', 'POST', path, timings[action], query_counts[action], budget)
+            for action in ('sign-in', 'sign-out')
+        ]
+
+    # Over-budget endpoints are reported with their budget, not logged as errors
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def run(self, on_result=None):
+        """Benchmark every endpoint and return the results as a JSON-ready dict"""
+        started_at = timezone.now()
+        results = []
+        for label, name, params in BENCHMARK_REQUESTS:
+            path = reverse(name)
+            results.append(self._run(label, 'get', path, data=params))
+            if on_result:
+                on_result(results[-1])
+
+        student = ComputerUser.objects.filter(status='active', computer_station='').order_by('pk').first()
+        unit = ComputerUnit.objects.filter(status='available').order_by('unit_id').first()
+        if student and unit:
+            for result in self._run_kiosk(student.student_id, unit.unit_id):
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+        return {
+            'started_at': started_at.isoformat(),
+            'scale': {
+                'users': ComputerUser.objects.count(),
+                'units': ComputerUnit.objects.count(),
+                'activity_logs': ActivityLog.objects.count(),
+            },
+            'settings': {'requests': self.requests, 'warmup': self.warmup, 'cold': self.cold},
+            'results': results,
+        }
+
+
+def compare_results(baseline, current):
+    """Return (label, metric, old, new, percent change) for endpoints in both runs"""
+    old_results = {result['label']: result for result in baseline.get('results', [])}
+    changes = []
+    for result in current['results']:
+        old = old_results.get(result['label'])
+        if old is None:
+            continue
+        for metric in [f'p{pct}_ms' for pct in PERCENTILES] + ['queries']:
+            before, after = old[metric], result[metric]
+            change = (after - before) / before * 100 if before else 0.0
+            changes.append((result['label'], metric, before, after, round(change, 1)))
+    return changes
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+
+from .models import ComputerUser, ComputerUnit
+from .registry import get_unit_version
+
+DASHBOARD_SNAPSHOT_KEY = 'mainpage:dashboard_snapshot'
+# Snapshots are keyed by unit version, so superseded ones just expire
+DASHBOARD_SNAPSHOT_TIMEOUT = 60 * 60
+
+
+def build_dashboard_snapshot():
+    """Collect per-status unit counts and sorted unit lists for the dashboard.
+
+    All units are read in one query ordered by (status, unit_id), so every
+    status group comes back already sorted and is counted while grouping.
+    """
+    status_labels = dict(ComputerUnit.STATUS_CHOICES)
+    units_by_status = {status: [] for status in status_labels}
+    rows = ComputerUnit.objects.order_by('status', 'unit_id').values_list('unit_id', 'status')
+    for unit_id, status in rows:
+        units_by_status.setdefault(status, []).append({
+            'unit_id': unit_id,
+            'status_display': status_labels.get(status, status),
+        })
+
+    return {
+        'total_users': ComputerUser.objects.count(),
+        'total_units': sum(len(units) for units in units_by_status.values()),
+        'status_counts': {status: len(units) for status, units in units_by_status.items()},
+        'units_by_status': units_by_status,
+    }
+
+
+def _snapshot_key(version):
+    return f'{DASHBOARD_SNAPSHOT_KEY}:{version}'
+
+
+def get_dashboard_snapshot():
+    """Return the cached dashboard snapshot, rebuilding it after a change.
+
+    The cache key carries the global unit version, so any unit change makes
+    the old snapshot unreachable. The version is read before the data, which
+    means a snapshot can only ever be newer than the version it is stored
+    under, never older.
+    """
+    version = get_unit_version()
+    snapshot = cache.get(_snapshot_key(version))
+    if snapshot is None:
+        snapshot = build_dashboard_snapshot()
+        snapshot['units_version'] = version
+        cache.set(_snapshot_key(version), snapshot, DASHBOARD_SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def invalidate_dashboard_snapshot():
+    """Drop the current snapshot after a change that does not touch units"""
+    cache.delete(_snapshot_key(get_unit_version()))
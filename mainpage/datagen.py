@@ -0,0 +1,148 @@
+import random
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard_snapshot
+from .models import ActivityLog, ComputerUnit, ComputerUser, Station
+from .registry import bump_unit_version
+from .stations import ADMIN_STATION, STATIONS_CACHE_KEY
+
+# Rows built in memory and inserted per bulk_create
+DATAGEN_BATCH_SIZE = 5000
+
+FIRST_NAMES = (
+    'Juan', 'Maria', 'Jose', 'Ana', 'Mark', 'Angela', 'John Paul', 'Kristine', 'Carlo', 'Patricia',
+    'Miguel', 'Andrea', 'Rafael', 'Camille', 'Paolo', 'Nicole', 'Gabriel', 'Bea', 'Joshua', 'Erika',
+)
+LAST_NAMES = (
+    'Dela Cruz', 'Santos', 'Reyes', 'Garcia', 'Mendoza', 'Bautista', 'Villanueva', 'Ramos', 'Aquino',
+    'Castillo', 'Flores', 'Gonzales', 'Torres', 'Rivera', 'Navarro', 'Domingo', 'Salazar', 'Pascual',
+)
+COURSES = ('BSIT', 'BSCS', 'BSIS', 'BSEMC', 'ACT', 'BSCpE', 'BSEd', 'BSBA')
+ADDRESSES = ('Quezon City', 'Manila', 'Makati', 'Pasig', 'Taguig', 'Caloocan', 'Antipolo', 'Cebu City', 'Davao City')
+# (value, weight) pairs roughly matching a school lab
+ACCESS_LEVEL_WEIGHTS = (('student', 92), ('faculty', 6), ('admin', 2))
+USER_STATUS_WEIGHTS = (('active', 90), ('inactive', 7), ('suspended', 3))
+UNIT_STATUS_WEIGHTS = (('available', 90), ('maintenance', 7), ('retired', 3))
+# Share of log entries that are admin logins and logouts
+ADMIN_LOG_SHARE = 0.01
+
+
+def _choose(rng, weighted):
+    values, weights = zip(*weighted)
+    return rng.choices(values, weights)[0]
+
+
+def _batches(rows, batch_size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model, rows, batch_size, on_progress=None):
+    # ignore_conflicts hides which rows were skipped, so count the table
+    before = model.objects.count()
+    created = 0
+    for batch in _batches(rows, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            created = model.objects.count() - before
+        if on_progress:
+            on_progress(model._meta.verbose_name_plural, created)
+    return created
+
+
+def _users(rng, count, start):
+    for n in range(start, start + count):
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield ComputerUser(
+            student_id=f'{rng.randint(2015, 2025)}-{n:06d}',
+            first_name=first_name,
+            last_name=last_name,
+            email=f'{first_name}.{last_name}.{n}@example.edu'.lower().replace(' ', ''),
+            contact_number=f'09{rng.randint(0, 999999999):09d}',
+            course=rng.choice(COURSES),
+            address=rng.choice(ADDRESSES),
+            access_level=_choose(rng, ACCESS_LEVEL_WEIGHTS),
+            status=_choose(rng, USER_STATUS_WEIGHTS),
+            computer_station='',
+        )
+
+
+def _units(rng, count, start):
+    for n in range(start, start + count):
+        yield ComputerUnit(unit_id=f'PC-{n:05d}', status=_choose(rng, UNIT_STATUS_WEIGHTS))
+
+
+def _logs(rng, count, days, users, stations):
+    # Sessions start at random gaps walking forward through the period, so
+    # ids grow with time as they do in production; each one is a sign-in
+    # followed by a sign-out 30 minutes to 3 hours later
+    now = timezone.now()
+    moment = now - timedelta(days=days)
+    mean_gap = days * 86400 / max(count / 2, 1)
+    written = 0
+    while written < count:
+        moment += timedelta(seconds=rng.expovariate(1 / mean_gap))
+        if rng.random() < ADMIN_LOG_SHARE:
+            for action, note in (('sign-in', 'Admin login to dashboard'), ('sign-out', 'Admin logout from dashboard'))[:count - written]:
+                yield ActivityLog(student_id='admin', full_name='Lab Administrator', action=action,
+                                  computer_station=ADMIN_STATION, actor_type='admin', timestamp=moment, notes=note)
+                written += 1
+            continue
+        user_id, student_id, full_name = rng.choice(users)
+        station = rng.choice(stations)
+        signed_out = min(moment + timedelta(minutes=rng.randint(30, 180)), now)
+        for action, timestamp in (('sign-in', moment), ('sign-out', signed_out))[:count - written]:
+            yield ActivityLog(user_id=user_id, student_id=student_id, full_name=full_name, action=action,
+                              computer_station=station, timestamp=timestamp,
+                              notes=f'{"Signed in" if action == "sign-in" else "Signed out"} via kiosk form')
+            written += 1
+
+
+def generate_data(users=0, units=0, logs=0, days=365, batch_size=DATAGEN_BATCH_SIZE, seed=None, on_progress=None):
+    """Add synthetic users, computer units and activity logs and return how many of each were written.
+
+    Rows are built lazily and inserted with bulk_create ``batch_size`` at a
+    time, so millions of logs fit in flat memory. Logs are spread over the
+    last ``days`` days as sign-in/sign-out pairs of existing users at
+    existing units, with a small share of admin entries. ``seed`` makes a
+    run repeatable. Generated IDs continue from the current row counts and
+    rows that would clash with existing IDs are skipped and not counted.
+    on_progress(label, created) is called after every batch.
+    """
+    rng = random.Random(seed)
+    counts = {
+        'users': _insert(ComputerUser, _users(rng, users, ComputerUser.objects.count() + 1), batch_size, on_progress),
+        'units': _insert(ComputerUnit, _units(rng, units, ComputerUnit.objects.count() + 1), batch_size, on_progress),
+        'logs': 0,
+    }
+
+    stations = list(ComputerUnit.objects.order_by().values_list('unit_id', flat=True))
+    if counts['units']:
+        # bulk_create skips the post_save handler that fills the station index
+        Station.objects.bulk_create([Station(name=name) for name in stations], ignore_conflicts=True)
+        cache.delete(STATIONS_CACHE_KEY)
+
+    if logs:
+        user_rows = [
+            (pk, student_id, f'{first_name} {last_name}')
+            for pk, student_id, first_name, last_name in ComputerUser.objects.filter(access_level='student')
+            .order_by().values_list('pk', 'student_id', 'first_name', 'last_name')
+        ]
+        if not user_rows or not stations:
+            raise ValueError('Activity logs need at least one student and one computer unit')
+        counts['logs'] = _insert(ActivityLog, _logs(rng, logs, days, user_rows, stations), batch_size, on_progress)
+
+    # Nor do units and users announce themselves; make every view reload
+    bump_unit_version()
+    invalidate_dashboard_snapshot()
+    return counts
@@ -0,0 +1,65 @@
+import asyncio
+import json
+import threading
+
+# Seconds between keep-alive comments on an idle stream
+SSE_HEARTBEAT_SECONDS = 15
+# Milliseconds the browser waits before reconnecting a closed stream
+SSE_RETRY_MS = 5000
+
+
+class UnitEventBroker:
+    """Fan out unit status deltas to every connected event stream.
+
+    Views publish from worker threads; each subscriber is an asyncio queue
+    bound to the event loop serving its stream, so publish() hands events
+    over with call_soon_threadsafe. One publish feeds every open tab, and no
+    subscriber ever reads the database.
+    """
+
+    def __init__(self, max_pending=100):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self.max_pending = max_pending
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is gone
+                self.unsubscribe((loop, queue))
+
+    @staticmethod
+    def _deliver(queue, event):
+        if queue.full():
+            # A slow client fell behind: drop its backlog and tell it to resync
+            while not queue.empty():
+                queue.get_nowait()
+            event = {'type': 'resync'}
+        queue.put_nowait(event)
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Events message"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+unit_events = UnitEventBroker()
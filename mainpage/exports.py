@@ -0,0 +1,39 @@
+import csv
+import json
+
+EXPORT_FIELDS = ('id', 'timestamp', 'student_id', 'full_name', 'action', 'computer_station', 'notes')
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the CSV writer"""
+
+    def write(self, value):
+        return value
+
+
+def _serialize(row):
+    record = dict(zip(EXPORT_FIELDS, row))
+    record['timestamp'] = record['timestamp'].isoformat()
+    return record
+
+
+def stream_csv(rows):
+    """Yield a CSV export of ``rows`` (tuples in EXPORT_FIELDS order) one line at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        record = _serialize(row)
+        yield writer.writerow([record[field] if record[field] is not None else '' for field in EXPORT_FIELDS])
+
+
+def stream_ndjson(rows):
+    """Yield one JSON object per line for ``rows`` (tuples in EXPORT_FIELDS order)"""
+    for row in rows:
+        yield json.dumps(_serialize(row)) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv', 'csv'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+}
@@ -0,0 +1,169 @@
+import csv
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .dashboard import invalidate_dashboard_snapshot
+from .models import ComputerUser
+from .querybudget import bulk_statements
+
+IMPORT_REQUIRED_COLUMNS = ('student_id', 'first_name', 'last_name', 'contact_number', 'course', 'address')
+IMPORT_OPTIONAL_COLUMNS = ('email', 'access_level', 'status')
+# Rows validated, duplicate-checked and inserted together in one transaction
+IMPORT_BATCH_SIZE = 1000
+
+
+class ImportResult:
+    """Running totals for a user import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.rejected = 0
+
+
+def import_extra_queries(rows, batch_size=IMPORT_BATCH_SIZE):
+    """Most queries importing ``rows`` rows can run beyond a one-row import.
+
+    Each batch of the file costs a duplicate check, a transaction and the
+    bulk_create, which the database may split into several inserts.
+    """
+    fields = [field for field in ComputerUser._meta.concrete_fields if not field.primary_key]
+    queries = 0
+    for start in range(0, rows, batch_size):
+        queries += 3 + bulk_statements(fields, min(batch_size, rows - start))
+    return max(queries - 4, 0)
+
+
+def validate_user_values(values):
+    """Return an error message for invalid ComputerUser field values, or None.
+
+    Only the fields present in ``values`` are checked: choice fields must hold
+    a known choice, email must be well formed and strings must fit the column.
+    """
+    if 'access_level' in values and values['access_level'] not in dict(ComputerUser.ACCESS_LEVEL_CHOICES):
+        return f'Invalid access level "{values["access_level"]}"'
+    if 'status' in values and values['status'] not in dict(ComputerUser.STATUS_CHOICES):
+        return f'Invalid status "{values["status"]}"'
+    if values.get('email'):
+        try:
+            validate_email(values['email'])
+        except ValidationError:
+            return f'Invalid email "{values["email"]}"'
+
+    for name, value in values.items():
+        max_length = ComputerUser._meta.get_field(name).max_length
+        if max_length is not None and value is not None and len(value) > max_length:
+            return f'{name.replace("_", " ").title()} is longer than {max_length} characters'
+    return None
+
+
+def _clean_row(row):
+    """Return (ComputerUser, None) for a valid CSV row or (None, error message)"""
+    values = {name: (row.get(name) or '').strip() for name in IMPORT_REQUIRED_COLUMNS + IMPORT_OPTIONAL_COLUMNS}
+    for name in IMPORT_REQUIRED_COLUMNS:
+        if not values[name]:
+            return None, f'{name.replace("_", " ").title()} is required'
+
+    values['access_level'] = values['access_level'].lower() or 'student'
+    values['status'] = values['status'].lower() or 'active'
+    error = validate_user_values(values)
+    if error:
+        return None, error
+    return ComputerUser(computer_station='', **values), None
+
+
+def _numbered_rows(reader):
+    """Yield (line number, row) for each record of a DictReader.
+
+    The number is the physical line the record starts on (the header is
+    line 1), which stays right when quoted fields span several lines.
+    """
+    line_number = reader.line_num + 1
+    for row in reader:
+        yield line_number, row
+        line_number = reader.line_num + 1
+
+
+def _reject_existing(candidates, reject):
+    """Reject the (line number, row, user) candidates whose student ID is taken and return the rest"""
+    existing = set(ComputerUser.objects.filter(
+        student_id__in=[user.student_id for _, _, user in candidates]
+    ).values_list('student_id', flat=True))
+    remaining = []
+    for line_number, row, user in candidates:
+        if user.student_id in existing:
+            reject(line_number, row, f'Student ID "{user.student_id}" already exists')
+        else:
+            remaining.append((line_number, row, user))
+    return remaining
+
+
+def import_users(csv_file, batch_size=IMPORT_BATCH_SIZE, on_reject=None, on_progress=None):
+    """Create ComputerUsers from a CSV text stream and return an ImportResult.
+
+    The file is read one batch at a time. Each batch is validated in Python,
+    checked for existing student IDs with a single query, and inserted with
+    bulk_create inside its own transaction, so memory use and transaction
+    size stay bounded whatever the file size. A student ID created by
+    someone else between the check and the insert rejects that row only.
+
+    on_reject(line_number, row, error) is called for every rejected row and
+    on_progress(result) after every batch. Raises ValueError if the header
+    lacks a required column.
+    """
+    reader = csv.DictReader(csv_file)
+    missing = [name for name in IMPORT_REQUIRED_COLUMNS if name not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f'Missing required columns: {", ".join(missing)}')
+
+    result = ImportResult()
+    seen_ids = set()  # student IDs already taken by earlier rows of this file
+
+    def reject(line_number, row, error):
+        result.rejected += 1
+        if on_reject:
+            on_reject(line_number, row, error)
+
+    rows = _numbered_rows(reader)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        candidates = []
+        for line_number, row in batch:
+            user, error = _clean_row(row)
+            if error:
+                reject(line_number, row, error)
+            elif user.student_id in seen_ids:
+                reject(line_number, row, f'Duplicate student ID "{user.student_id}" in file')
+            else:
+                seen_ids.add(user.student_id)
+                candidates.append((line_number, row, user))
+
+        new_users = _reject_existing(candidates, reject)
+        while new_users:
+            try:
+                with transaction.atomic():
+                    ComputerUser.objects.bulk_create([user for _, _, user in new_users], batch_size=batch_size)
+                break
+            except IntegrityError:
+                # Someone else created some of these student IDs since the
+                # check above; reject those and insert the rest
+                remaining = _reject_existing(new_users, reject)
+                if len(remaining) == len(new_users):
+                    raise
+                new_users = remaining
+
+        result.rows += len(batch)
+        result.imported += len(new_users)
+        if on_progress:
+            on_progress(result)
+
+    if result.imported:
+        # bulk_create does not send post_save, so refresh the dashboard here
+        invalidate_dashboard_snapshot()
+    return result
@@ -0,0 +1,111 @@
+from django.db import transaction
+
+from .log_filters import student_activity_logs
+from .models import LabSession
+from .usage import record_session_usage
+
+# Logs read per fetch and sessions written per insert during a rebuild
+REBUILD_BATCH_SIZE = 5000
+
+
+def start_lab_session(user, computer_station, started_at):
+    """Open a session for a kiosk sign-in, closing any the user left open"""
+    LabSession.objects.filter(user=user, ended_at__isnull=True).update(ended_at=started_at)
+    return LabSession.objects.create(
+        user=user,
+        student_id=user.student_id,
+        computer_station=computer_station,
+        started_at=started_at,
+    )
+
+
+def end_lab_session(user, ended_at):
+    """Close the user's open session at a kiosk sign-out and add it to the usage rollups.
+
+    The session is read, then closed with an UPDATE that only matches
+    while it is still open, so of two concurrent sign-outs only one closes
+    it and adds it to the rollups; the other returns None.
+    """
+    session = LabSession.objects.filter(user=user, ended_at__isnull=True).order_by().first()
+    if session is None:
+        return None
+    session.ended_at = ended_at
+    session.duration = ended_at - session.started_at
+    closed = LabSession.objects.filter(pk=session.pk, ended_at__isnull=True).update(
+        ended_at=session.ended_at, duration=session.duration,
+    )
+    if not closed:
+        return None
+    record_session_usage(session)
+    return session
+
+
+def rebuild_lab_sessions(batch_size=REBUILD_BATCH_SIZE, on_progress=None):
+    """Replace the LabSessions the activity log still covers with sessions paired from it.
+
+    Student sign-ins and sign-outs are streamed oldest first in one pass,
+    keeping only each student's open session in memory. A sign-out closes
+    the open session; a sign-in opens a new one, first closing any still
+    open without a duration, as the kiosk does. Sign-outs with nothing open
+    are skipped. Sessions left open at the end stay open.
+
+    Only sessions that started at or after the oldest student log are
+    replaced; older ones were paired from logs since moved to the archive
+    (see archive_logs) and are kept as they are.
+
+    The rebuild runs in one transaction, so readers never see a half-built
+    table, but kiosk sign-ins wait for it; run it when the lab is quiet.
+    Returns (sessions written, sign-outs skipped, oldest log timestamp or
+    None if the log is empty); on_progress(logs read) is called after every
+    batch of logs.
+    """
+    written = skipped = read = 0
+    pending = []
+    open_sessions = {}  # student_id -> LabSession
+
+    def flush():
+        nonlocal written
+        LabSession.objects.bulk_create(pending, batch_size=batch_size)
+        written += len(pending)
+        pending.clear()
+
+    with transaction.atomic():
+        since = student_activity_logs().order_by('timestamp').values_list('timestamp', flat=True).first()
+        if since is None:
+            return 0, 0, None
+        LabSession.objects.filter(started_at__gte=since).delete()
+        rows = (
+            student_activity_logs()
+            .order_by('timestamp', 'id')
+            .values_list('user_id', 'student_id', 'action', 'computer_station', 'timestamp')
+            .iterator(chunk_size=batch_size)
+        )
+        for user_id, student_id, action, computer_station, timestamp in rows:
+            read += 1
+            key = student_id or f'user:{user_id}'
+            session = open_sessions.pop(key, None)
+            if action == 'sign-in':
+                if session is not None:
+                    session.ended_at = timestamp
+                    pending.append(session)
+                open_sessions[key] = LabSession(
+                    user_id=user_id,
+                    student_id=student_id or '',
+                    computer_station=computer_station or '',
+                    started_at=timestamp,
+                )
+            elif session is not None:
+                session.ended_at = timestamp
+                session.duration = timestamp - session.started_at
+                pending.append(session)
+            else:
+                skipped += 1
+
+            if len(pending) >= batch_size:
+                flush()
+            if on_progress and read % batch_size == 0:
+                on_progress(read)
+
+        pending.extend(open_sessions.values())
+        flush()
+    return written, skipped, since
@@ -0,0 +1,142 @@
+import re
+from datetime import datetime, time, timedelta
+
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_time
+from django.utils.http import urlencode
+
+from .models import ActivityLog, ComputerUser
+from .search import search_users
+
+LOG_FILTER_PARAMS = ('search', 'action', 'station', 'date_from', 'date_to', 'time_from', 'time_to')
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def student_activity_logs():
+    """Activity logs for student sign-ins and sign-outs, without admin activity"""
+    return ActivityLog.objects.filter(actor_type='student')
+
+
+def parse_log_filters(params):
+    """Read the activity log filters from a QueryDict, dropping blank or invalid values"""
+    filters = {}
+    for name in LOG_FILTER_PARAMS:
+        value = params.get(name, '').strip()
+        if value:
+            filters[name] = value
+
+    if filters.get('action') not in (None, *dict(ActivityLog.ACTION_CHOICES)):
+        del filters['action']
+    for names, parse in ((('date_from', 'date_to'), parse_date), (('time_from', 'time_to'), parse_time)):
+        for name in names:
+            if name in filters and _parses(parse, filters[name]) is None:
+                del filters[name]
+    return filters
+
+
+def _parses(parse, value):
+    # parse_date and parse_time raise ValueError for well-formed but impossible
+    # values such as 2025-02-30 or 25:00
+    try:
+        return parse(value)
+    except ValueError:
+        return None
+
+
+def apply_log_filters(queryset, filters):
+    """Filter an ActivityLog queryset in the database.
+
+    Every filter is an equality or a range on an indexed column, so with the
+    keyset ordering the database reads only the rows for the requested page:
+    - search: prefix match on student ID, full name or station, or every
+      word matching the start of a word in the logged user's record (the
+      user search index), so last names and parts of IDs are found too;
+      rows are tested while walking the page order, so a common term stops
+      after one page
+    - action, station: exact match
+    - date_from/date_to (+ optional time_from/time_to): local-time range
+    """
+    search = filters.get('search')
+    if search:
+        condition = (
+            models.Q(student_id__startswith=search) |
+            models.Q(full_name__istartswith=search) |
+            models.Q(computer_station__istartswith=search)
+        )
+        if _WORD_RE.search(search):
+            condition |= models.Q(user__in=search_users(ComputerUser.objects.all(), search).values('id'))
+        queryset = queryset.filter(condition)
+    if filters.get('action'):
+        queryset = queryset.filter(action=filters['action'])
+    if filters.get('station'):
+        queryset = queryset.filter(computer_station=filters['station'])
+
+    start, end, end_inclusive = log_filter_bounds(filters)
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(**{'timestamp__lte' if end_inclusive else 'timestamp__lt': end})
+    return queryset
+
+
+def log_filter_bounds(filters):
+    """Return (start, end, end_inclusive) for the date/time filters; unset bounds are None"""
+    start = end = None
+    end_inclusive = False
+    if filters.get('date_from'):
+        start_time = parse_time(filters['time_from']) if filters.get('time_from') else time.min
+        start = timezone.make_aware(datetime.combine(parse_date(filters['date_from']), start_time))
+    if filters.get('date_to'):
+        end_date = parse_date(filters['date_to'])
+        if filters.get('time_to'):
+            end = timezone.make_aware(datetime.combine(end_date, parse_time(filters['time_to'])))
+            end_inclusive = True
+        else:
+            end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    return start, end, end_inclusive
+
+
+def is_student_activity(record):
+    """Python version of student_activity_logs() for a dict of log fields"""
+    if 'actor_type' in record:
+        return record['actor_type'] == 'student'
+    # Archived before actor_type existed: recognise admin events the old way
+    notes = (record.get('notes') or '').lower()
+    return (record.get('computer_station') != 'Admin Dashboard'
+            and 'admin login' not in notes and 'admin logout' not in notes)
+
+
+def log_matches_filters(record, filters):
+    """Python version of apply_log_filters() for a dict of log fields, used on archived logs"""
+    search = filters.get('search')
+    if search and not _record_matches_search(record, search):
+        return False
+    if filters.get('action') and record.get('action') != filters['action']:
+        return False
+    if filters.get('station') and record.get('computer_station') != filters['station']:
+        return False
+    start, end, end_inclusive = log_filter_bounds(filters)
+    timestamp = record['timestamp']
+    if start is not None and timestamp < start:
+        return False
+    if end is not None and (timestamp > end if end_inclusive else timestamp >= end):
+        return False
+    return True
+
+
+def _record_matches_search(record, search):
+    # Archived rows cannot reach the user search index, so their own student
+    # ID, name and station stand in for the user's record
+    fields = [record.get(name) or '' for name in ('student_id', 'full_name', 'computer_station')]
+    if fields[0].startswith(search) or any(field.lower().startswith(search.lower()) for field in fields[1:]):
+        return True
+    words = _WORD_RE.findall(search.lower())
+    tokens = _WORD_RE.findall(' '.join(fields).lower())
+    return bool(words) and all(any(token.startswith(word) for token in tokens) for word in words)
+
+
+def log_filter_query(filters):
+    """URL-encode the active filters so pagination links keep them"""
+    return urlencode([(name, filters[name]) for name in LOG_FILTER_PARAMS if name in filters])
@@ -0,0 +1,94 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import ActivityLog
+from .stations import record_station
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogWriter:
+    """Write-behind buffer for activity log entries.
+
+    With ACTIVITY_LOG_BUFFERED off, log() simply creates the entry. With it
+    on, entries are stamped and queued in memory once their transaction
+    commits, and written with one bulk_create when ACTIVITY_LOG_BUFFER_SIZE
+    entries are waiting, when the oldest has waited
+    ACTIVITY_LOG_FLUSH_SECONDS, or when the process exits. A failed flush
+    puts the entries back and retries on the next flush.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()  # guards the queue and the timer
+        self._flush_lock = threading.Lock()  # one bulk_create at a time
+        self._pending = []
+        self._timer = None
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def log(self, **fields):
+        """Record an activity log entry and return it (unsaved while buffered)"""
+        if not getattr(settings, 'ACTIVITY_LOG_BUFFERED', False):
+            return ActivityLog.objects.create(**fields)
+        fields.setdefault('timestamp', timezone.now())
+        entry = ActivityLog(**fields)
+        # Entries from a rolled-back transaction are never queued
+        transaction.on_commit(lambda: self._enqueue(entry))
+        return entry
+
+    def _enqueue(self, entry):
+        with self._lock:
+            self._pending.append(entry)
+            full = len(self._pending) >= getattr(settings, 'ACTIVITY_LOG_BUFFER_SIZE', 100)
+            if not full:
+                self._schedule()
+        if full:
+            self.flush()
+
+    def _schedule(self):
+        # Called with self._lock held
+        if self._timer is None:
+            self._timer = threading.Timer(getattr(settings, 'ACTIVITY_LOG_FLUSH_SECONDS', 2), self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread opened its own database connection
+            connections.close_all()
+
+    def flush(self):
+        """Write every queued entry and return how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                entries, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not entries:
+                return 0
+            try:
+                ActivityLog.objects.bulk_create(entries)
+            except Exception:
+                logger.exception('Could not write %d activity log entries; will retry', len(entries))
+                with self._lock:
+                    self._pending[:0] = entries
+                    self._schedule()
+                return 0
+            # bulk_create does not send post_save, which records new stations
+            for station in {entry.computer_station for entry in entries}:
+                record_station(station)
+            return len(entries)
+
+
+activity_log_writer = ActivityLogWriter()
+atexit.register(activity_log_writer.flush)
@@ -0,0 +1,46 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from mainpage.archive import ARCHIVE_BATCH_SIZE, archive_dir, archive_logs
+
+
+class Command(BaseCommand):
+    help = 'Move old activity logs into compressed monthly archive segments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Archive logs older than this many days (default: ACTIVITY_LOG_RETENTION_DAYS)')
+        parser.add_argument('--before', type=str, default=None, help='Archive logs from before this date (YYYY-MM-DD) instead')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='Rows moved per step')
+        parser.add_argument('--dir', type=str, default=None, help='Archive directory (default: ACTIVITY_LOG_ARCHIVE_DIR)')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        if options['before']:
+            try:
+                before_date = parse_date(options['before'])
+            except ValueError:
+                # Well formed but impossible, e.g. 2024-13-45
+                before_date = None
+            if before_date is None:
+                raise CommandError('--before must be a date in YYYY-MM-DD format')
+            before = timezone.make_aware(datetime.combine(before_date, time.min))
+        else:
+            days = options['days'] if options['days'] is not None else getattr(settings, 'ACTIVITY_LOG_RETENTION_DAYS', 180)
+            if days < 0:
+                raise CommandError('--days cannot be negative')
+            before = timezone.now() - timedelta(days=days)
+
+        directory = options['dir'] or archive_dir()
+
+        def on_progress(total):
+            self.stdout.write(f'Archived {total} logs')
+
+        total = archive_logs(before, options['batch_size'], directory, on_progress)
+        self.stdout.write(
+            self.style.SUCCESS(f'Archived {total} logs older than {timezone.localtime(before):%Y-%m-%d %H:%M} to {directory}')
+        )
@@ -0,0 +1,66 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from mainpage.benchmark import BenchmarkRunner, compare_results
+
+
+class Command(BaseCommand):
+    help = 'Time every page and API endpoint and save p50/p95/p99 latency and query counts as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint before timing')
+        parser.add_argument('--cold', action='store_true', help='Clear the cache before every request')
+        parser.add_argument('--user', type=str, default=None, help='Staff username to browse as (default: the first active staff user)')
+        parser.add_argument('--output', type=str, default=None, help='Results file (default: benchmarks/benchmark-<timestamp>.json)')
+        parser.add_argument('--compare', type=str, default=None, help='Earlier results file to compare against')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+        if options['warmup'] < 0:
+            raise CommandError('--warmup cannot be negative')
+
+        staff = User.objects.filter(is_staff=True, is_active=True)
+        if options['user']:
+            staff = staff.filter(username=options['user'])
+        staff_user = staff.order_by('pk').first()
+        if staff_user is None:
+            raise CommandError('No active staff user found; create one with create_admin first')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Could not read {options["compare"]}: {e}')
+
+        def on_result(result):
+            line = (
+                f'{result["label"]:<26} p50 {result["p50_ms"]:>8.2f} ms  p95 {result["p95_ms"]:>8.2f} ms  '
+                f'p99 {result["p99_ms"]:>8.2f} ms  {result["queries"]:>3} queries'
+            )
+            if result['query_budget'] is not None and result['queries'] > result['query_budget']:
+                self.stdout.write(self.style.WARNING(f'{line} (budget {result["query_budget"]})'))
+            else:
+                self.stdout.write(line)
+
+        runner = BenchmarkRunner(staff_user, options['requests'], options['warmup'], options['cold'])
+        report = runner.run(on_result)
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'benchmarks' / f'benchmark-{timezone.localtime():%Y%m%d-%H%M%S}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f'Saved results for {len(report["results"])} endpoints to {output}'))
+
+        if baseline is not None:
+            self.stdout.write(f'Compared with {options["compare"]}:')
+            for label, metric, before, after, change in compare_results(baseline, report):
+                line = f'{label:<26} {metric:<8} {before:>10} -> {after:>10} ({change:+.1f}%)'
+                self.stdout.write(self.style.WARNING(line) if change > 10 else line)
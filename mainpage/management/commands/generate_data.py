@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from mainpage.datagen import DATAGEN_BATCH_SIZE, generate_data
+
+
+class Command(BaseCommand):
+    help = 'Add synthetic users, computer units and activity logs for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20000, help='Computer users to add')
+        parser.add_argument('--units', type=int, default=2000, help='Computer units to add')
+        parser.add_argument('--logs', type=int, default=1000000, help='Activity log entries to add')
+        parser.add_argument('--days', type=int, default=365, help='Spread the logs over this many past days')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for repeatable data')
+        parser.add_argument('--batch-size', type=int, default=DATAGEN_BATCH_SIZE, help='Rows inserted per bulk insert')
+
+    def handle(self, *args, **options):
+        for name in ('users', 'units', 'logs'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} cannot be negative')
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        def on_progress(label, created):
+            self.stdout.write(f'{label}: {created}')
+
+        try:
+            counts = generate_data(
+                users=options['users'],
+                units=options['units'],
+                logs=options['logs'],
+                days=options['days'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+                on_progress=on_progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Generated {counts["users"]} users, {counts["units"]} units and {counts["logs"]} activity logs.')
+        )
@@ -0,0 +1,58 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from mainpage.imports import IMPORT_BATCH_SIZE, import_users
+
+
+class Command(BaseCommand):
+    help = 'Import computer users from a CSV file with a header row'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', type=str, help='CSV file with student_id, first_name, last_name, contact_number, course and address columns')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help='Rows validated and inserted per transaction')
+        parser.add_argument('--rejects', type=str, default=None, help='Where to write rejected rows (default: <csv_path>.rejects.csv)')
+
+    def handle(self, *args, **options):
+        csv_path = options['csv_path']
+        rejects_path = options['rejects'] or f'{csv_path}.rejects.csv'
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        rejects_file = None
+        rejects_writer = None
+        columns = []
+
+        def on_reject(line_number, row, error):
+            nonlocal rejects_file, rejects_writer
+            if rejects_writer is None:
+                # Only create the reject file once there is something to put in it
+                rejects_file = open(rejects_path, 'w', newline='', encoding='utf-8')
+                rejects_writer = csv.writer(rejects_file)
+                rejects_writer.writerow(['line', 'error', *columns])
+            # Missing values are left blank and extra ones follow the named columns
+            rejects_writer.writerow([line_number, error, *(row.get(name) or '' for name in columns), *row.get(None, [])])
+
+        def on_progress(result):
+            self.stdout.write(f'Processed {result.rows} rows: {result.imported} imported, {result.rejected} rejected')
+
+        try:
+            with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+                # The reject file repeats the CSV's own header
+                columns = next(csv.reader(csv_file), [])
+                csv_file.seek(0)
+                result = import_users(csv_file, options['batch_size'], on_reject, on_progress)
+        except OSError as e:
+            raise CommandError(f'Could not read {csv_path}: {e}')
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if rejects_file is not None:
+                rejects_file.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Imported {result.imported} of {result.rows} users.')
+        )
+        if result.rejected:
+            self.stdout.write(
+                self.style.WARNING(f'{result.rejected} rows were rejected; see {rejects_path}')
+            )
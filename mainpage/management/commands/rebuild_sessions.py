@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from mainpage.labsessions import REBUILD_BATCH_SIZE, rebuild_lab_sessions
+from mainpage.usage import recompute_usage
+
+
+class Command(BaseCommand):
+    help = 'Rebuild lab sessions by pairing sign-ins with sign-outs in the activity log, then the usage rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=REBUILD_BATCH_SIZE, help='Logs read per fetch and sessions written per insert')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        def on_progress(read):
+            self.stdout.write(f'Read {read} logs')
+
+        written, skipped, since = rebuild_lab_sessions(options['batch_size'], on_progress)
+        if since is None:
+            self.stdout.write(self.style.WARNING('The activity log has no student sign-ins or sign-outs; nothing was rebuilt.'))
+            return
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} lab sessions.'))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'{skipped} sign-outs had no matching sign-in and were skipped.'))
+
+        # Rollups before the oldest live log come from archived sessions; keep them
+        hours, days = recompute_usage(timezone.localdate(since), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {hours} station hours and {days} lab days of usage.'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from mainpage.usage import RECOMPUTE_BATCH_SIZE, recompute_usage
+
+
+class Command(BaseCommand):
+    help = 'Recompute the hourly station and daily lab usage rollups from lab sessions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', type=str, default=None, help='First local date, YYYY-MM-DD (default: the first session)')
+        parser.add_argument('--to', dest='date_to', type=str, default=None, help='Last local date, YYYY-MM-DD (default: the last session)')
+        parser.add_argument('--batch-size', type=int, default=RECOMPUTE_BATCH_SIZE, help='Sessions read per fetch and rows written per insert')
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            value = options[name]
+            try:
+                dates[name] = parse_date(value) if value else None
+            except ValueError:
+                dates[name] = None
+            if value and dates[name] is None:
+                raise CommandError(f'--{name[5:]} must be a date like 2025-01-31')
+        if dates['date_from'] and dates['date_to'] and dates['date_from'] > dates['date_to']:
+            raise CommandError('--from must not be after --to')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        hours, days = recompute_usage(dates['date_from'], dates['date_to'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Recomputed {hours} station hours and {days} lab days.'))
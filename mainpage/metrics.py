@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.urls import get_resolver
+
+from .models import ComputerUnit
+from .registry import unit_registry
+from .signins import signed_in_count
+
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Any other method is counted as OTHER, to bound the number of series
+HTTP_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+# Label for requests that matched no URL pattern
+UNRESOLVED_VIEW = 'unresolved'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+class RequestMetrics:
+    """Per-URL-name request counters, latency histograms and DB time for this process.
+
+    Like the local memory cache, the numbers are per process: Prometheus
+    should scrape every worker, or run a single one.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = Counter()  # (view, method, status) -> requests
+            self._latency = {}  # view -> [count per bucket, ..., +Inf count]
+            self._latency_sum = Counter()  # view -> seconds
+            self._db_seconds = Counter()  # view -> seconds
+            self._db_queries = Counter()  # view -> queries
+
+    def observe(self, view, method, status, seconds, db_seconds, db_queries):
+        """Record one finished request"""
+        method = method if method in HTTP_METHODS else 'OTHER'
+        with self._lock:
+            self._requests[view, method, str(status)] += 1
+            if view not in self._latency:
+                self._latency[view] = [0] * (len(self.buckets) + 1)
+            # Counts are kept per bucket and made cumulative when rendered
+            self._latency[view][bisect_left(self.buckets, seconds)] += 1
+            self._latency_sum[view] += seconds
+            self._db_seconds[view] += db_seconds
+            self._db_queries[view] += db_queries
+
+    def render(self, views=()):
+        """Return the metrics as lines of Prometheus text format.
+
+        ``views`` are URL names to report even before their first request,
+        so their series start at zero.
+        """
+        with self._lock:
+            requests = dict(self._requests)
+            latency = {view: list(counts) for view, counts in self._latency.items()}
+            latency_sum = dict(self._latency_sum)
+            db_seconds = dict(self._db_seconds)
+            db_queries = dict(self._db_queries)
+        all_views = sorted(set(views) | set(latency))
+
+        lines = [
+            '# HELP comlab_http_requests_total Requests handled, by URL name, method and status.',
+            '# TYPE comlab_http_requests_total counter',
+        ]
+        for (view, method, status), count in sorted(requests.items()):
+            lines.append(f'comlab_http_requests_total{_labels(view=view, method=method, status=status)} {count}')
+
+        lines += [
+            '# HELP comlab_http_request_duration_seconds Request latency, by URL name.',
+            '# TYPE comlab_http_request_duration_seconds histogram',
+        ]
+        for view in all_views:
+            counts = latency.get(view, [0] * (len(self.buckets) + 1))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'comlab_http_request_duration_seconds_bucket{_labels(view=view, le=bound)} {cumulative}')
+            lines.append(f'comlab_http_request_duration_seconds_sum{_labels(view=view)} {latency_sum.get(view, 0)}')
+            lines.append(f'comlab_http_request_duration_seconds_count{_labels(view=view)} {cumulative}')
+
+        lines += [
+            '# HELP comlab_db_query_duration_seconds_total Time spent in database queries, by URL name.',
+            '# TYPE comlab_db_query_duration_seconds_total counter',
+        ]
+        for view in all_views:
+            lines.append(f'comlab_db_query_duration_seconds_total{_labels(view=view)} {db_seconds.get(view, 0)}')
+        lines += [
+            '# HELP comlab_db_queries_total Database queries run, by URL name.',
+            '# TYPE comlab_db_queries_total counter',
+        ]
+        for view in all_views:
+            lines.append(f'comlab_db_queries_total{_labels(view=view)} {db_queries.get(view, 0)}')
+        return lines
+
+
+request_metrics = RequestMetrics()
+
+
+def url_names():
+    """Names of every named URL pattern"""
+    names = set()
+
+    def collect(patterns):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                collect(pattern.url_patterns)
+            elif pattern.name:
+                names.add(pattern.name)
+
+    collect(get_resolver().url_patterns)
+    return names
+
+
+def domain_metrics():
+    """Gauges for units by status and signed-in users, from maintained counters"""
+    status_counts, _ = unit_registry.status_counts()
+    lines = [
+        '# HELP comlab_units Computer units, by status.',
+        '# TYPE comlab_units gauge',
+    ]
+    for status, _ in ComputerUnit.STATUS_CHOICES:
+        lines.append(f'comlab_units{_labels(status=status)} {status_counts.get(status, 0)}')
+    lines += [
+        '# HELP comlab_signed_in_users Users currently signed in to a PC.',
+        '# TYPE comlab_signed_in_users gauge',
+        f'comlab_signed_in_users {signed_in_count()}',
+    ]
+    return lines
+
+
+class MetricsMiddleware:
+    """Record every request's latency, DB time and query count under its URL name.
+
+    Streaming responses are timed until the response is returned. With
+    METRICS_ENABLED off the middleware is not installed.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db_seconds = 0.0
+        db_queries = 0
+
+        def timer(execute, sql, params, many, context):
+            nonlocal db_seconds, db_queries
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                db_seconds += time.perf_counter() - started
+                db_queries += 1
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        seconds = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else UNRESOLVED_VIEW
+        request_metrics.observe(view, request.method, response.status_code, seconds, db_seconds, db_queries)
+        return response
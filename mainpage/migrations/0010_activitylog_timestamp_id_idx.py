@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainpage', '0009_computeruser_password'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['timestamp', 'id'], name='activitylog_timestamp_id_idx'),
+        ),
+    ]
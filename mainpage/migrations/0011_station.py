@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:58
+
+from django.db import migrations, models
+
+# Admin sign-ins are logged against this pseudo-station; it is not a PC
+ADMIN_STATION = 'Admin Dashboard'
+
+
+def backfill_stations(apps, schema_editor):
+    ActivityLog = apps.get_model('mainpage', 'ActivityLog')
+    ComputerUnit = apps.get_model('mainpage', 'ComputerUnit')
+    Station = apps.get_model('mainpage', 'Station')
+    names = set(ComputerUnit.objects.values_list('unit_id', flat=True))
+    names.update(ActivityLog.objects.exclude(computer_station__isnull=True).values_list('computer_station', flat=True).distinct())
+    names.discard('')
+    names.discard(ADMIN_STATION)
+    Station.objects.bulk_create([Station(name=name) for name in sorted(names)], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainpage', '0010_activitylog_timestamp_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Station',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Station')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+            ],
+            options={
+                'verbose_name': 'Station',
+                'verbose_name_plural': 'Stations',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(backfill_stations, migrations.RunPython.noop),
+    ]
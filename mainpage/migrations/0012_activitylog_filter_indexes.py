@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:59
+
+from django.db import migrations, models
+
+# Log search is a case-insensitive prefix match (LIKE 'term%'). SQLite only
+# uses an index for that when the column is indexed with NOCASE collation;
+# MySQL's default case-insensitive collation works with a plain index.
+SEARCH_INDEXES = [
+    ('activitylog_student_id_search_idx', 'student_id'),
+    ('activitylog_full_name_search_idx', 'full_name'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for name, column in SEARCH_INDEXES:
+        if vendor == 'sqlite':
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{name}" ON "mainpage_activitylog" ("{column}" COLLATE NOCASE, "timestamp")'
+            )
+        elif vendor == 'mysql':
+            schema_editor.execute(
+                f'CREATE INDEX `{name}` ON `mainpage_activitylog` (`{column}`, `timestamp`)'
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for name, _ in SEARCH_INDEXES:
+        if vendor == 'sqlite':
+            schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+        elif vendor == 'mysql':
+            schema_editor.execute(f'DROP INDEX `{name}` ON `mainpage_activitylog`')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainpage', '0011_station'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['action', 'timestamp', 'id'], name='activitylog_action_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['computer_station', 'timestamp', 'id'], name='activitylog_station_ts_idx'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+# Columns covered by the user search index, in index order
+SEARCH_COLUMNS = [
+    'student_id', 'first_name', 'last_name', 'email', 'course',
+    'contact_number', 'address', 'access_level', 'status', 'computer_station',
+]
+
+SQLITE_FTS_TABLE = 'mainpage_computeruser_fts'
+MYSQL_FULLTEXT_INDEX = 'computeruser_search_ft'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    columns = ', '.join(SEARCH_COLUMNS)
+    if vendor == 'sqlite':
+        new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+        old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+        # External-content FTS5 table: the index stores only tokens, and the
+        # triggers keep it in step with every insert, update and delete,
+        # including bulk_create() and QuerySet.update().
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5({columns}, "
+            f"content='mainpage_computeruser', content_rowid='id', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {SQLITE_FTS_TABLE}_ai AFTER INSERT ON mainpage_computeruser BEGIN "
+            f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {SQLITE_FTS_TABLE}_ad AFTER DELETE ON mainpage_computeruser BEGIN "
+            f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER {SQLITE_FTS_TABLE}_au AFTER UPDATE ON mainpage_computeruser BEGIN "
+            f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        )
+        schema_editor.execute(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')")
+    elif vendor == 'mysql':
+        # InnoDB maintains FULLTEXT indexes on every write
+        schema_editor.execute(
+            f"ALTER TABLE mainpage_computeruser ADD FULLTEXT INDEX {MYSQL_FULLTEXT_INDEX} ({columns})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}")
+    elif vendor == 'mysql':
+        schema_editor.execute(f"ALTER TABLE mainpage_computeruser DROP INDEX {MYSQL_FULLTEXT_INDEX}")
+
+
+class Migration(migrations.Migration):
+    """Full-text search index over the searchable ComputerUser columns.
+
+    SQLite rebuilds a table for most ALTER TABLE operations, which drops its
+    triggers; any later migration that alters mainpage_computeruser on SQLite
+    must recreate them (run drop_search_index then create_search_index).
+    """
+
+    dependencies = [
+        ('mainpage', '0012_activitylog_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Stamp ActivityLog.timestamp from a Python default instead of auto_now_add.
+
+    Buffered log entries are written some time after the event, so the
+    timestamp has to be taken when the entry is queued. The column itself is
+    unchanged, so this only updates the migration state: altering the field
+    would make SQLite rebuild the table and drop the NOCASE search indexes
+    created in 0012.
+    """
+
+    dependencies = [
+        ('mainpage', '0013_computeruser_search_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='activitylog',
+                    name='timestamp',
+                    field=models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+    ]
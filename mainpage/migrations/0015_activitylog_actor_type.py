@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:15
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+filter_indexes = import_module('mainpage.migrations.0012_activitylog_filter_indexes')
+
+
+class Migration(migrations.Migration):
+    """Add ActivityLog.actor_type so admin events are filtered by an indexed column.
+
+    On SQLite, adding a NOT NULL column with a default rebuilds the table,
+    which drops the raw NOCASE search indexes from 0012, so they are
+    created again afterwards. Existing rows are backfilled in 0016.
+    """
+
+    dependencies = [
+        ('mainpage', '0014_activitylog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activitylog',
+            name='actor_type',
+            field=models.CharField(choices=[('student', 'Student'), ('admin', 'Administrator')], default='student', max_length=10),
+        ),
+        migrations.RunPython(filter_indexes.create_search_indexes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['actor_type', 'timestamp', 'id'], name='activitylog_actor_ts_idx'),
+        ),
+    ]
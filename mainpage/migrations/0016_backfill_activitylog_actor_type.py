@@ -0,0 +1,34 @@
+from django.db import migrations, models, transaction
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_actor_type(apps, schema_editor):
+    """Mark existing admin dashboard logins/logouts, one id range at a time"""
+    ActivityLog = apps.get_model('mainpage', 'ActivityLog')
+    admin_events = ActivityLog.objects.filter(
+        models.Q(computer_station='Admin Dashboard') |
+        models.Q(notes__icontains='Admin login') |
+        models.Q(notes__icontains='Admin logout')
+    )
+    last_id = 0
+    while True:
+        ids = list(ActivityLog.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BACKFILL_BATCH_SIZE])
+        if not ids:
+            break
+        # Each batch commits on its own so the table is never locked for long
+        with transaction.atomic():
+            admin_events.filter(id__gt=last_id, id__lte=ids[-1]).update(actor_type='admin')
+        last_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('mainpage', '0015_activitylog_actor_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_actor_type, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainpage', '0016_backfill_activitylog_actor_type'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='activitylog',
+            name='activitylog_action_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='activitylog',
+            name='activitylog_station_ts_idx',
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['actor_type', 'action', 'timestamp', 'id'], name='activitylog_actor_action_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['actor_type', 'computer_station', 'timestamp', 'id'], name='activitylog_actor_station_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='computerunit',
+            index=models.Index(fields=['status', 'unit_id'], name='computerunit_status_unit_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='computerunit',
+            index=models.Index(fields=['created_at'], name='computerunit_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='computeruser',
+            index=models.Index(fields=['created_at', 'id'], name='computeruser_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='computeruser',
+            index=models.Index(fields=['access_level', 'created_at', 'id'], name='computeruser_level_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='computeruser',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='computeruser_status_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='computeruser',
+            index=models.Index(fields=['access_level', 'status'], name='computeruser_level_status_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainpage', '0017_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_id', models.CharField(max_length=20)),
+                ('computer_station', models.CharField(max_length=50)),
+                ('started_at', models.DateTimeField()),
+                ('ended_at', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.DurationField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lab_sessions', to='mainpage.computeruser')),
+            ],
+            options={
+                'verbose_name': 'Lab Session',
+                'verbose_name_plural': 'Lab Sessions',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['user', 'started_at'], name='labsession_user_start_idx'), models.Index(fields=['computer_station', 'started_at'], name='labsession_station_start_idx'), models.Index(fields=['started_at'], name='labsession_start_idx'), models.Index(condition=models.Q(('ended_at__isnull', True)), fields=['user'], name='labsession_open_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainpage', '0018_labsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabDayUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('occupied_seconds', models.PositiveIntegerField(default=0)),
+                ('users', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Lab Day Usage',
+                'verbose_name_plural': 'Lab Day Usage',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StationHourUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('computer_station', models.CharField(max_length=50)),
+                ('hour', models.DateTimeField()),
+                ('hour_of_day', models.PositiveSmallIntegerField()),
+                ('occupied_seconds', models.PositiveIntegerField(default=0)),
+                ('users', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Station Hour Usage',
+                'verbose_name_plural': 'Station Hour Usage',
+                'ordering': ['hour', 'computer_station'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='labsession',
+            index=models.Index(fields=['user', 'ended_at'], name='labsession_user_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stationhourusage',
+            index=models.Index(fields=['hour'], name='stationhourusage_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stationhourusage',
+            constraint=models.UniqueConstraint(fields=('computer_station', 'hour'), name='stationhourusage_unique'),
+        ),
+    ]
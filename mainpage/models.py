@@ -35,6 +35,15 @@ class ComputerUser(models.Model):
         verbose_name = "Computer User"
         verbose_name_plural = "Computer Users"
         ordering = ['-created_at']
+        indexes = [
+            # The users page and API list newest first, optionally narrowed
+            # to one access level or status
+            models.Index(fields=['created_at', 'id'], name='computeruser_created_idx'),
+            models.Index(fields=['access_level', 'created_at', 'id'], name='computeruser_level_ts_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='computeruser_status_ts_idx'),
+            # Covers the users page statistics, so counting never reads the table
+            models.Index(fields=['access_level', 'status'], name='computeruser_level_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.student_id})"
@@ -66,6 +75,11 @@ class ComputerUnit(models.Model):
         verbose_name = "Computer Unit"
         verbose_name_plural = "Computer Units"
         ordering = ['-created_at']
+        indexes = [
+            # Dashboard lists and available-unit counts group units by status
+            models.Index(fields=['status', 'unit_id'], name='computerunit_status_unit_idx'),
+            models.Index(fields=['created_at'], name='computerunit_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.unit_id} - {self.status}"
@@ -76,6 +90,10 @@ class ActivityLog(models.Model):
         ('sign-in', 'Sign In'),
         ('sign-out', 'Sign Out'),
     ]
+    ACTOR_TYPE_CHOICES = [
+        ('student', 'Student'),
+        ('admin', 'Administrator'),
+    ]
 
     user = models.ForeignKey(ComputerUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='activity_logs')
     student_id = models.CharField(max_length=20, blank=True, null=True)
@@ -83,15 +101,127 @@ class ActivityLog(models.Model):
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     computer_station = models.CharField(max_length=50, blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Admin dashboard logins/logouts are 'admin'; kiosk activity is 'student'
+    actor_type = models.CharField(max_length=10, choices=ACTOR_TYPE_CHOICES, default='student')
+    timestamp = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-timestamp']
         verbose_name = 'Activity Log'
         verbose_name_plural = 'Activity Logs'
+        indexes = [
+            # Keyset pagination walks the log newest-first on (timestamp, id)
+            models.Index(fields=['timestamp', 'id'], name='activitylog_timestamp_id_idx'),
+            # The logs page lists one actor type newest-first
+            models.Index(fields=['actor_type', 'timestamp', 'id'], name='activitylog_actor_ts_idx'),
+            # Log filters: equality on actor type and the filtered column, then
+            # the page order. The case-insensitive prefix indexes used by log
+            # search are backend specific and created in migration 0012.
+            models.Index(fields=['actor_type', 'action', 'timestamp', 'id'], name='activitylog_actor_action_idx'),
+            models.Index(fields=['actor_type', 'computer_station', 'timestamp', 'id'], name='activitylog_actor_station_idx'),
+        ]
 
     def __str__(self):
         base = f"{self.timestamp.strftime('%Y-%m-%d %H:%M:%S')} - {self.action}"
         who = self.full_name or (self.user.full_name if self.user else self.student_id) or 'Unknown User'
         where = f" @ {self.computer_station}" if self.computer_station else ''
         return f"{base}: {who}{where}"
+
+
+class Station(models.Model):
+    """Distinct computer stations seen in units or activity logs.
+
+    Kept up to date as units are saved and logs are written, so the log
+    filters can list stations without scanning ActivityLog.
+    """
+    name = models.CharField(max_length=50, unique=True, verbose_name="Station")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+
+    class Meta:
+        verbose_name = "Station"
+        verbose_name_plural = "Stations"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class LabSession(models.Model):
+    """One stay at a PC, from a kiosk sign-in to the matching sign-out.
+
+    Written by the kiosk as students sign in and out, and rebuilt from the
+    activity log by the rebuild_sessions command. A session still open when
+    its user signs in again (say an admin cleared their station) is closed
+    at that sign-in with no duration, since its real end is unknown.
+    """
+    # Indexed by labsession_user_start_idx
+    user = models.ForeignKey(ComputerUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='lab_sessions', db_index=False)
+    student_id = models.CharField(max_length=20)
+    computer_station = models.CharField(max_length=50)
+    started_at = models.DateTimeField()
+    ended_at = models.DateTimeField(blank=True, null=True)
+    duration = models.DurationField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-started_at']
+        verbose_name = 'Lab Session'
+        verbose_name_plural = 'Lab Sessions'
+        indexes = [
+            # Usage per student or per PC is a range scan on one of these
+            models.Index(fields=['user', 'started_at'], name='labsession_user_start_idx'),
+            models.Index(fields=['computer_station', 'started_at'], name='labsession_station_start_idx'),
+            models.Index(fields=['started_at'], name='labsession_start_idx'),
+            # Sign-in and sign-out look up the user's open session
+            models.Index(fields=['user'], condition=models.Q(ended_at__isnull=True), name='labsession_open_idx'),
+            # Usage rollups look up the user's sessions that ended after a given time
+            models.Index(fields=['user', 'ended_at'], name='labsession_user_end_idx'),
+        ]
+
+    def __str__(self):
+        end = timezone.localtime(self.ended_at).strftime('%H:%M') if self.ended_at else 'now'
+        return f"{self.student_id} @ {self.computer_station}: {timezone.localtime(self.started_at).strftime('%Y-%m-%d %H:%M')} - {end}"
+
+
+class StationHourUsage(models.Model):
+    """Occupancy of one PC during one local clock hour, rolled up from closed lab sessions.
+
+    Kept up to date by the kiosk as sessions close and recomputed for any
+    date range by the recompute_usage command. ``users`` counts distinct
+    users. Sessions closed without a duration are left out.
+    """
+    computer_station = models.CharField(max_length=50)
+    hour = models.DateTimeField()
+    # Local clock hour (0-23) of ``hour``, so heatmaps group on a plain column
+    hour_of_day = models.PositiveSmallIntegerField()
+    occupied_seconds = models.PositiveIntegerField(default=0)
+    users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['hour', 'computer_station']
+        verbose_name = 'Station Hour Usage'
+        verbose_name_plural = 'Station Hour Usage'
+        constraints = [
+            models.UniqueConstraint(fields=['computer_station', 'hour'], name='stationhourusage_unique'),
+        ]
+        indexes = [
+            # The heatmap reads a range of hours across every station
+            models.Index(fields=['hour'], name='stationhourusage_hour_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.computer_station} @ {timezone.localtime(self.hour).strftime('%Y-%m-%d %H:00')}: {self.occupied_seconds // 60} min"
+
+
+class LabDayUsage(models.Model):
+    """Occupancy of the whole lab during one local day, rolled up like StationHourUsage"""
+    date = models.DateField(unique=True)
+    occupied_seconds = models.PositiveIntegerField(default=0)
+    users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name = 'Lab Day Usage'
+        verbose_name_plural = 'Lab Day Usage'
+
+    def __str__(self):
+        return f"{self.date}: {self.occupied_seconds // 60} min, {self.users} users"
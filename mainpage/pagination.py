@@ -0,0 +1,141 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import models
+
+
+def encode_cursor(direction, values):
+    """Pack a page direction and key values into an opaque URL-safe token"""
+    def default(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+    payload = json.dumps({'d': direction, 'k': list(values)}, default=default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Unpack a cursor token into (direction, raw key values), or (None, None) if invalid"""
+    if not token:
+        return None, None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, values = payload['d'], payload['k']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None, None
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        return None, None
+    return direction, values
+
+
+class KeysetPage:
+    """One page of results with opaque cursors to the neighbouring pages"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _to_python(model, name, value):
+    if name == 'pk':
+        return model._meta.pk.to_python(value)
+    try:
+        return model._meta.get_field(name).to_python(value)
+    except FieldDoesNotExist:
+        # An annotation such as a search rank; JSON already has its type
+        return value
+
+
+def _row_value(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def keyset_paginate(queryset, order_by, cursor=None, per_page=20):
+    """Return a KeysetPage of ``queryset`` ordered by ``order_by``.
+
+    ``order_by`` is a sequence of field names such as ('-timestamp', '-id');
+    the last field must be unique so every row has a distinct position, and
+    annotations may be used as keys. Each page is a range scan starting from
+    the cursor position, so it costs the same no matter how deep into the
+    results it is, and no COUNT is run.
+    Works with model instances as well as ``values()`` querysets, as long as
+    the ordering fields are selected.
+    """
+    model = queryset.model
+    keys = [(name.lstrip('-'), name.startswith('-')) for name in order_by]
+    direction, raw_values = decode_cursor(cursor)
+    position = None
+    if raw_values is not None and len(raw_values) == len(keys):
+        try:
+            position = [_to_python(model, name, value) for (name, _), value in zip(keys, raw_values)]
+        except ValidationError:
+            position = None
+    backwards = position is not None and direction == 'prev'
+
+    if position is not None:
+        # Rows strictly after the position in the scan direction, written as
+        # a <= x AND (a < x OR (a = x AND b < y) OR ...) so the leading
+        # column gives the database a plain index range to scan.
+        terms = []
+        for i, (name, descending) in enumerate(keys):
+            lookup = 'lt' if descending != backwards else 'gt'
+            term = models.Q(**{f'{name}__{lookup}': position[i]})
+            for j in range(i):
+                term &= models.Q(**{keys[j][0]: position[j]})
+            terms.append(term)
+        first_name, first_descending = keys[0]
+        bound = 'lte' if first_descending != backwards else 'gte'
+        condition = models.Q(**{f'{first_name}__{bound}': position[0]})
+        any_after = terms[0]
+        for term in terms[1:]:
+            any_after |= term
+        queryset = queryset.filter(condition & any_after)
+
+    if backwards:
+        ordering = [name[1:] if name.startswith('-') else f'-{name}' for name in order_by]
+    else:
+        ordering = list(order_by)
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key_of(row):
+        return [_row_value(row, name) for name, _ in keys]
+
+    has_next = position is not None if backwards else has_more
+    has_previous = has_more if backwards else position is not None
+    next_cursor = encode_cursor('next', key_of(rows[-1])) if rows and has_next else None
+    previous_cursor = encode_cursor('prev', key_of(rows[0])) if rows and has_previous else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
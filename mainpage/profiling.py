@@ -0,0 +1,197 @@
+import cProfile
+import json
+import pstats
+import re
+import secrets
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.backends.django import Template as DjangoTemplate
+from django.urls import reverse
+from django.utils import timezone
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_TOKEN_SALT = 'mainpage.profiling'
+PROFILE_ID_RE = re.compile(r'^[\w-]+$')
+# Rows kept in the summary's query and function lists
+PROFILE_TOP_QUERIES = 10
+PROFILE_TOP_FUNCTIONS = 30
+
+_TEMPLATE_RENDER_CODE = DjangoTemplate.render.__code__
+
+
+def profile_dir():
+    """Directory holding saved request profiles"""
+    return Path(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def make_profile_token(user):
+    """Return a signed token that turns on profiling for requests that carry it"""
+    return signing.dumps({'user': user.pk}, salt=PROFILE_TOKEN_SALT)
+
+
+def check_profile_token(token):
+    """Return the staff user id a token was issued to, or None if it is invalid or expired"""
+    try:
+        data = signing.loads(token, salt=PROFILE_TOKEN_SALT, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 600))
+    except signing.BadSignature:
+        return None
+    return data.get('user')
+
+
+def profile_path(profile_id, extension):
+    """Path of a saved profile file, or None for an id that is not a plain name"""
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    return profile_dir() / f'{profile_id}.{extension}'
+
+
+def make_profile_id(view_name, started_at):
+    """Id for a new profile: its local start time, the view name and a random suffix.
+
+    Characters PROFILE_ID_RE does not allow, such as the dots of an unnamed
+    view's dotted path, become dashes so profile_path accepts the id.
+    """
+    view = re.sub(r'[^\w-]', '-', view_name)
+    return f'{timezone.localtime(started_at):%Y%m%d-%H%M%S}-{view}-{secrets.token_hex(4)}'
+
+
+def _in_template():
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code is _TEMPLATE_RENDER_CODE:
+            return True
+        frame = frame.f_back
+    return False
+
+
+class RequestProfile:
+    """cProfile trace of one request plus the time each query took"""
+
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.queries = []  # (milliseconds, in template, sql)
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed as a database execute wrapper
+        in_template = _in_template()
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(((time.perf_counter() - started) * 1000, in_template, sql))
+
+    def run(self, get_response, request):
+        started = time.perf_counter()
+        with connection.execute_wrapper(self):
+            self.profiler.enable()
+            try:
+                return get_response(request)
+            finally:
+                self.profiler.disable()
+                self.total = (time.perf_counter() - started) * 1000
+
+    def summary(self):
+        stats = pstats.Stats(self.profiler).stats
+        code = _TEMPLATE_RENDER_CODE
+        template_total = stats.get((code.co_filename, code.co_firstlineno, code.co_name), (0, 0, 0, 0))[3] * 1000
+        db = sum(ms for ms, _, _ in self.queries)
+        db_in_template = sum(ms for ms, in_template, _ in self.queries if in_template)
+        # Template time is rendering only; lazy querysets it evaluates count as DB time
+        template = max(template_total - db_in_template, 0)
+        functions = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+        return {
+            'total_ms': round(self.total, 2),
+            'db_ms': round(db, 2),
+            'db_queries': len(self.queries),
+            'template_ms': round(template, 2),
+            'python_ms': round(max(self.total - db - template, 0), 2),
+            'slowest_queries': [
+                {'ms': round(ms, 2), 'in_template': in_template, 'sql': sql}
+                for ms, in_template, sql in sorted(self.queries, key=lambda query: query[0], reverse=True)[:PROFILE_TOP_QUERIES]
+            ],
+            'top_functions': [
+                {
+                    'function': pstats.func_std_string(function),
+                    'calls': calls,
+                    'own_ms': round(own * 1000, 2),
+                    'cumulative_ms': round(cumulative * 1000, 2),
+                }
+                for function, (_, calls, own, cumulative, _) in functions
+            ],
+        }
+
+
+def _prune(directory):
+    # Keep only the newest PROFILING_KEEP profiles
+    keep = getattr(settings, 'PROFILING_KEEP', 50)
+    summaries = sorted(directory.glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in summaries[keep:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """Profile single requests on demand for staff.
+
+    A request by a staff user carrying a valid token that make_profile_token
+    issued to them (as the ``_profile`` query parameter or an X-Profile-Token
+    header) runs under cProfile with every query timed. The trace is saved
+    under PROFILING_DIR as a .prof file (for snakeviz, flameprof or pstats)
+    next to a JSON summary splitting the time into DB, template rendering and
+    Python, and the response gets X-Profile-Id and X-Profile-Url headers for
+    the download. It sits after AuthenticationMiddleware, so session and user
+    loading are not in the trace. Other requests only pay for the token
+    lookup; with PROFILING_ENABLED off the middleware is not installed.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.headers.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+        if not token:
+            return self.get_response(request)
+        user_id = check_profile_token(token)
+        user = request.user
+        # A token only works for the staff user it was issued to, so one
+        # leaked through a URL or log is useless to anyone else
+        if user_id is None or not (user.is_authenticated and user.is_staff and user.pk == user_id):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        started_at = timezone.now()
+        response = profile.run(self.get_response, request)
+
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        profile_id = make_profile_id(view_name, started_at)
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        profile.profiler.dump_stats(directory / f'{profile_id}.prof')
+        summary = {
+            'id': profile_id,
+            'started_at': started_at.isoformat(),
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': view_name,
+            'status': response.status_code,
+            'profiled_by': user_id,
+            **profile.summary(),
+        }
+        with open(directory / f'{profile_id}.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        _prune(directory)
+
+        response['X-Profile-Id'] = profile_id
+        response['X-Profile-Url'] = reverse('download_profile', args=[profile_id])
+        return response
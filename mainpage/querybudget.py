@@ -0,0 +1,88 @@
+import logging
+from math import ceil
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+def query_budget(max_queries):
+    """Declare the most database queries a view may run for one request.
+
+    The budget covers everything the request does before the response is
+    returned, middleware included (session and user lookups count). Queries
+    made while a streaming response is consumed are not counted. Views whose
+    bulk writes grow with the payload add to it with extend_query_budget.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_query_budget(view):
+    """Return the budget declared for a view, or None"""
+    return getattr(view, 'query_budget', None)
+
+
+def extend_query_budget(request, extra):
+    """Allow this request ``extra`` queries on top of its view's budget"""
+    if getattr(request, 'query_budget', None) is not None:
+        request.query_budget += extra
+
+
+def bulk_statements(fields, rows):
+    """Most statements a bulk write of ``rows`` rows is split into on this database.
+
+    ``fields`` are the parameters sent per row, as Django passes them to
+    bulk_batch_size: the inserted fields for bulk_create, and two pks plus
+    the updated fields for bulk_update.
+    """
+    if rows <= 0:
+        return 0
+    return ceil(rows / max(connection.ops.bulk_batch_size(list(fields), [None] * rows), 1))
+
+
+class QueryBudgetMiddleware:
+    """Count the queries each request runs and check them against the view's budget.
+
+    Only active with QUERY_BUDGET_CHECKS on (it follows DEBUG by default).
+    Every response gets an X-Query-Count header, plus X-Query-Budget when the
+    view declares one. A request over budget is logged as a warning, or as an
+    error with QUERY_BUDGET_STRICT on. It is never turned into an exception:
+    by then the view has run and its writes are committed, so failing the
+    response would only hide a change that was saved.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_CHECKS', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(count)
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None:
+            response['X-Query-Budget'] = str(budget)
+            if count > budget:
+                message = f'{request.method} {request.path} ran {count} queries, over its budget of {budget}'
+                if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                    logger.error(message)
+                else:
+                    logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func)
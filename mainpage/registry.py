@@ -0,0 +1,127 @@
+import threading
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.core.cache import cache
+
+from .models import ComputerUnit
+
+UNIT_VERSION_KEY = 'mainpage:unit_version'
+
+
+def get_unit_version():
+    """Return the global unit version, bumped on every unit change"""
+    return cache.get(UNIT_VERSION_KEY, 0)
+
+
+def bump_unit_version():
+    """Increment the global unit version and return the new value"""
+    cache.add(UNIT_VERSION_KEY, 0, None)
+    try:
+        return cache.incr(UNIT_VERSION_KEY)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(UNIT_VERSION_KEY, 1, None)
+        return 1
+
+
+class UnitRegistry:
+    """In-memory copy of every unit's status, the sorted available unit IDs and per-status counts.
+
+    The registry is loaded from the database on first use and then updated
+    incrementally from the unit_changed signal. It remembers the global unit
+    version it reflects; when another process has moved the version on (or
+    the cache was cleared) the next read reloads it from the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._statuses = {}  # unit_id -> status
+        self._unit_ids = {}  # pk -> unit_id, to follow renames
+        self._available = []  # sorted unit IDs with status 'available'
+        self._status_counts = Counter()  # status -> number of units
+        self.version = 0
+
+    def load(self):
+        """Rebuild the registry from the database"""
+        with self._lock:
+            version = get_unit_version()
+            # Every unit is needed and the available list is sorted here, so skip ORDER BY
+            rows = ComputerUnit.objects.order_by().values_list('pk', 'unit_id', 'status')
+            self._statuses = {}
+            self._unit_ids = {}
+            for pk, unit_id, status in rows:
+                self._statuses[unit_id] = status
+                self._unit_ids[pk] = unit_id
+            self._available = sorted(unit_id for unit_id, status in self._statuses.items() if status == 'available')
+            self._status_counts = Counter(self._statuses.values())
+            self.version = version
+            self._loaded = True
+
+    def invalidate(self):
+        """Force a reload from the database on next use"""
+        with self._lock:
+            self._loaded = False
+
+    def _ensure_fresh(self):
+        if not self._loaded or self.version != get_unit_version():
+            self.load()
+
+    def available_units(self):
+        """Return (sorted available unit IDs, version)"""
+        with self._lock:
+            self._ensure_fresh()
+            return list(self._available), self.version
+
+    def status_counts(self):
+        """Return ({status: number of units}, version)"""
+        with self._lock:
+            self._ensure_fresh()
+            return dict(self._status_counts), self.version
+
+    def apply(self, pk, unit_id, status):
+        """Record a unit change and return (previous status, new version).
+
+        ``pk`` may be None when the caller only knows the unit ID, and
+        ``status`` is None when the unit was deleted. The previous status is
+        None when the unit was not known to the registry.
+        """
+        with self._lock:
+            version = bump_unit_version()
+            if not self._loaded or self.version != version - 1:
+                # We missed changes made elsewhere; reload lazily instead
+                self._loaded = False
+                return None, version
+
+            if pk is not None:
+                previous_unit_id = self._unit_ids.get(pk)
+                if previous_unit_id is not None and previous_unit_id != unit_id:
+                    self._discard(previous_unit_id)
+            old_status = self._discard(unit_id)
+
+            if status is not None:
+                self._statuses[unit_id] = status
+                self._status_counts[status] += 1
+                if pk is not None:
+                    self._unit_ids[pk] = unit_id
+                if status == 'available':
+                    insort(self._available, unit_id)
+            else:
+                self._unit_ids.pop(pk, None)
+
+            self.version = version
+            return old_status, version
+
+    def _discard(self, unit_id):
+        old_status = self._statuses.pop(unit_id, None)
+        if old_status is not None:
+            self._status_counts[old_status] -= 1
+        if old_status == 'available':
+            index = bisect_left(self._available, unit_id)
+            if index < len(self._available) and self._available[index] == unit_id:
+                del self._available[index]
+        return old_status
+
+
+unit_registry = UnitRegistry()
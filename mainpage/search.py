@@ -0,0 +1,78 @@
+import re
+
+from django.db import connections, models
+from django.db.models.expressions import RawSQL
+
+# Kept in step with migration 0013
+SEARCH_COLUMNS = (
+    'student_id', 'first_name', 'last_name', 'email', 'course',
+    'contact_number', 'address', 'access_level', 'status', 'computer_station',
+)
+SQLITE_FTS_TABLE = 'mainpage_computeruser_fts'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _words(text):
+    """Split search text into words, each a list of alphanumeric tokens"""
+    words = []
+    for word in text.split():
+        tokens = _TOKEN_RE.findall(word)
+        if tokens:
+            words.append(tokens)
+    return words
+
+
+def sqlite_match_expression(text):
+    """FTS5 query matching every word as a prefix, e.g. '2024-00 jua' -> '"2024 00"* AND "jua"*'"""
+    return ' AND '.join('"' + ' '.join(tokens) + '"*' for tokens in _words(text))
+
+
+def mysql_match_expression(text):
+    """Boolean-mode query requiring every token as a prefix, e.g. '+2024* +00* +jua*'"""
+    return ' '.join(f'+{token}*' for tokens in _words(text) for token in tokens)
+
+
+def search_users(queryset, text, rank=False):
+    """Filter a ComputerUser queryset to rows matching ``text`` in the search index.
+
+    Every word must match the start of a token in one of the searchable
+    columns. With ``rank=True`` the rows are annotated with ``search_rank``
+    (lower is more relevant) so callers can order by it. Backends without a
+    search index fall back to case-insensitive substring matching.
+    """
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+
+    if vendor == 'sqlite':
+        expression = sqlite_match_expression(text)
+        if not expression:
+            return queryset
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s', (expression,)
+        ))
+        if rank:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f'SELECT rank FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s AND rowid = "{table}"."id"',
+                (expression,), output_field=models.FloatField(),
+            ))
+        return queryset
+
+    if vendor == 'mysql':
+        expression = mysql_match_expression(text)
+        if not expression:
+            return queryset
+        columns = ', '.join(SEARCH_COLUMNS)
+        score = RawSQL(f'MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)', (expression,), output_field=models.FloatField())
+        queryset = queryset.annotate(search_score=score).filter(search_score__gt=0)
+        if rank:
+            queryset = queryset.annotate(search_rank=-models.F('search_score'))
+        return queryset
+
+    condition = models.Q()
+    for column in SEARCH_COLUMNS:
+        condition |= models.Q(**{f'{column}__icontains': text})
+    queryset = queryset.filter(condition)
+    if rank:
+        queryset = queryset.annotate(search_rank=models.Value(0.0, output_field=models.FloatField()))
+    return queryset
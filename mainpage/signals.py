@@ -0,0 +1,58 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from .models import ComputerUser, ComputerUnit, ActivityLog
+from .dashboard import invalidate_dashboard_snapshot
+from .events import unit_events
+from .registry import unit_registry
+from .signins import forget_signed_in_count
+from .stations import record_station
+
+# Sent whenever a computer unit is created, edited, claimed, released or
+# deleted. Saves and deletes send it automatically; code that changes units
+# with QuerySet.update() (which skips post_save) must send it explicitly.
+# Arguments: pk, unit_id, status (None when the unit was deleted).
+unit_changed = Signal()
+
+
+def send_unit_changed(pk, unit_id, status):
+    unit_changed.send(sender=ComputerUnit, pk=pk, unit_id=unit_id, status=status)
+
+
+@receiver(post_save, sender=ComputerUnit)
+def computer_unit_saved(sender, instance, **kwargs):
+    record_station(instance.unit_id)
+    send_unit_changed(instance.pk, instance.unit_id, instance.status)
+
+
+@receiver(post_delete, sender=ComputerUnit)
+def computer_unit_deleted(sender, instance, **kwargs):
+    send_unit_changed(instance.pk, instance.unit_id, None)
+
+
+@receiver(unit_changed)
+def update_unit_registry(sender, pk, unit_id, status, **kwargs):
+    # Applying the change bumps the global unit version, which also retires
+    # the cached dashboard snapshot
+    old_status, version = unit_registry.apply(pk, unit_id, status)
+    unit_events.publish({
+        'type': 'unit',
+        'unit_id': unit_id,
+        'old_status': old_status,
+        'new_status': status,
+        'version': version,
+    })
+
+
+@receiver(post_save, sender=ComputerUser)
+@receiver(post_delete, sender=ComputerUser)
+def refresh_dashboard_on_user_change(sender, **kwargs):
+    invalidate_dashboard_snapshot()
+    # Admin edits may sign a user in or out; the kiosk moves the counter itself
+    forget_signed_in_count()
+
+
+@receiver(post_save, sender=ActivityLog)
+def activity_log_saved(sender, instance, created, **kwargs):
+    if created:
+        record_station(instance.computer_station)
@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import ComputerUser
+
+SIGNED_IN_KEY = 'mainpage:signed_in_users'
+# The counter is recounted at least this often, bounding any drift
+SIGNED_IN_TIMEOUT = 60 * 60
+
+
+def signed_in_count():
+    """Return how many users are signed in to a PC.
+
+    The number is a counter in the cache, moved by the kiosk as students
+    sign in and out; it is only counted from the database when missing,
+    after a change made elsewhere or once SIGNED_IN_TIMEOUT has passed.
+    """
+    count = cache.get(SIGNED_IN_KEY)
+    if count is None:
+        count = ComputerUser.objects.exclude(Q(computer_station='') | Q(computer_station__isnull=True)).count()
+        cache.add(SIGNED_IN_KEY, count, SIGNED_IN_TIMEOUT)
+    return count
+
+
+def adjust_signed_in_count(delta):
+    """Move the counter after a kiosk sign-in (+1) or sign-out (-1)"""
+    try:
+        cache.incr(SIGNED_IN_KEY, delta)
+    except ValueError:
+        # Not counted yet; the next read counts from the database
+        pass
+
+
+def forget_signed_in_count():
+    """Drop the counter after users were changed outside the kiosk"""
+    cache.delete(SIGNED_IN_KEY)
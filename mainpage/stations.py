@@ -0,0 +1,49 @@
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Station
+
+STATIONS_CACHE_KEY = 'mainpage:stations'
+# Admin sign-ins are logged against this pseudo-station; it is not a PC
+ADMIN_STATION = 'Admin Dashboard'
+
+_known_lock = threading.Lock()
+_known_stations = set()
+
+
+def record_station(name):
+    """Add a station to the index if it has not been seen yet.
+
+    Names already seen by this process are skipped without a query, so the
+    steady-state cost of writing a log entry is unchanged. A name only
+    counts as seen once its transaction commits, so a rolled-back insert
+    is retried by the next entry.
+    """
+    if not name or name == ADMIN_STATION or name in _known_stations:
+        return
+    _, created = Station.objects.get_or_create(name=name)
+
+    def remember():
+        with _known_lock:
+            _known_stations.add(name)
+        if created:
+            cache.delete(STATIONS_CACHE_KEY)
+
+    transaction.on_commit(remember)
+
+
+def get_stations():
+    """Return the sorted list of known station names"""
+    stations = cache.get(STATIONS_CACHE_KEY)
+    if stations is None:
+        stations = list(Station.objects.order_by('name').values_list('name', flat=True))
+        cache.set(STATIONS_CACHE_KEY, stations, None)
+    return stations
+
+
+def forget_known_stations():
+    """Clear this process's record of seen stations (used by tests)"""
+    with _known_lock:
+        _known_stations.clear()
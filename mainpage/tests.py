@@ -1,3 +1,1708 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from importlib import import_module
+from unittest import mock
+
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, models, transaction
+from django.db.models import QuerySet
+from asgiref.sync import sync_to_async
+from django.test import TestCase, TransactionTestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import urls as mainpage_urls, views
+from .models import ComputerUser, ComputerUnit, ActivityLog, LabDayUsage, LabSession, Station, StationHourUsage
+from .archive import iter_archived_logs, load_index
+from .benchmark import percentile
+from .dashboard import build_dashboard_snapshot
+from .datagen import generate_data
+from .labsessions import end_lab_session, start_lab_session
+from .imports import IMPORT_BATCH_SIZE
+from .logwriter import activity_log_writer
+from .metrics import request_metrics
+from .profiling import make_profile_id, profile_path
+from .registry import unit_registry, bump_unit_version
+from .search import search_users
+from .stations import forget_known_stations
+from .usage import counter_upsert_sql, recompute_usage
 
 # Create your tests here.
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+def make_user_instance(student_id, **extra):
+    fields = {
+        'student_id': student_id,
+        'first_name': 'Test',
+        'last_name': student_id,
+        'contact_number': '09170000000',
+        'course': 'BSIT',
+        'address': 'Campus',
+    }
+    fields.update(extra)
+    return ComputerUser(**fields)
+
+
+def make_user(student_id, **extra):
+    user = make_user_instance(student_id, **extra)
+    user.save()
+    return user
+
+
+class UserSignInTests(TestCase):
+    # get user + SAVEPOINT + claim unit + assign user + close abandoned
+    # session + open session + insert log + RELEASE
+    SIGN_IN_QUERIES = 8
+    # get user + SAVEPOINT + release user + release unit + get open session +
+    # close session + user's other sessions + hour rollup + day rollup +
+    # insert log + RELEASE
+    SIGN_OUT_QUERIES = 11
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user('2024-0001')
+        self.unit = ComputerUnit.objects.create(unit_id='PC-01', status='available')
+
+    def sign_in(self, student_id, unit_id=''):
+        return self.client.post(reverse('user_sign_in'), {'student_id': student_id, 'unit_id': unit_id}, **AJAX)
+
+    def test_sign_in_claims_unit_in_fixed_queries(self):
+        with self.assertNumQueries(self.SIGN_IN_QUERIES):
+            response = self.sign_in('2024-0001', 'PC-01')
+        self.assertEqual(response.status_code, 200)
+        self.unit.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.unit.status, 'in-use')
+        self.assertEqual(self.user.computer_station, 'PC-01')
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(ActivityLog.objects.filter(action='sign-in', computer_station='PC-01').count(), 1)
+
+    def test_sign_out_releases_unit_in_fixed_queries(self):
+        self.sign_in('2024-0001', 'PC-01')
+        with self.assertNumQueries(self.SIGN_OUT_QUERIES):
+            response = self.sign_in('2024-0001')
+        self.assertTrue(response.json()['signed_out'])
+        self.unit.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.unit.status, 'available')
+        self.assertEqual(self.user.computer_station, '')
+        self.assertEqual(ActivityLog.objects.filter(action='sign-out').count(), 1)
+
+    def test_taken_unit_returns_conflict(self):
+        make_user('2024-0002')
+        self.sign_in('2024-0001', 'PC-01')
+        response = self.sign_in('2024-0002', 'PC-01')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(ComputerUser.objects.get(student_id='2024-0002').computer_station)
+
+    def test_signed_in_user_cannot_claim_second_unit(self):
+        ComputerUnit.objects.create(unit_id='PC-02', status='available')
+        self.sign_in('2024-0001', 'PC-01')
+        response = self.sign_in('2024-0001', 'PC-02')
+        self.assertEqual(response.status_code, 409)
+        # The unit claim is rolled back together with the failed assignment
+        self.assertEqual(ComputerUnit.objects.get(unit_id='PC-02').status, 'available')
+        self.assertEqual(ActivityLog.objects.filter(action='sign-in').count(), 1)
+
+
+class UnitRegistryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        make_user('2024-0001')
+        for unit_id, status in [('PC-03', 'available'), ('PC-01', 'available'), ('PC-02', 'in-use')]:
+            ComputerUnit.objects.create(unit_id=unit_id, status=status)
+
+    def test_kiosk_unit_list_is_served_from_memory(self):
+        self.assertEqual(unit_registry.available_units()[0], ['PC-01', 'PC-03'])
+        # Only the student lookup touches the database
+        with self.assertNumQueries(1):
+            response = self.client.post(reverse('user_sign_in'), {'student_id': '2024-0001'}, **AJAX)
+        self.assertEqual(response.json()['units'], ['PC-01', 'PC-03'])
+        self.assertEqual(response.json()['units_version'], unit_registry.version)
+
+    def test_admin_unit_views_update_registry_incrementally(self):
+        _, version = unit_registry.available_units()
+        self.client.post(reverse('add_computer_unit'), {'unitId': 'PC-00', 'status': 'available'})
+        unit = ComputerUnit.objects.get(unit_id='PC-03')
+        self.client.post(reverse('edit_computer_unit', args=[unit.pk]), {'unitId': 'PC-09', 'status': 'maintenance'})
+        with self.assertNumQueries(0):
+            units, new_version = unit_registry.available_units()
+        self.assertEqual(units, ['PC-00', 'PC-01'])
+        self.assertEqual(new_version, version + 2)
+
+    def test_sign_in_and_out_update_registry(self):
+        unit_registry.available_units()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('user_sign_in'), {'student_id': '2024-0001', 'unit_id': 'PC-01'}, **AJAX)
+        self.assertEqual(unit_registry.available_units()[0], ['PC-03'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('user_sign_in'), {'student_id': '2024-0001'}, **AJAX)
+        self.assertEqual(unit_registry.available_units()[0], ['PC-01', 'PC-03'])
+
+    def test_version_change_elsewhere_triggers_reload(self):
+        unit_registry.available_units()
+        # Simulate another process changing a unit without our signal firing
+        ComputerUnit.objects.filter(unit_id='PC-02').update(status='available')
+        bump_unit_version()
+        self.assertEqual(unit_registry.available_units()[0], ['PC-01', 'PC-02', 'PC-03'])
+
+
+class UnitEventStreamTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        ComputerUnit.objects.create(unit_id='PC-01', status='available')
+
+    def test_wsgi_fallback_sends_snapshot_and_closes(self):
+        response = self.client.get(reverse('api_unit_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = response.content.decode()
+        self.assertIn('event: snapshot', body)
+        self.assertIn('"units": ["PC-01"]', body)
+
+    async def test_asgi_stream_pushes_unit_deltas(self):
+        response = await self.async_client.get(reverse('api_unit_events'))
+        chunks = aiter(response.streaming_content)
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        snapshot = (await anext(chunks)).decode()
+        version = json.loads(snapshot.split('data: ', 1)[1])['version']
+
+        # The generator subscribes on its first step; change a unit from a worker thread
+        unit = await ComputerUnit.objects.aget(unit_id='PC-01')
+        unit.status = 'maintenance'
+        await sync_to_async(unit.save)()
+
+        message = (await asyncio.wait_for(anext(chunks), timeout=5)).decode()
+        self.assertTrue(message.startswith('event: unit'))
+        delta = json.loads(message.split('data: ', 1)[1])
+        self.assertEqual(delta['unit_id'], 'PC-01')
+        self.assertEqual(delta['old_status'], 'available')
+        self.assertEqual(delta['new_status'], 'maintenance')
+        self.assertEqual(delta['version'], version + 1)
+        await chunks.aclose()
+
+
+class DashboardSnapshotTests(TestCase):
+    # session + auth user lookups done by the middleware on every admin page
+    AUTH_QUERIES = 2
+
+    def setUp(self):
+        cache.clear()
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        make_user('2024-0001')
+        ComputerUnit.objects.create(unit_id='PC-02', status='in-use')
+        ComputerUnit.objects.create(unit_id='PC-01', status='available')
+        ComputerUnit.objects.create(unit_id='PC-03', status='maintenance')
+
+    def test_snapshot_groups_and_sorts_units(self):
+        ComputerUnit.objects.create(unit_id='PC-00', status='available')
+        with self.assertNumQueries(2):
+            snapshot = build_dashboard_snapshot()
+        self.assertEqual(snapshot['total_users'], 1)
+        self.assertEqual(snapshot['total_units'], 4)
+        self.assertEqual(snapshot['status_counts'], {'available': 2, 'in-use': 1, 'maintenance': 1, 'retired': 0})
+        self.assertEqual([u['unit_id'] for u in snapshot['units_by_status']['available']], ['PC-00', 'PC-01'])
+
+    def test_refresh_is_served_from_cache(self):
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(self.AUTH_QUERIES):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['available_units'], 1)
+        self.assertEqual(response.context['occupied_units'], 1)
+
+    def test_unit_save_invalidates_snapshot(self):
+        self.client.get(reverse('dashboard'))
+        ComputerUnit.objects.create(unit_id='PC-04', status='available')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['available_units'], 2)
+
+    def test_kiosk_sign_in_invalidates_snapshot(self):
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Client().post(reverse('user_sign_in'), {'student_id': '2024-0001', 'unit_id': 'PC-01'}, **AJAX)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['available_units'], 0)
+        self.assertEqual(response.context['occupied_units'], 2)
+
+
+class LogsKeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        ActivityLog.objects.bulk_create(
+            ActivityLog(student_id=f'S{n:03d}', full_name='Student', action='sign-in', computer_station='PC-01')
+            for n in range(45)
+        )
+        # Pairs of rows share a timestamp so the id tiebreak is exercised
+        base = timezone.now()
+        for n, pk in enumerate(ActivityLog.objects.order_by('id').values_list('id', flat=True)):
+            ActivityLog.objects.filter(pk=pk).update(timestamp=base - timedelta(minutes=n // 2))
+        self.expected = list(ActivityLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+
+    def page(self, cursor=None):
+        params = {'cursor': cursor} if cursor else {}
+        return self.client.get(reverse('logs'), params).context['logs']
+
+    def test_walks_every_row_once_in_both_directions(self):
+        seen, pages, page = [], [], self.page()
+        while True:
+            pages.append(page)
+            seen.extend(log.id for log in page)
+            if not page.has_next:
+                break
+            page = self.page(page.next_cursor)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(p) for p in pages], [20, 20, 5])
+
+        back = self.page(pages[-1].previous_cursor)
+        self.assertEqual([log.id for log in back], [log.id for log in pages[1]])
+        first = self.page(back.previous_cursor)
+        self.assertEqual([log.id for log in first], self.expected[:20])
+        self.assertFalse(first.has_previous)
+
+    def test_deep_page_runs_same_queries_without_count(self):
+        first = self.page()
+        # session, user and the page itself; the station list is cached
+        with self.assertNumQueries(3) as queries:
+            self.page(first.next_cursor)
+        self.assertFalse(any('COUNT(' in q['sql'] for q in queries.captured_queries))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        self.assertEqual([log.id for log in self.page('not-a-cursor')], self.expected[:20])
+
+
+class StationIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        forget_known_stations()
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        ComputerUnit.objects.create(unit_id='PC-02', status='available')
+
+    def test_stations_come_from_units_and_logs(self):
+        ActivityLog.objects.create(action='sign-in', computer_station='OLD-PC')
+        ActivityLog.objects.create(action='sign-in', computer_station='Admin Dashboard')
+        for _ in range(3):
+            ActivityLog.objects.create(action='sign-in', computer_station='PC-02')
+        response = self.client.get(reverse('api_log_stations'))
+        self.assertEqual(response.json()['stations'], ['OLD-PC', 'PC-02'])
+
+    def test_station_list_is_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_log_stations')).status_code, 401)
+        self.client.force_login(User.objects.create_user('student', password='pw'))
+        self.assertEqual(self.client.get(reverse('api_log_stations')).status_code, 401)
+
+    def test_dropdown_cost_does_not_grow_with_logs(self):
+        ActivityLog.objects.bulk_create(ActivityLog(action='sign-in', computer_station='PC-02') for _ in range(200))
+        self.client.get(reverse('logs'))
+        # Station list is cached: session, user and the logs page only
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('logs'))
+        self.assertEqual(response.content.decode().count('<option value="PC-02" >'), 2)
+
+    def test_known_station_log_writes_skip_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ActivityLog.objects.create(action='sign-in', computer_station='PC-02')
+        with self.assertNumQueries(1):
+            ActivityLog.objects.create(action='sign-out', computer_station='PC-02')
+
+    def test_rolled_back_station_is_indexed_by_the_next_write(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            ActivityLog.objects.create(action='sign-in', computer_station='PC-07')
+            raise RuntimeError
+        self.assertFalse(Station.objects.filter(name='PC-07').exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            ActivityLog.objects.create(action='sign-in', computer_station='PC-07')
+        self.assertTrue(Station.objects.filter(name='PC-07').exists())
+
+
+class LogFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        rows = [
+            ('2024-0001', 'Juan Dela Cruz', 'sign-in', 'PC-01', 3),
+            ('2024-0001', 'Juan Dela Cruz', 'sign-out', 'PC-01', 2),
+            ('2024-0002', 'Maria Santos', 'sign-in', 'PC-02', 1),
+            ('admin', 'Admin', 'sign-in', 'Admin Dashboard', 0),
+        ]
+        now = timezone.now()
+        for student_id, name, action, station, days_ago in rows:
+            log = ActivityLog.objects.create(student_id=student_id, full_name=name, action=action, computer_station=station,
+                                             actor_type='admin' if station == 'Admin Dashboard' else 'student')
+            ActivityLog.objects.filter(pk=log.pk).update(timestamp=now - timedelta(days=days_ago))
+        self.now = now
+
+    def ids(self, **params):
+        return [log['student_id'] + ':' + log['action'] for log in self.client.get(reverse('api_get_logs'), params).json()['logs']]
+
+    def test_filters_run_in_database(self):
+        self.assertEqual(self.ids(), ['2024-0002:sign-in', '2024-0001:sign-out', '2024-0001:sign-in'])
+        self.assertEqual(self.ids(search='juan'), ['2024-0001:sign-out', '2024-0001:sign-in'])
+        self.assertEqual(self.ids(search='2024-0002'), ['2024-0002:sign-in'])
+        self.assertEqual(self.ids(action='sign-in'), ['2024-0002:sign-in', '2024-0001:sign-in'])
+        self.assertEqual(self.ids(station='PC-01', action='sign-out'), ['2024-0001:sign-out'])
+
+    def test_search_matches_last_names_parts_of_ids_and_stations(self):
+        maria = make_user('2024-0002', first_name='Maria', last_name='Santos')
+        ActivityLog.objects.filter(student_id='2024-0002').update(user=maria)
+        self.assertEqual(self.ids(search='santos'), ['2024-0002:sign-in'])
+        self.assertEqual(self.ids(search='mar san'), ['2024-0002:sign-in'])
+        self.assertEqual(self.ids(search='0002'), ['2024-0002:sign-in'])
+        self.assertEqual(self.ids(search='pc-01'), ['2024-0001:sign-out', '2024-0001:sign-in'])
+        self.assertEqual(self.ids(search='-'), [])
+
+    def test_date_range_is_inclusive_of_whole_days(self):
+        day = timezone.localdate(self.now - timedelta(days=2)).isoformat()
+        self.assertEqual(self.ids(date_from=day, date_to=day), ['2024-0001:sign-out'])
+        self.assertEqual(self.ids(date_from=day), ['2024-0002:sign-in', '2024-0001:sign-out'])
+        # Invalid values are ignored rather than failing the request
+        self.assertEqual(len(self.ids(date_from='yesterday', action='dance')), 3)
+
+    def test_impossible_dates_and_times_are_ignored(self):
+        for params in ({'date_from': '2025-02-30'}, {'date_to': '2025-13-01'}, {'time_from': '25:00', 'date_from': '2020-01-01'}):
+            with self.subTest(**params):
+                self.assertEqual(len(self.ids(**params)), 3)
+                self.assertEqual(self.client.get(reverse('logs'), params).status_code, 200)
+                response = self.client.get(reverse('export_logs'), {'format': 'csv', **params})
+                self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 4)
+
+    def test_logs_api_is_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_get_logs')).status_code, 401)
+        self.client.force_login(User.objects.create_user('student', password='pw'))
+        response = self.client.get(reverse('api_get_logs'))
+        self.assertEqual(response.status_code, 401)
+        self.assertNotIn('2024-0001', response.content.decode())
+
+    def test_pagination_keeps_filters(self):
+        first = self.client.get(reverse('api_get_logs'), {'action': 'sign-in', 'page_size': 1}).json()
+        second = self.client.get(reverse('api_get_logs'), {'action': 'sign-in', 'page_size': 1, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([log['student_id'] for log in first['logs'] + second['logs']], ['2024-0002', '2024-0001'])
+        self.assertIsNone(second['next_cursor'])
+
+        response = self.client.get(reverse('logs'), {'station': 'PC-01'})
+        self.assertEqual(len(response.context['logs']), 2)
+        self.assertEqual(response.context['filter_query'], 'station=PC-01')
+
+
+class ActivityLogActorTypeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('staff', password='pw', is_staff=True)
+
+    def test_admin_login_and_logout_are_hidden_by_actor_type(self):
+        self.client.post(reverse('login'), {'student_id': 'staff', 'password': 'pw'})
+        self.client.get(reverse('logout'))
+        self.assertEqual(list(ActivityLog.objects.values_list('actor_type', flat=True)), ['admin', 'admin'])
+        ActivityLog.objects.create(student_id='2024-0001', action='sign-in', computer_station='PC-01')
+
+        self.client.force_login(User.objects.get(username='staff'))
+        with CaptureQueriesContext(connection) as queries:
+            logs = self.client.get(reverse('api_get_logs')).json()['logs']
+        self.assertEqual([log['student_id'] for log in logs], ['2024-0001'])
+        sql = queries.captured_queries[-1]['sql']
+        self.assertIn('"actor_type" = \'student\'', sql)
+        self.assertNotIn('LIKE', sql)
+
+    def test_backfill_marks_existing_admin_rows(self):
+        backfill = import_module('mainpage.migrations.0016_backfill_activitylog_actor_type')
+        ActivityLog.objects.bulk_create([
+            ActivityLog(student_id='staff', action='sign-in', computer_station='Admin Dashboard'),
+            ActivityLog(student_id='staff', action='sign-out', notes='Admin logout from dashboard'),
+            ActivityLog(student_id='2024-0001', action='sign-in', computer_station='PC-01', notes='Signed in via kiosk form'),
+        ])
+        with mock.patch.object(backfill, 'BACKFILL_BATCH_SIZE', 2):
+            backfill.backfill_actor_type(django_apps, connection.schema_editor())
+        self.assertEqual(list(ActivityLog.objects.order_by('id').values_list('actor_type', flat=True)),
+                         ['admin', 'admin', 'student'])
+
+
+class LogExportTests(TestCase):
+    def setUp(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        now = timezone.now()
+        for n in range(5):
+            log = ActivityLog.objects.create(student_id=f'S{n}', full_name=f'Name, {n}', action='sign-in', computer_station='PC-01')
+            ActivityLog.objects.filter(pk=log.pk).update(timestamp=now - timedelta(minutes=5 - n))
+        ActivityLog.objects.create(student_id='admin', action='sign-in', computer_station='Admin Dashboard', actor_type='admin')
+
+    def export(self, **params):
+        response = self.client.get(reverse('export_logs'), params)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_oldest_first(self):
+        lines = self.export(format='csv').splitlines()
+        self.assertEqual(lines[0], 'id,timestamp,student_id,full_name,action,computer_station,notes')
+        self.assertEqual(len(lines), 6)
+        self.assertIn('"Name, 0"', lines[1])
+
+    def test_ndjson_export_resumes_after_cursor(self):
+        rows = [json.loads(line) for line in self.export(format='ndjson').splitlines()]
+        self.assertEqual([row['student_id'] for row in rows], ['S0', 'S1', 'S2', 'S3', 'S4'])
+        resumed = [json.loads(line) for line in self.export(
+            format='ndjson', after=rows[1]['timestamp'], after_id=rows[1]['id']).splitlines()]
+        self.assertEqual([row['student_id'] for row in resumed], ['S2', 'S3', 'S4'])
+
+    def test_export_applies_log_filters(self):
+        rows = self.export(format='ndjson', search='S3').splitlines()
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(self.client.get(reverse('export_logs'), {'format': 'xml'}).status_code, 400)
+
+    def test_bad_after_cursor_is_rejected(self):
+        for after in ('yesterday', '2025-13-01T00:00:00'):
+            with self.subTest(after=after):
+                response = self.client.get(reverse('export_logs'), {'format': 'csv', 'after': after})
+                self.assertEqual(response.status_code, 400)
+
+
+class UserSearchIndexTests(TestCase):
+    def setUp(self):
+        make_user('2024-0001', first_name='Juan', last_name='Dela Cruz', course='BS Information Technology')
+        make_user('2024-0002', first_name='Maria', last_name='Juanito', address='Juan Luna St.')
+        make_user('2023-0150', first_name='Pedro', last_name='Penduko', email='pedro@school.edu')
+
+    def search(self, text, **kwargs):
+        return list(search_users(ComputerUser.objects.order_by('student_id'), text, **kwargs).values_list('student_id', flat=True))
+
+    def test_prefix_matching_across_columns(self):
+        self.assertEqual(self.search('jua'), ['2024-0001', '2024-0002'])
+        self.assertEqual(self.search('2024-00'), ['2024-0001', '2024-0002'])
+        self.assertEqual(self.search('pedro@school'), ['2023-0150'])
+        self.assertEqual(self.search('juan info'), ['2024-0001'])
+        self.assertEqual(self.search('"NEAR OR'), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        ComputerUser.objects.filter(student_id='2023-0150').update(course='Nursing')
+        self.assertEqual(self.search('nurs'), ['2023-0150'])
+        ComputerUser.objects.get(student_id='2024-0001').delete()
+        self.assertEqual(self.search('jua'), ['2024-0002'])
+        ComputerUser.objects.bulk_create([ComputerUser(student_id='2025-0001', first_name='Juana', last_name='X',
+                                                       contact_number='0', course='BSN', address='-')])
+        self.assertEqual(self.search('juana'), ['2025-0001'])
+
+    def test_api_search_is_ranked(self):
+        response = self.client.get(reverse('api_get_users'), {'search': 'juan'})
+        ranked = [user['student_id'] for user in response.json()['users']]
+        self.assertEqual(sorted(ranked), ['2024-0001', '2024-0002'])
+        ranks = list(search_users(ComputerUser.objects.all(), 'juan', rank=True).values_list('search_rank', flat=True))
+        self.assertTrue(all(rank is not None for rank in ranks))
+
+
+class UsersApiPaginationTests(TestCase):
+    def setUp(self):
+        for n in range(7):
+            make_user(f'2024-{n:04d}', first_name='Ana' if n % 2 else 'Ben')
+
+    def get(self, **params):
+        return self.client.get(reverse('api_get_users'), params)
+
+    def test_cursor_pages_cover_all_users(self):
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 3, 'include_total': 0}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.get(**params).json()
+            self.assertNotIn('total', data)
+            seen.extend(user['student_id'] for user in data['users'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [f'2024-{n:04d}' for n in reversed(range(7))])
+
+    def test_fields_projection_skips_unrequested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(fields='student_id,full_name', include_total=0).json()
+        self.assertEqual(set(data['users'][0]), {'student_id', 'full_name'})
+        self.assertNotIn('address', queries.captured_queries[-1]['sql'])
+        self.assertEqual(self.get(fields='password').status_code, 400)
+
+    def test_search_pages_by_rank_with_total(self):
+        first = self.get(search='ana', page_size=2).json()
+        self.assertEqual(first['total'], 3)
+        second = self.get(search='ana', page_size=2, cursor=first['next_cursor']).json()
+        names = {user['student_id'] for user in first['users'] + second['users']}
+        self.assertEqual(names, {'2024-0001', '2024-0003', '2024-0005'})
+
+
+class ComputerUsersPageTests(TestCase):
+    def setUp(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        ComputerUser.objects.bulk_create(
+            ComputerUser(student_id=f'2024-{n:04d}', first_name='Test', last_name=str(n), contact_number='0',
+                         course='BSIT', address='Campus', password='secret',
+                         access_level=('student', 'faculty', 'admin')[n % 3],
+                         status='active' if n % 2 else 'inactive')
+            for n in range(120)
+        )
+
+    def test_counts_and_page_come_from_fixed_queries(self):
+        # session, user, statistics aggregate and the page itself
+        with self.assertNumQueries(4) as queries:
+            response = self.client.get(reverse('computer_users'), {'page': 3})
+        context = response.context
+        self.assertEqual(context['total_users'], 120)
+        self.assertEqual(context['active_users'], 60)
+        self.assertEqual((context['student_users'], context['faculty_users'], context['admin_users']), (40, 40, 40))
+        self.assertEqual(len(context['users']), 20)
+        self.assertEqual(context['users'].paginator.num_pages, 3)
+        self.assertNotIn('password', queries.captured_queries[-1]['sql'])
+
+    def test_filters_apply_to_counts_and_page_links(self):
+        response = self.client.get(reverse('computer_users'), {'access_level': 'faculty'})
+        self.assertEqual(response.context['total_users'], 40)
+        self.assertEqual(response.context['student_users'], 0)
+        self.assertFalse(response.context['users'].has_other_pages())
+        response = self.client.get(reverse('computer_users'), {'status': 'active'})
+        self.assertContains(response, 'href="?status=active&page=2"')
+
+    def test_single_edit_modal_filled_from_details(self):
+        response = self.client.get(reverse('computer_users'))
+        self.assertContains(response, 'id="editUserModal"', count=1)
+        self.assertContains(response, 'class="edit-user-form"', count=1)
+        user = ComputerUser.objects.get(student_id='2024-0007')
+        data = self.client.get(reverse('view_user_details', args=[user.id])).json()['user']
+        self.assertEqual((data['first_name'], data['address'], data['computer_station']), ('Test', 'Campus', ''))
+
+
+class UserImportTests(TestCase):
+    HEADER = 'student_id,first_name,last_name,contact_number,course,address,email,access_level\n'
+
+    def setUp(self):
+        make_user('2024-0003')
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_csv(self, rows):
+        path = os.path.join(self.tmpdir.name, 'users.csv')
+        with open(path, 'w', newline='') as f:
+            f.write(self.HEADER + ''.join(rows))
+        return path
+
+    def test_command_imports_in_batches_and_writes_rejects(self):
+        rows = [f'2024-{n:04d},Ana,Cruz,0917,BSIT,Campus,,\n' for n in range(10)]
+        rows += ['2024-0001,Dup,Row,0917,BSIT,Campus,,\n', '2024-0100,No,Course,0917,,Campus,,\n',
+                 '2024-0101,Bad,Level,0917,BSIT,Campus,,janitor\n', '2024-0102,Bad,Mail,0917,BSIT,Campus,nope,\n']
+        path = self.write_csv(rows)
+        out = io.StringIO()
+        # per batch of 5: one duplicate lookup and one insert, plus savepoints
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_users', path, batch_size=5, stdout=out)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 2)
+        self.assertEqual(ComputerUser.objects.count(), 10)
+        self.assertIn('Processed 14 rows: 9 imported, 5 rejected', out.getvalue())
+
+        with open(path + '.rejects.csv', newline='') as f:
+            rejects = list(csv.DictReader(f))
+        self.assertEqual([(r['line'], r['student_id']) for r in rejects],
+                         [('5', '2024-0003'), ('12', '2024-0001'), ('13', '2024-0100'), ('14', '2024-0101'), ('15', '2024-0102')])
+        self.assertIn('already exists', rejects[0]['error'])
+        self.assertIn('in file', rejects[1]['error'])
+
+    def test_line_numbers_allow_for_quoted_newlines(self):
+        path = self.write_csv([
+            '2024-0200,Ana,Cruz,0917,BSIT,"Block 1\nLot 2\nCampus",,\n',
+            '2024-0201,No,Course,0917,,Campus,,\n',
+        ])
+        call_command('import_users', path, stdout=io.StringIO())
+        with open(path + '.rejects.csv', newline='') as f:
+            self.assertEqual([r['line'] for r in csv.DictReader(f)], ['5'])
+
+    def test_reject_file_keeps_the_csv_header_for_ragged_rows(self):
+        path = self.write_csv([
+            '2024-0200,Extra,Cols,0917,,Campus,,,surplus\n',
+            '2024-0201,Too,Short\n',
+        ])
+        call_command('import_users', path, stdout=io.StringIO())
+        with open(path + '.rejects.csv', newline='') as f:
+            header, *rows = list(csv.reader(f))
+        self.assertEqual(header, ['line', 'error', *self.HEADER.strip().split(',')])
+        self.assertEqual(rows[0][:8], ['2', 'Course is required', '2024-0200', 'Extra', 'Cols', '0917', '', 'Campus'])
+        self.assertEqual(rows[0][-1], 'surplus')
+        self.assertEqual(rows[1], ['3', 'Contact Number is required', '2024-0201', 'Too', 'Short', '', '', '', '', ''])
+
+    def test_student_id_taken_during_the_import_rejects_only_that_row(self):
+        reject_existing = import_module('mainpage.imports')._reject_existing
+
+        def racing(candidates, reject):
+            remaining = reject_existing(candidates, reject)
+            if not ComputerUser.objects.filter(student_id='2024-0301').exists():
+                make_user('2024-0301')  # created by another request after the check
+            return remaining
+
+        path = self.write_csv([f'2024-030{n},Ana,Cruz,0917,BSIT,Campus,,\n' for n in range(3)])
+        with mock.patch('mainpage.imports._reject_existing', side_effect=racing):
+            out = io.StringIO()
+            call_command('import_users', path, stdout=out)
+        self.assertIn('Imported 2 of 3 users.', out.getvalue())
+        with open(path + '.rejects.csv', newline='') as f:
+            rejects = list(csv.DictReader(f))
+        self.assertEqual([(r['line'], r['student_id']) for r in rejects], [('3', '2024-0301')])
+        self.assertIn('already exists', rejects[0]['error'])
+
+    def test_command_rejects_missing_columns(self):
+        path = os.path.join(self.tmpdir.name, 'bad.csv')
+        with open(path, 'w') as f:
+            f.write('student_id,first_name\n1,A\n')
+        with self.assertRaisesMessage(CommandError, 'Missing required columns'):
+            call_command('import_users', path, stdout=io.StringIO())
+
+    def test_upload_endpoint_reports_counts_and_rejects(self):
+        upload = SimpleUploadedFile('users.csv', (self.HEADER + '2024-0200,Ben,Reyes,0917,BSCS,Campus,,faculty\n'
+                                                  '2024-0003,Old,User,0917,BSIT,Campus,,\n').encode())
+        self.assertEqual(self.client.post(reverse('import_users'), {'csv_file': upload}).status_code, 401)
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        upload.seek(0)
+        data = self.client.post(reverse('import_users'), {'csv_file': upload}).json()
+        self.assertEqual((data['rows'], data['imported'], data['rejected']), (2, 1, 1))
+        self.assertIn('2024-0003', data['rejects_csv'])
+        self.assertEqual(ComputerUser.objects.get(student_id='2024-0200').access_level, 'faculty')
+
+
+class UserBatchApiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        self.ana = make_user('2024-0001', first_name='Ana')
+        self.ben = make_user('2024-0002', first_name='Ben')
+
+    def post(self, operations):
+        return self.client.post(reverse('api_batch_users'), json.dumps({'operations': operations}),
+                                content_type='application/json')
+
+    def test_mixed_batch_runs_fixed_queries_with_per_item_results(self):
+        new_user = {'student_id': '2024-0100', 'first_name': 'Cara', 'last_name': 'Diaz',
+                    'contact_number': '0917', 'course': 'BSN', 'address': 'Campus'}
+        operations = [
+            {'op': 'create', 'data': new_user},
+            {'op': 'create', 'data': dict(new_user, student_id='2024-0001')},
+            {'op': 'update', 'id': self.ana.id, 'data': {'course': 'BSCS'}},
+            {'op': 'status', 'student_id': '2024-0001', 'status': 'suspended'},
+            {'op': 'status', 'id': self.ben.id, 'status': 'retired'},
+            {'op': 'delete', 'student_id': '2024-0002'},
+            {'op': 'delete', 'id': 999},
+        ]
+        # id and student_id lookups, the duplicate check, then one write of each kind
+        with CaptureQueriesContext(connection) as queries:
+            data = self.post(operations).json()
+        writes = [q['sql'].split()[0] for q in queries.captured_queries
+                  if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE') and 'mainpage_computeruser' in q['sql'].split('WHERE')[0]]
+        self.assertEqual(writes, ['INSERT', 'UPDATE', 'DELETE'])
+        self.assertEqual((data['applied'], data['failed']), (4, 3))
+        self.assertEqual([r['success'] for r in data['results']], [True, False, True, True, False, True, False])
+        self.assertIn('already exists', data['results'][1]['error'])
+
+        self.ana.refresh_from_db()
+        self.assertEqual((self.ana.course, self.ana.status), ('BSCS', 'suspended'))
+        self.assertFalse(ComputerUser.objects.filter(student_id='2024-0002').exists())
+        self.assertEqual(ComputerUser.objects.get(student_id='2024-0100').id, data['results'][0]['id'])
+
+    def test_batch_size_is_limited(self):
+        with self.settings(USER_BATCH_MAX_SIZE=2):
+            response = self.post([{'op': 'delete', 'id': self.ana.id}] * 3)
+        self.assertEqual(response.status_code, 413)
+        self.assertTrue(ComputerUser.objects.filter(pk=self.ana.pk).exists())
+        self.assertEqual(self.post([]).status_code, 400)
+
+    def test_batch_is_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.post([{'op': 'delete', 'id': self.ana.id}]).status_code, 401)
+        self.client.force_login(User.objects.create_user('student', password='pw'))
+        self.assertEqual(self.post([{'op': 'delete', 'id': self.ana.id}]).status_code, 401)
+        self.assertTrue(ComputerUser.objects.filter(pk=self.ana.pk).exists())
+
+
+@override_settings(ACTIVITY_LOG_BUFFERED=True, ACTIVITY_LOG_BUFFER_SIZE=4, ACTIVITY_LOG_FLUSH_SECONDS=60)
+class ActivityLogWriterTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        forget_known_stations()
+        self.addCleanup(activity_log_writer.flush)
+
+    def log(self, n, station='PC-01'):
+        return activity_log_writer.log(student_id=f'S{n:04d}', full_name='Student', action='sign-in',
+                                       computer_station=station, notes=f'entry {n}')
+
+    def logged_notes(self):
+        return sorted(ActivityLog.objects.values_list('notes', flat=True))
+
+    def test_entries_flush_at_size_threshold_and_on_demand(self):
+        for n in range(10):
+            self.log(n, station=f'PC-{n % 3:02d}')
+            self.assertEqual(ActivityLog.objects.count() + activity_log_writer.pending_count, n + 1)
+        self.assertEqual(ActivityLog.objects.count(), 8)
+        self.assertEqual(activity_log_writer.flush(), 2)
+        self.assertEqual(self.logged_notes(), sorted(f'entry {n}' for n in range(10)))
+        self.assertEqual(list(Station.objects.values_list('name', flat=True)), ['PC-00', 'PC-01', 'PC-02'])
+
+    def test_concurrent_writers_lose_nothing(self):
+        def write(worker):
+            try:
+                for n in range(50):
+                    self.log(worker * 100 + n)
+            finally:
+                connection.close()
+
+        with self.settings(ACTIVITY_LOG_BUFFER_SIZE=7):
+            threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            activity_log_writer.flush()
+        self.assertEqual(self.logged_notes(), sorted(f'entry {w * 100 + n}' for w in range(8) for n in range(50)))
+
+    def test_idle_buffer_flushes_after_delay(self):
+        with self.settings(ACTIVITY_LOG_FLUSH_SECONDS=0.1):
+            self.log(1)
+            deadline = time.monotonic() + 5
+            while not ActivityLog.objects.exists() and time.monotonic() < deadline:
+                time.sleep(0.05)
+        self.assertEqual(self.logged_notes(), ['entry 1'])
+
+    def test_rolled_back_entries_are_not_queued(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.log(1)
+            raise RuntimeError
+        self.assertEqual(activity_log_writer.pending_count, 0)
+
+
+class LogArchiveTests(TestCase):
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.archive = tmpdir.name
+        now = timezone.now()
+        old = timezone.make_aware(datetime(2025, 1, 15, 9, 0))
+        logs = [
+            ActivityLog(student_id=f'S{n:03d}', full_name='Old Student', action=('sign-in', 'sign-out')[n % 2],
+                        computer_station=f'PC-0{n % 2}', timestamp=old + timedelta(days=n * 5))
+            for n in range(8)
+        ]
+        logs.append(ActivityLog(student_id='admin', full_name='Admin', action='sign-in',
+                                computer_station='Admin Dashboard', notes='Admin login', actor_type='admin', timestamp=old))
+        logs += [ActivityLog(student_id='S900', full_name='New Student', action='sign-in',
+                             computer_station='PC-01', timestamp=now)]
+        ActivityLog.objects.bulk_create(logs)
+
+    def archive_logs(self, **options):
+        call_command('archive_logs', days=30, batch_size=3, dir=self.archive, stdout=io.StringIO(), **options)
+
+    def archived(self, **filters):
+        return [row[2] for row in iter_archived_logs(filters, self.archive)]
+
+    def test_old_logs_move_to_monthly_segments(self):
+        self.archive_logs()
+        self.assertEqual(list(ActivityLog.objects.values_list('student_id', flat=True)), ['S900'])
+        index = load_index(self.archive)
+        self.assertEqual({month: segment['rows'] for month, segment in index['segments'].items()},
+                         {'2025-01': 5, '2025-02': 4})
+        self.assertEqual(index['pending_ids'], [])
+        self.assertEqual(self.archived(), [f'S{n:03d}' for n in range(8)])
+        self.assertEqual(self.archived(action='sign-out', station='PC-01'), ['S001', 'S003', 'S005', 'S007'])
+        self.assertEqual(self.archived(date_from='2025-02-01', date_to='2025-02-10'), ['S004', 'S005'])
+
+        # A second run appends to the existing segments
+        ActivityLog.objects.create(student_id='S950', full_name='Late', action='sign-in',
+                                   timestamp=timezone.make_aware(datetime(2025, 2, 20, 9, 0)))
+        self.archive_logs()
+        self.assertEqual(load_index(self.archive)['segments']['2025-02']['rows'], 5)
+        self.assertEqual(self.archived(date_from='2025-02-20', date_to='2025-02-20'), ['S950'])
+
+    def test_interrupted_run_is_recovered_without_duplicates(self):
+        self.archive_logs()
+        index = load_index(self.archive)
+        segment = os.path.join(self.archive, index['segments']['2025-01']['file'])
+        with open(segment, 'ab') as f:
+            f.write(b'partial append')
+        restored = ActivityLog.objects.create(student_id='S000', full_name='Old Student', action='sign-in',
+                                              timestamp=timezone.now())
+        index['pending_ids'] = [restored.id]
+        with open(os.path.join(self.archive, 'index.json'), 'w') as f:
+            json.dump(index, f)
+
+        self.archive_logs()
+        self.assertFalse(ActivityLog.objects.filter(pk=restored.pk).exists())
+        self.assertEqual(self.archived(), [f'S{n:03d}' for n in range(8)])
+
+    def test_invalid_before_date_is_a_command_error(self):
+        for before in ('last month', '2024-13-45'):
+            with self.subTest(before=before), self.assertRaisesMessage(CommandError, '--before must be a date'):
+                call_command('archive_logs', before=before, dir=self.archive, stdout=io.StringIO())
+
+    def test_archive_search_matches_words_within_names(self):
+        ActivityLog.objects.filter(student_id='S003').update(full_name='Pedro Dela Cruz')
+        self.archive_logs()
+        self.assertEqual(self.archived(search='cruz'), ['S003'])
+        self.assertEqual(self.archived(search='ped del'), ['S003'])
+        self.assertEqual(self.archived(search='01'), ['S001', 'S003', 'S005', 'S007'])
+
+    def test_archive_export(self):
+        self.archive_logs()
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        with self.settings(ACTIVITY_LOG_ARCHIVE_DIR=self.archive):
+            response = self.client.get(reverse('export_logs'), {'format': 'csv', 'source': 'archive', 'station': 'PC-00'})
+            rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['student_id'] for row in rows], ['S000', 'S002', 'S004', 'S006'])
+
+    def test_archive_export_cannot_be_resumed(self):
+        self.archive_logs()
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        with self.settings(ACTIVITY_LOG_ARCHIVE_DIR=self.archive):
+            response = self.client.get(reverse('export_logs'), {'source': 'archive', 'after': '2025-01-20T09:00:00', 'after_id': '2'})
+        self.assertEqual(response.status_code, 400)
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN every statement behind the hot pages and APIs on SQLite.
+
+    A statement fails if it scans a table without an index or sorts through
+    a temporary B-tree. Only statements without WHERE and LIMIT, which read
+    every row on purpose (such as the unit registry load), may scan, and
+    full-text search may sort its match set.
+    """
+
+    HOT_REQUESTS = [
+        ('dashboard', {}),
+        ('computer_users', {}),
+        ('computer_users', {'access_level': 'faculty'}),
+        ('computer_users', {'status': 'active', 'page': 2}),
+        ('computer_users', {'access_level': 'student', 'status': 'active'}),
+        ('computer_users', {'search': 'juan'}),
+        ('computer_units', {}),
+        ('logs', {}),
+        ('logs', {'action': 'sign-out'}),
+        ('logs', {'station': 'PC-01'}),
+        ('logs', {'search': '2024'}),
+        ('logs', {'date_from': '2025-01-01', 'date_to': '2025-12-31'}),
+        ('api_get_users', {}),
+        ('api_get_users', {'status': 'active', 'include_total': 1}),
+        ('api_get_users', {'access_level': 'admin'}),
+        ('api_get_logs', {'action': 'sign-in', 'station': 'PC-01'}),
+        ('export_logs', {'format': 'ndjson', 'station': 'PC-01'}),
+        ('user_sign_in', {}),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        for n in range(30):
+            make_user(f'2024-{n:04d}', first_name='Juan' if n % 3 else 'Ana')
+            ActivityLog.objects.create(student_id=f'2024-{n:04d}', full_name='Juan', action='sign-in',
+                                       computer_station=f'PC-0{n % 3}')
+        for n in range(5):
+            ComputerUnit.objects.create(unit_id=f'PC-0{n}', status='available' if n % 2 else 'in-use')
+
+    def assertPlansUseIndexes(self, queries, label):
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+            from_search_index = any(' VIRTUAL TABLE' in step for step in plan)
+            for step in plan:
+                if not from_search_index:
+                    self.assertNotIn('TEMP B-TREE', step, f'{label}: {sql}\n{plan}')
+                if step.startswith('SCAN ') and ' USING ' not in step and ' VIRTUAL TABLE' not in step:
+                    self.assertTrue(' WHERE ' not in sql and ' LIMIT ' not in sql, f'{label}: {sql}\n{plan}')
+
+    def test_hot_requests_use_indexes(self):
+        for name, params in self.HOT_REQUESTS:
+            cache.clear()
+            unit_registry.invalidate()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(name), params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            self.assertEqual(response.status_code, 200, name)
+            self.assertPlansUseIndexes(queries.captured_queries, f'{name} {params}')
+
+    def test_kiosk_sign_in_and_out_use_indexes(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('user_sign_in'), {'student_id': '2024-0001', 'unit_id': 'PC-01'}, **AJAX)
+            self.client.post(reverse('user_sign_in'), {'student_id': '2024-0001'}, **AJAX)
+        self.assertPlansUseIndexes(queries.captured_queries, 'kiosk')
+
+
+@override_settings(
+    QUERY_BUDGET_STRICT=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTests(TestCase):
+    """Request every URL in mainpage/urls.py and check it against its query budget.
+
+    Each URL is requested with cold caches on seeded data, then again after
+    seeding ten times as many rows. The count must stay within the view's
+    @query_budget and must not grow with the data, so an N+1 query fails
+    here even while it is still under budget.
+    """
+
+    SEED_ROWS = (3, 30)
+    # Requested without a staff session, as in real use
+    ANONYMOUS_URLS = ('old_admin_redirect', 'login', 'user_sign_in')
+
+    def setUp(self):
+        forget_known_stations()
+        self.admin = User.objects.create_user('budget-admin', password='pw', is_staff=True)
+        self.round = 0
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(PROFILING_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def seed(self, count):
+        """Add count users, each with a free unit and a student and admin log entry"""
+        offset = ComputerUser.objects.count()
+        for n in range(offset, offset + count):
+            user = make_user(f'2025-{n:04d}')
+            ComputerUnit.objects.create(unit_id=f'PC-{n:03d}', status='available')
+            ActivityLog.objects.create(user=user, student_id=user.student_id, full_name=user.full_name,
+                                       action='sign-in', computer_station=f'PC-{n:03d}')
+            ActivityLog.objects.create(student_id='budget-admin', full_name='Admin', action='sign-in',
+                                       computer_station='Admin Dashboard', actor_type='admin')
+
+    def budget_requests(self):
+        """(url name, method, args, client kwargs) for every URL, with fresh targets"""
+        self.round += 1
+        tag = f'budget-{self.round}'
+        target = make_user(f'{tag}-target')
+        doomed = make_user(f'{tag}-doomed')
+        batch_doomed = make_user(f'{tag}-batch-doomed')
+        for user in (target, doomed, batch_doomed):
+            ActivityLog.objects.create(user=user, student_id=user.student_id, full_name=user.full_name,
+                                       action='sign-in', computer_station='PC-000')
+        kiosk_user = make_user(f'{tag}-kiosk')
+        with open(os.path.join(settings.PROFILING_DIR, f'{tag}-profile.prof'), 'wb') as f:
+            f.write(b'profile')
+        # bulk_create skips post_save, so signing in and renaming hit new stations (the worst case)
+        kiosk_unit, spare_unit = ComputerUnit.objects.bulk_create([
+            ComputerUnit(unit_id=f'{tag}-pc', status='available'),
+            ComputerUnit(unit_id=f'{tag}-spare', status='available'),
+        ])
+        json_body = lambda data: {'data': json.dumps(data), 'content_type': 'application/json'}
+        csv_file = SimpleUploadedFile('users.csv', (
+            'student_id,first_name,last_name,contact_number,course,address\n'
+            + ''.join(f'{tag}-csv-{n},Ana,Cruz,0917,BSIT,Campus\n' for n in range(3))
+        ).encode())
+        return [
+            ('old_admin_redirect', 'get', (), {}),
+            ('login', 'post', (), {'data': {'student_id': 'budget-admin', 'password': 'pw'}}),
+            ('logout', 'get', (), {}),
+            ('dashboard', 'get', (), {}),
+            ('computer_users', 'get', (), {}),
+            ('computer_units', 'get', (), {}),
+            ('add_user', 'post', (), {'data': {
+                'student_id': f'{tag}-new', 'firstName': 'Ana', 'lastName': 'Cruz',
+                'contactNumber': '0917', 'course': 'BSIT', 'address': 'Campus',
+            }}),
+            ('import_users', 'post', (), {'data': {'csv_file': csv_file}}),
+            ('edit_user', 'post', (target.id,), {'data': {'firstName': 'Edited', 'status': 'active'}}),
+            ('view_user_details', 'get', (target.id,), {}),
+            ('add_computer_unit', 'post', (), {'data': {'unitId': f'{tag}-added', 'status': 'available'}}),
+            ('edit_computer_unit', 'post', (spare_unit.id,), {'data': {'unitId': f'{tag}-renamed', 'status': 'maintenance'}}),
+            ('logs', 'get', (), {}),
+            ('export_logs', 'get', (), {'data': {'format': 'csv'}}),
+            ('profiling_token', 'get', (), {}),
+            ('download_profile', 'get', (f'{tag}-profile',), {}),
+            ('api_get_users', 'get', (), {'data': {'include_total': 1}}),
+            ('api_create_user', 'post', (), json_body({
+                'student_id': f'{tag}-api', 'first_name': 'Ana', 'last_name': 'Cruz',
+                'contact_number': '0917', 'course': 'BSIT', 'address': 'Campus',
+            })),
+            ('api_batch_users', 'post', (), json_body({'operations': [
+                {'op': 'create', 'data': {
+                    'student_id': f'{tag}-batch', 'first_name': 'Ana', 'last_name': 'Cruz',
+                    'contact_number': '0917', 'course': 'BSIT', 'address': 'Campus',
+                }},
+                {'op': 'update', 'id': target.id, 'data': {'course': 'BSCS'}},
+                {'op': 'status', 'student_id': target.student_id, 'status': 'inactive'},
+                {'op': 'delete', 'id': batch_doomed.id},
+            ]})),
+            ('api_update_user', 'put', (target.id,), json_body({'course': 'BSIS'})),
+            ('api_update_user_status', 'post', (target.id,), json_body({'status': 'active'})),
+            ('api_delete_user', 'delete', (doomed.id,), {}),
+            ('api_get_logs', 'get', (), {}),
+            ('api_log_stations', 'get', (), {}),
+            ('api_unit_events', 'get', (), {}),
+            ('api_usage_heatmap', 'get', (), {}),
+            ('metrics', 'get', (), {}),
+            ('user_sign_in', 'post', (), {'data': {'student_id': kiosk_user.student_id, 'unit_id': kiosk_unit.unit_id}, **AJAX}),
+        ]
+
+    def measure(self):
+        counts = {}
+        for name, method, args, kwargs in self.budget_requests():
+            cache.clear()
+            unit_registry.invalidate()
+            forget_known_stations()
+            if name in self.ANONYMOUS_URLS:
+                self.client.logout()
+            else:
+                self.client.force_login(self.admin)
+            response = getattr(self.client, method)(reverse(name, args=args), **kwargs)
+            self.assertLess(response.status_code, 400, name)
+            self.assertIn('X-Query-Budget', response, f'{name} has no @query_budget')
+            count, budget = int(response['X-Query-Count']), int(response['X-Query-Budget'])
+            self.assertLessEqual(count, budget, f'{name} ran {count} queries, over its budget of {budget}')
+            counts[name] = count
+        return counts
+
+    def test_every_url_is_checked(self):
+        checked = {name for name, _, _, _ in self.budget_requests()}
+        self.assertEqual(checked, {pattern.name for pattern in mainpage_urls.urlpatterns})
+
+    def test_urls_stay_within_budget_as_data_grows(self):
+        self.seed(self.SEED_ROWS[0])
+        small = self.measure()
+        self.seed(self.SEED_ROWS[1])
+        large = self.measure()
+        for name, count in small.items():
+            self.assertEqual(large[name], count, f'{name} queries grew from {count} to {large[name]} with more rows (N+1?)')
+
+    def test_over_budget_is_logged_not_raised(self):
+        self.client.force_login(self.admin)
+        with mock.patch.object(views.dashboard, 'query_budget', 1), self.settings(QUERY_BUDGET_STRICT=True):
+            with self.assertLogs('mainpage.querybudget', 'ERROR') as logs:
+                response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('over its budget of 1', logs.output[0])
+
+    def assert_within_budget(self, response):
+        self.assertEqual(response.status_code, 200)
+        count, budget = int(response['X-Query-Count']), int(response['X-Query-Budget'])
+        self.assertLessEqual(count, budget, f'ran {count} queries, over its budget of {budget}')
+
+    def test_large_import_stays_within_budget(self):
+        # Three batches of the file, each split into many inserts on SQLite
+        self.client.force_login(self.admin)
+        rows = 2 * IMPORT_BATCH_SIZE + 500
+        csv_file = SimpleUploadedFile('users.csv', (
+            'student_id,first_name,last_name,contact_number,course,address\n'
+            + ''.join(f'big-{n},Ana,Cruz,0917,BSIT,Campus\n' for n in range(rows))
+        ).encode())
+        with self.assertNoLogs('mainpage.querybudget'):
+            self.assert_within_budget(self.client.post(reverse('import_users'), {'csv_file': csv_file}))
+        self.assertEqual(ComputerUser.objects.filter(student_id__startswith='big-').count(), rows)
+
+    def test_largest_batches_stay_within_budget(self):
+        self.client.force_login(self.admin)
+        limit = settings.USER_BATCH_MAX_SIZE
+        ComputerUser.objects.bulk_create(make_user_instance(f'max-{n}') for n in range(limit))
+        users = list(ComputerUser.objects.filter(student_id__startswith='max-').values_list('id', 'student_id'))
+        update = {field: 'x' for field in ('first_name', 'last_name', 'contact_number', 'course', 'address')}
+        batches = {
+            'create': [{'op': 'create', 'data': {
+                'student_id': f'new-{n}', 'first_name': 'Ana', 'last_name': 'Cruz',
+                'contact_number': '0917', 'course': 'BSIT', 'address': 'Campus',
+            }} for n in range(limit)],
+            'update': [{'op': 'update', 'id': pk, 'data': update} for pk, _ in users],
+            'status': [{'op': 'status', 'student_id': student_id, 'status': 'inactive'} for _, student_id in users],
+            'mixed': [
+                {'op': 'update', 'id': pk, 'data': update} if n % 3 == 0
+                else {'op': 'status', 'student_id': student_id, 'status': 'active'} if n % 3 == 1
+                else {'op': 'delete', 'id': pk}
+                for n, (pk, student_id) in enumerate(users)
+            ],
+            'delete': [{'op': 'delete', 'student_id': student_id} for _, student_id in users[1::3]],
+        }
+        for name, operations in batches.items():
+            with self.subTest(name), self.assertNoLogs('mainpage.querybudget'):
+                response = self.client.post(reverse('api_batch_users'), json.dumps({'operations': operations}),
+                                            content_type='application/json')
+                self.assert_within_budget(response)
+                self.assertEqual(response.json()['failed'], 0)
+
+
+class DataGenerationAndBenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        forget_known_stations()
+
+    def test_generate_data_links_logs_to_users_and_units(self):
+        call_command('generate_data', users=30, units=5, logs=101, days=10, seed=1, batch_size=40, stdout=io.StringIO())
+        self.assertEqual(ComputerUser.objects.count(), 30)
+        self.assertEqual(ComputerUnit.objects.count(), 5)
+        self.assertEqual(ActivityLog.objects.count(), 101)
+
+        unit_ids = set(ComputerUnit.objects.values_list('unit_id', flat=True))
+        self.assertTrue(unit_ids <= set(Station.objects.values_list('name', flat=True)))
+        for log in ActivityLog.objects.filter(actor_type='student'):
+            self.assertIsNotNone(log.user_id)
+            self.assertEqual(log.student_id, log.user.student_id)
+            self.assertIn(log.computer_station, unit_ids)
+        oldest = ActivityLog.objects.order_by('timestamp').first().timestamp
+        self.assertGreaterEqual(oldest, timezone.now() - timedelta(days=10))
+
+    def test_generate_data_counts_only_rows_written(self):
+        # The next generated ID is taken from the row count, so this one clashes
+        ComputerUnit.objects.create(unit_id='PC-00002', status='available')
+        counts = generate_data(units=3, seed=3)
+        self.assertEqual(counts['units'], 2)
+        self.assertEqual(ComputerUnit.objects.count(), 3)
+
+    def test_benchmark_saves_percentiles_and_query_counts(self):
+        User.objects.create_user('staff', password='pw', is_staff=True)
+        call_command('generate_data', users=20, units=4, logs=40, seed=2, stdout=io.StringIO())
+        logs_before = ActivityLog.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'run.json')
+            call_command('benchmark', requests=3, warmup=0, output=output, stdout=io.StringIO())
+            with open(output, encoding='utf-8') as f:
+                report = json.load(f)
+
+        labels = [result['label'] for result in report['results']]
+        self.assertIn('dashboard', labels)
+        self.assertIn('kiosk_sign_in', labels)
+        self.assertEqual(report['scale']['users'], 20)
+        for result in report['results']:
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+            self.assertEqual(result['requests'], 3)
+            self.assertLessEqual(result['queries'], result['query_budget'], result['label'])
+        # The kiosk pairs are rolled back
+        self.assertEqual(ActivityLog.objects.count(), logs_before)
+        self.assertFalse(ComputerUnit.objects.filter(status='in-use').exists())
+
+    def test_percentile_uses_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, pct) for pct in (50, 95, 99)], [50, 95, 99])
+        self.assertEqual(percentile([7], 99), 7)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = self.settings(PROFILING_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.directory = directory.name
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        for n in range(3):
+            user = make_user(f'2024-{n:04d}')
+            ActivityLog.objects.create(user=user, student_id=user.student_id, action='sign-in', computer_station='PC-01')
+
+    def token(self):
+        response = self.client.get(reverse('profiling_token'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['token']
+
+    def test_token_profiles_one_request_and_offers_download(self):
+        token = self.token()
+        response = self.client.get(reverse('logs'), {'_profile': token})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response['X-Profile-Id']
+        self.assertEqual(response['X-Profile-Url'], reverse('download_profile', args=[profile_id]))
+
+        summary = self.client.get(response['X-Profile-Url'], {'format': 'json'})
+        summary = json.loads(b''.join(summary.streaming_content))
+        self.assertEqual(summary['view'], 'logs')
+        self.assertGreater(summary['db_queries'], 0)
+        self.assertGreater(summary['template_ms'], 0)
+        self.assertAlmostEqual(summary['db_ms'] + summary['template_ms'] + summary['python_ms'], summary['total_ms'], delta=0.1)
+        self.assertTrue(summary['top_functions'])
+
+        trace = self.client.get(response['X-Profile-Url'])
+        self.assertEqual(trace['Content-Disposition'], f'attachment; filename="{profile_id}.prof"')
+        path = os.path.join(self.directory, 'downloaded.prof')
+        with open(path, 'wb') as f:
+            f.write(b''.join(trace.streaming_content))
+        self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+        # The header works too, and the next request without it is not profiled
+        self.assertIn('X-Profile-Id', self.client.get(reverse('dashboard'), HTTP_X_PROFILE_TOKEN=token))
+        self.assertNotIn('X-Profile-Id', self.client.get(reverse('dashboard')))
+
+    def test_profile_ids_are_downloadable_for_any_view_name(self):
+        for view_name in ('logs', 'admin:index', 'mainpage.views.logs'):
+            with self.subTest(view_name=view_name):
+                profile_id = make_profile_id(view_name, timezone.now())
+                self.assertIsNotNone(profile_path(profile_id, 'prof'), profile_id)
+
+    def test_requests_without_a_valid_token_are_not_profiled(self):
+        with mock.patch('mainpage.profiling.cProfile.Profile') as profiler:
+            self.client.get(reverse('logs'))
+            self.client.get(reverse('logs'), {'_profile': 'forged'})
+            with self.settings(PROFILING_TOKEN_MAX_AGE=-1):
+                self.client.get(reverse('logs'), {'_profile': self.token()})
+        profiler.assert_not_called()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_tokens_only_work_for_the_staff_user_they_were_issued_to(self):
+        token = self.token()
+        others = [
+            None,
+            User.objects.create_user('student', password='pw'),
+            User.objects.create_user('other-staff', password='pw', is_staff=True),
+        ]
+        with mock.patch('mainpage.profiling.cProfile.Profile') as profiler:
+            for user in others:
+                self.client.logout()
+                if user is not None:
+                    self.client.force_login(user)
+                response = self.client.get(reverse('logs'), {'_profile': token})
+                self.assertNotIn('X-Profile-Id', response)
+        profiler.assert_not_called()
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_tokens_and_profiles_are_for_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('profiling_token')).status_code, 401)
+        self.assertRedirects(self.client.get(reverse('download_profile', args=['any'])), reverse('login'), fetch_redirect_response=False)
+        self.client.force_login(User.objects.get(username='staff'))
+        self.assertEqual(self.client.get(reverse('download_profile', args=['..'])).status_code, 404)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        unit_registry.invalidate()
+        request_metrics.reset()
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        return response.content.decode().splitlines()
+
+    def test_requests_are_counted_and_timed_per_url_name(self):
+        make_user('2024-0001')
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('api_get_users'))
+        lines = self.scrape()
+
+        self.assertIn('comlab_http_requests_total{view="dashboard",method="GET",status="200"} 2', lines)
+        self.assertIn('comlab_http_request_duration_seconds_bucket{view="dashboard",le="+Inf"} 2', lines)
+        self.assertIn('comlab_http_request_duration_seconds_count{view="dashboard"} 2', lines)
+        queries = [line for line in lines if line.startswith('comlab_db_queries_total{view="dashboard"}')]
+        self.assertGreater(int(queries[0].split()[-1]), 0)
+        # Buckets are cumulative
+        buckets = [int(line.split()[-1]) for line in lines if line.startswith('comlab_http_request_duration_seconds_bucket{view="api_get_users"')]
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], 1)
+        # URLs not requested yet report zero
+        self.assertIn('comlab_http_request_duration_seconds_count{view="logs"} 0', lines)
+
+    def test_gauges_come_from_maintained_counters(self):
+        make_user('2024-0001')
+        for n in range(3):
+            ComputerUnit.objects.create(unit_id=f'PC-0{n}', status='available')
+        self.scrape()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('user_sign_in'), {'student_id': '2024-0001', 'unit_id': 'PC-01'}, **AJAX)
+        with self.assertNumQueries(0):
+            lines = self.scrape()
+        self.assertIn('comlab_units{status="available"} 2', lines)
+        self.assertIn('comlab_units{status="in-use"} 1', lines)
+        self.assertIn('comlab_signed_in_users 1', lines)
+
+        # Changes outside the kiosk are recounted once
+        make_user('2024-0002', computer_station='PC-02')
+        with self.assertNumQueries(1):
+            self.assertIn('comlab_signed_in_users 2', self.scrape())
+
+    def test_token_is_required_when_configured(self):
+        with self.settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer s3cret')
+            self.assertEqual(response.status_code, 200)
+
+
+class LabSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ana = make_user('2024-0001')
+        self.ben = make_user('2024-0002')
+        for n in range(1, 4):
+            ComputerUnit.objects.create(unit_id=f'PC-0{n}', status='available')
+
+    def kiosk(self, student_id, unit_id=''):
+        response = self.client.post(reverse('user_sign_in'), {'student_id': student_id, 'unit_id': unit_id}, **AJAX)
+        self.assertEqual(response.status_code, 200)
+
+    def session_rows(self):
+        return list(LabSession.objects.order_by('started_at', 'id').values_list(
+            'user_id', 'student_id', 'computer_station', 'started_at', 'ended_at', 'duration'))
+
+    def test_kiosk_opens_and_closes_sessions(self):
+        self.kiosk('2024-0001', 'PC-01')
+        session = LabSession.objects.get()
+        self.assertEqual((session.user, session.computer_station, session.ended_at), (self.ana, 'PC-01', None))
+
+        self.kiosk('2024-0001')
+        session.refresh_from_db()
+        self.assertIsNotNone(session.ended_at)
+        self.assertEqual(session.duration, session.ended_at - session.started_at)
+
+    def test_sign_in_closes_a_session_left_open(self):
+        self.kiosk('2024-0001', 'PC-01')
+        # An admin clears the station instead of the student signing out
+        self.ana.refresh_from_db()
+        self.ana.computer_station = ''
+        self.ana.save()
+        self.kiosk('2024-0001', 'PC-02')
+
+        abandoned, current = LabSession.objects.order_by('started_at')
+        self.assertEqual(abandoned.ended_at, current.started_at)
+        self.assertIsNone(abandoned.duration)
+        self.assertIsNone(current.ended_at)
+
+    def test_rebuild_matches_sessions_written_by_the_kiosk(self):
+        self.kiosk('2024-0001', 'PC-01')
+        self.kiosk('2024-0002', 'PC-02')
+        self.kiosk('2024-0001')
+        self.kiosk('2024-0001', 'PC-03')
+        self.kiosk('2024-0002')
+        live = self.session_rows()
+        self.assertEqual(len(live), 3)
+
+        LabSession.objects.update(computer_station='stale')
+        call_command('rebuild_sessions', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(self.session_rows(), live)
+
+    def test_rebuild_skips_orphan_sign_outs_and_admin_rows(self):
+        start = timezone.now() - timedelta(hours=5)
+        for minutes, student_id, action, actor_type in [
+            (0, '2024-0002', 'sign-out', 'student'),
+            (10, 'staff', 'sign-in', 'admin'),
+            (20, '2024-0001', 'sign-in', 'student'),
+            (30, 'staff', 'sign-out', 'admin'),
+            (50, '2024-0001', 'sign-out', 'student'),
+        ]:
+            ActivityLog.objects.create(student_id=student_id, action=action, actor_type=actor_type,
+                                       computer_station='PC-01', timestamp=start + timedelta(minutes=minutes))
+        out = io.StringIO()
+        call_command('rebuild_sessions', stdout=out)
+        self.assertIn('1 sign-outs had no matching sign-in', out.getvalue())
+        session = LabSession.objects.get()
+        self.assertEqual((session.student_id, session.duration), ('2024-0001', timedelta(minutes=30)))
+
+    def test_rebuild_keeps_sessions_and_usage_of_archived_logs(self):
+        march, now = timezone.make_aware(datetime(2025, 3, 3, 10)), timezone.now().replace(microsecond=0)
+        for user, started_at in ((self.ana, march), (self.ben, now - timedelta(hours=2))):
+            ended_at = started_at + timedelta(minutes=40)
+            start_lab_session(user, 'PC-01', started_at)
+            end_lab_session(user, ended_at)
+            for action, timestamp in (('sign-in', started_at), ('sign-out', ended_at)):
+                ActivityLog.objects.create(user=user, student_id=user.student_id, action=action,
+                                           computer_station='PC-01', timestamp=timestamp)
+        sessions = self.session_rows()
+        hours = set(StationHourUsage.objects.values_list('hour', 'occupied_seconds', 'users'))
+        days = set(LabDayUsage.objects.values_list('date', 'occupied_seconds', 'users'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('archive_logs', days=30, dir=directory, stdout=io.StringIO())
+        self.assertEqual(ActivityLog.objects.count(), 2)
+        call_command('rebuild_sessions', stdout=io.StringIO())
+        self.assertEqual(self.session_rows(), sessions)
+        self.assertEqual(set(StationHourUsage.objects.values_list('hour', 'occupied_seconds', 'users')), hours)
+        self.assertEqual(set(LabDayUsage.objects.values_list('date', 'occupied_seconds', 'users')), days)
+
+    def test_usage_is_an_indexed_range_query(self):
+        usage = LabSession.objects.filter(
+            user=self.ana, started_at__gte=timezone.now() - timedelta(days=30), started_at__lt=timezone.now(),
+        ).values('computer_station').annotate(total=models.Sum('duration'))
+        sql, params = usage.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('labsession_user_start_idx', plan)
+
+
+class UsageRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ana = make_user('2024-0001')
+        self.ben = make_user('2024-0002')
+
+    def at(self, day, hour, minute=0):
+        return timezone.make_aware(datetime(2025, 3, day, hour, minute))
+
+    def stay(self, user, station, started_at, ended_at):
+        start_lab_session(user, station, started_at)
+        end_lab_session(user, ended_at)
+
+    def hour_rows(self):
+        return {
+            (row.computer_station, timezone.localtime(row.hour).strftime('%d %H')): (row.occupied_seconds, row.users)
+            for row in StationHourUsage.objects.all()
+        }
+
+    def day_rows(self):
+        return {row.date.day: (row.occupied_seconds, row.users) for row in LabDayUsage.objects.all()}
+
+    def test_sessions_are_split_across_local_hours_and_days(self):
+        self.stay(self.ana, 'PC-01', self.at(3, 22, 40), self.at(4, 0, 20))
+        self.assertEqual(self.hour_rows(), {
+            ('PC-01', '03 22'): (20 * 60, 1),
+            ('PC-01', '03 23'): (60 * 60, 1),
+            ('PC-01', '04 00'): (20 * 60, 1),
+        })
+        self.assertEqual(self.day_rows(), {3: (80 * 60, 1), 4: (20 * 60, 1)})
+
+    def test_users_count_once_per_bucket(self):
+        self.stay(self.ana, 'PC-01', self.at(3, 10, 5), self.at(3, 10, 20))
+        self.stay(self.ben, 'PC-01', self.at(3, 10, 25), self.at(3, 10, 28))
+        self.stay(self.ana, 'PC-01', self.at(3, 10, 30), self.at(3, 10, 50))
+        self.stay(self.ana, 'PC-02', self.at(3, 11, 10), self.at(3, 11, 20))
+        self.assertEqual(self.hour_rows(), {
+            ('PC-01', '03 10'): (38 * 60, 2),
+            ('PC-02', '03 11'): (10 * 60, 1),
+        })
+        self.assertEqual(self.day_rows(), {3: (48 * 60, 2)})
+
+    def test_sessions_without_a_duration_are_left_out(self):
+        start_lab_session(self.ana, 'PC-01', self.at(3, 9))
+        # Signing in again abandons the first session
+        start_lab_session(self.ana, 'PC-02', self.at(3, 10))
+        end_lab_session(self.ana, self.at(3, 10, 30))
+        recompute_usage()
+        self.assertEqual(self.hour_rows(), {('PC-02', '03 10'): (30 * 60, 1)})
+
+    def test_long_sessions_are_written_within_the_parameter_limit(self):
+        # 40 hour rows of 5 parameters each, at most 50 parameters per statement
+        with mock.patch.object(connection.features, 'max_query_params', 50), \
+                CaptureQueriesContext(connection) as queries:
+            self.stay(self.ana, 'PC-01', self.at(3, 8), self.at(4, 23, 30))
+        inserts = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "mainpage_stationhourusage"')]
+        self.assertEqual(len(inserts), 4)
+        self.assertEqual(StationHourUsage.objects.count(), 40)
+        self.assertEqual(sum(StationHourUsage.objects.values_list('occupied_seconds', flat=True)), (39 * 60 + 30) * 60)
+        self.assertEqual(self.day_rows(), {3: (16 * 3600, 1), 4: ((23 * 60 + 30) * 60, 1)})
+
+    def test_a_session_closed_concurrently_is_not_counted_twice(self):
+        self.stay(self.ana, 'PC-01', self.at(3, 10), self.at(3, 10, 30))
+        start_lab_session(self.ana, 'PC-01', self.at(3, 11))
+        stale = LabSession.objects.get(ended_at__isnull=True)
+        self.assertIsNotNone(end_lab_session(self.ana, self.at(3, 11, 20)))
+        # A second sign-out that read the session while it was still open
+        with mock.patch.object(QuerySet, 'first', return_value=stale):
+            self.assertIsNone(end_lab_session(self.ana, self.at(3, 11, 40)))
+        self.assertEqual(LabSession.objects.get(pk=stale.pk).ended_at, self.at(3, 11, 20))
+        self.assertEqual(self.hour_rows(), {('PC-01', '03 10'): (30 * 60, 1), ('PC-01', '03 11'): (20 * 60, 1)})
+
+    def test_recompute_matches_the_kiosk_and_clips_to_the_range(self):
+        self.stay(self.ana, 'PC-01', self.at(3, 22, 40), self.at(4, 0, 20))
+        self.stay(self.ben, 'PC-01', self.at(3, 23, 0), self.at(3, 23, 30))
+        self.stay(self.ana, 'PC-02', self.at(5, 8, 0), self.at(5, 9, 15))
+        hours, days = self.hour_rows(), self.day_rows()
+
+        StationHourUsage.objects.update(occupied_seconds=0)
+        LabDayUsage.objects.all().delete()
+        self.assertEqual(recompute_usage(), (len(hours), len(days)))
+        self.assertEqual((self.hour_rows(), self.day_rows()), (hours, days))
+
+        # Only the 4th is rebuilt; the part of the first stay before midnight stays as it was
+        StationHourUsage.objects.update(users=5)
+        call_command('recompute_usage', '--from', '2025-03-04', '--to', '2025-03-04', stdout=io.StringIO())
+        rows = self.hour_rows()
+        self.assertEqual(rows[('PC-01', '04 00')], (20 * 60, 1))
+        self.assertEqual(rows[('PC-01', '03 23')], (90 * 60, 5))
+        self.assertEqual(rows[('PC-02', '05 08')], (60 * 60, 5))
+
+    def test_mysql_upsert_adds_to_existing_counters(self):
+        mysql = mock.Mock(vendor='mysql')
+        mysql.ops.quote_name = lambda name: f'`{name}`'
+        sql = counter_upsert_sql(mysql, 'usage', ['day', 'seconds', 'users'], ['day'], ['seconds', 'users'], 2)
+        self.assertEqual(sql, (
+            'INSERT INTO `usage` (`day`, `seconds`, `users`) VALUES (%s, %s, %s), (%s, %s, %s) '
+            'ON DUPLICATE KEY UPDATE `seconds` = `seconds` + VALUES(`seconds`), `users` = `users` + VALUES(`users`)'
+        ))
+        self.assertIsNone(counter_upsert_sql(mock.Mock(vendor='oracle'), 'usage', ['day'], ['day'], [], 1))
+
+    def test_databases_without_an_upsert_update_then_insert(self):
+        with mock.patch('mainpage.usage.counter_upsert_sql', return_value=None):
+            self.stay(self.ana, 'PC-01', self.at(3, 10, 0), self.at(3, 10, 20))
+            self.stay(self.ben, 'PC-01', self.at(3, 10, 30), self.at(3, 11, 0))
+        self.assertEqual(self.hour_rows(), {('PC-01', '03 10'): (50 * 60, 2)})
+        self.assertEqual(self.day_rows(), {3: (50 * 60, 2)})
+
+    def test_recompute_rejects_bad_dates(self):
+        with self.assertRaises(CommandError):
+            call_command('recompute_usage', '--from', '2025-03-31', '--to', '2025-03-01', stdout=io.StringIO())
+        with self.assertRaises(CommandError):
+            call_command('recompute_usage', '--from', 'March', stdout=io.StringIO())
+
+    def test_kiosk_sign_out_updates_the_rollups(self):
+        ComputerUnit.objects.create(unit_id='PC-01', status='available')
+        for unit_id in ('PC-01', ''):
+            response = self.client.post(reverse('user_sign_in'), {'student_id': '2024-0001', 'unit_id': unit_id}, **AJAX)
+            self.assertEqual(response.status_code, 200)
+        row = StationHourUsage.objects.get()
+        self.assertEqual((row.computer_station, row.users), ('PC-01', 1))
+        self.assertEqual(LabDayUsage.objects.get().users, 1)
+
+    def test_heatmap_is_served_from_the_rollups(self):
+        self.stay(self.ana, 'PC-01', self.at(3, 22, 40), self.at(4, 0, 20))
+        self.stay(self.ben, 'PC-02', self.at(4, 9, 0), self.at(4, 9, 45))
+        url = reverse('api_usage_heatmap')
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.client.force_login(User.objects.create_user('coordinator', password='pw', is_staff=True))
+        self.assertEqual(self.client.get(url, {'date_from': '2025-02-30'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'date_from': '2025-03-04', 'date_to': '2025-03-03'}).status_code, 400)
+
+        LabSession.objects.all().delete()
+        response = self.client.get(url, {'date_from': '2025-03-03', 'date_to': '2025-03-04'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['days'], data['hours']), (2, list(range(24))))
+        pc1, pc2 = data['stations']
+        self.assertEqual((pc1['station'], pc1['occupied_minutes'][22], pc1['occupied_minutes'][0]), ('PC-01', 20, 20))
+        self.assertEqual(pc1['utilization'][23], 0.5)
+        self.assertEqual((pc2['occupied_minutes'][9], pc2['users'][9], pc2['users'][10]), (45, 1, 0))
+        self.assertEqual(data['daily'], [
+            {'date': '2025-03-03', 'occupied_minutes': 80, 'users': 1},
+            {'date': '2025-03-04', 'occupied_minutes': 65, 'users': 2},
+        ])
+
+
+class UnitFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        unit_registry.invalidate()
+        self.unit = ComputerUnit.objects.create(unit_id='PC-01', status='available')
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+
+    def test_unit_grid_is_not_rendered_again_until_the_version_changes(self):
+        self.assertContains(self.client.get(reverse('computer_units')), 'PC-01')
+
+        # update() skips the signals, so the version stays put and the cached grid is served
+        ComputerUnit.objects.filter(pk=self.unit.pk).update(unit_id='PC-99')
+        with self.assertNumQueries(2):  # session + user; the grid is not queried
+            response = self.client.get(reverse('computer_units'))
+        self.assertContains(response, 'PC-01')
+        self.assertNotContains(response, 'PC-99')
+
+        bump_unit_version()
+        response = self.client.get(reverse('computer_units'))
+        self.assertContains(response, 'PC-99')
+        self.assertNotContains(response, 'PC-01')
+
+    def test_dashboard_lists_are_rendered_again_after_a_unit_edit(self):
+        self.assertContains(self.client.get(reverse('dashboard')), 'PC-01')
+
+        stale = views.get_dashboard_snapshot()
+        renamed = dict(stale, units_by_status={**stale['units_by_status'], 'available': [
+            {'unit_id': 'PC-77', 'status_display': 'Available'},
+        ]})
+        with mock.patch.object(views, 'get_dashboard_snapshot', return_value=renamed):
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'PC-01')
+        self.assertNotContains(response, 'PC-77')
+
+        self.client.post(reverse('edit_computer_unit', args=[self.unit.pk]), {'unitId': 'PC-02', 'status': 'available'})
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'data-unit-id="PC-02"')
+        self.assertNotContains(response, 'data-unit-id="PC-01"')
+
+
+class UserSignInConcurrencyTests(TransactionTestCase):
+    """Fire simultaneous kiosk sign-ins from many threads against few units."""
+
+    STUDENTS = 300
+    UNITS = 40
+    THREADS = 16
+
+    def setUp(self):
+        ComputerUnit.objects.bulk_create(
+            ComputerUnit(unit_id=f'PC-{n:03d}', status='available') for n in range(self.UNITS)
+        )
+        ComputerUser.objects.bulk_create(
+            ComputerUser(student_id=f'S{n:05d}', first_name='Load', last_name=str(n),
+                         contact_number='0', course='BSCS', address='-', computer_station='')
+            for n in range(self.STUDENTS)
+        )
+
+    def run_sign_ins(self, attempts, threads):
+        """Run (student_id, unit_id) sign-ins on a thread pool, return (statuses, seconds)."""
+        statuses = []
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+        chunks = [attempts[i::threads] for i in range(threads)]
+
+        def worker(chunk):
+            client = Client()
+            start.wait()
+            try:
+                for student_id, unit_id in chunk:
+                    response = client.post(reverse('user_sign_in'), {'student_id': student_id, 'unit_id': unit_id}, **AJAX)
+                    with lock:
+                        statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        began = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return statuses, time.perf_counter() - began
+
+    def test_no_double_booking_under_contention(self):
+        # Every student tries a unit; several students per unit
+        attempts = [(f'S{n:05d}', f'PC-{n % self.UNITS:03d}') for n in range(self.STUDENTS)]
+        statuses, _ = self.run_sign_ins(attempts, self.THREADS)
+
+        self.assertEqual(len(statuses), self.STUDENTS)
+        self.assertEqual(set(statuses) - {200, 409}, set())
+        self.assertEqual(statuses.count(200), self.UNITS)
+
+        # Each unit is held by exactly one user and logged exactly once
+        self.assertFalse(ComputerUnit.objects.filter(status='available').exists())
+        holders = list(ComputerUser.objects.exclude(computer_station='').values_list('computer_station', flat=True))
+        self.assertEqual(sorted(holders), sorted(f'PC-{n:03d}' for n in range(self.UNITS)))
+        self.assertEqual(ActivityLog.objects.filter(action='sign-in').count(), self.UNITS)
+
+    def test_throughput_holds_under_concurrency(self):
+        # Uncontended sign-ins: one distinct unit per student
+        per_run = self.STUDENTS // 2
+        ComputerUnit.objects.bulk_create(
+            ComputerUnit(unit_id=f'LOAD-{n:03d}', status='available') for n in range(self.STUDENTS)
+        )
+        serial = [(f'S{n:05d}', f'LOAD-{n:03d}') for n in range(per_run)]
+        parallel = [(f'S{n:05d}', f'LOAD-{n:03d}') for n in range(per_run, self.STUDENTS)]
+
+        serial_statuses, serial_seconds = self.run_sign_ins(serial, 1)
+        parallel_statuses, parallel_seconds = self.run_sign_ins(parallel, self.THREADS)
+
+        self.assertEqual(set(serial_statuses), {200})
+        self.assertEqual(set(parallel_statuses), {200})
+        # SQLite serializes writers, so the goal is that concurrent sign-ins
+        # queue on the lock instead of failing and retrying: throughput under
+        # contention must stay in the same range as the serial baseline.
+        self.assertLess(parallel_seconds, serial_seconds * 3)
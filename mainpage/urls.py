@@ -1,7 +1,9 @@
 from django.urls import path
 from django.shortcuts import redirect
 from . import views
+from .querybudget import query_budget
 
+@query_budget(0)
 def redirect_old_admin(request):
     """Redirect old admin URL to new login page"""
     return redirect('login')
@@ -17,18 +19,30 @@ urlpatterns = [
     path('admin/computer_users/', views.computer_users, name='computer_users'),
     path('admin/computer_units/', views.computer_units, name='computer_units'),
     path('admin/computer_users/add/', views.add_user, name='add_user'),
+    path('admin/computer_users/import/', views.import_users_csv, name='import_users'),
     path('admin/computer_users/edit/<int:user_id>/', views.edit_user, name='edit_user'),
     path('admin/computer_users/view/<int:user_id>/', views.view_user_details, name='view_user_details'),
     path('admin/computer_units/add/', views.add_computer_unit, name='add_computer_unit'),
     path('admin/computer_units/edit/<int:unit_id>/', views.edit_computer_unit, name='edit_computer_unit'),
     path('admin/logs/', views.logs_view, name='logs'),
+    path('admin/logs/export/', views.export_logs, name='export_logs'),
+    path('admin/profiling/token/', views.profiling_token, name='profiling_token'),
+    path('admin/profiling/<str:profile_id>/', views.download_profile, name='download_profile'),
     
     # API endpoints
     path('api/users/', views.get_users, name='api_get_users'),
     path('api/users/create/', views.create_user, name='api_create_user'),
+    path('api/users/batch/', views.batch_users, name='api_batch_users'),
     path('api/users/<int:user_id>/update/', views.update_user, name='api_update_user'),
     path('api/users/<int:user_id>/delete/', views.delete_user, name='api_delete_user'),
     path('api/users/<int:user_id>/status/', views.update_user_status, name='api_update_user_status'),
+    path('api/logs/', views.get_logs, name='api_get_logs'),
+    path('api/logs/stations/', views.get_log_stations, name='api_log_stations'),
+    path('api/units/events/', views.unit_events_stream, name='api_unit_events'),
+    path('api/usage/heatmap/', views.usage_heatmap, name='api_usage_heatmap'),
+    
+    # Prometheus scrape target
+    path('metrics', views.metrics, name='metrics'),
     
     # Student sign-in (public)
     path('', views.user_sign_in, name='user_sign_in'),
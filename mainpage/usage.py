@@ -0,0 +1,224 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import connection, models, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import LabDayUsage, LabSession, StationHourUsage
+
+# Sessions read per fetch and rollup rows written per insert during a recompute
+RECOMPUTE_BATCH_SIZE = 5000
+HOURS_PER_DAY = 24
+
+
+def _hour_start(value):
+    return timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(date):
+    """Aware start of a local date"""
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def hour_slices(started_at, ended_at):
+    """Split a stay into (local hour start, whole seconds within that hour)"""
+    hour = _hour_start(started_at)
+    while hour < ended_at:
+        next_hour = _hour_start(hour.astimezone(dt_timezone.utc) + timedelta(hours=1))
+        yield hour, round((min(ended_at, next_hour) - max(started_at, hour)).total_seconds())
+        hour = next_hour
+
+
+def day_slices(started_at, ended_at):
+    """Split a stay into (local date, whole seconds within that date)"""
+    date = timezone.localtime(started_at).date()
+    start = day_start(date)
+    while start < ended_at:
+        end = day_start(date + timedelta(days=1))
+        yield date, round((min(ended_at, end) - max(started_at, start)).total_seconds())
+        date, start = date + timedelta(days=1), end
+
+
+def counter_upsert_sql(connection, table, columns, keys, counters, rows):
+    """SQL inserting ``rows`` rows of ``columns`` that adds to ``counters`` where a row with the same ``keys`` exists.
+
+    ON CONFLICT ... DO UPDATE on SQLite and PostgreSQL, ON DUPLICATE KEY
+    UPDATE on MySQL; None on other databases.
+    """
+    if connection.vendor not in ('sqlite', 'postgresql', 'mysql'):
+        return None
+    qn = connection.ops.quote_name
+    values = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * rows)
+    insert = f'INSERT INTO {qn(table)} ({", ".join(qn(column) for column in columns)}) VALUES {values}'
+    if connection.vendor == 'mysql':
+        updates = ', '.join(f'{qn(column)} = {qn(column)} + VALUES({qn(column)})' for column in counters)
+        return f'{insert} ON DUPLICATE KEY UPDATE {updates}'
+    updates = ', '.join(f'{qn(column)} = {qn(table)}.{qn(column)} + excluded.{qn(column)}' for column in counters)
+    return f'{insert} ON CONFLICT ({", ".join(qn(column) for column in keys)}) DO UPDATE SET {updates}'
+
+
+def _add_usage(model, keys, extra, rows):
+    """Insert rollup rows of (*keys, *extra, occupied_seconds, users), adding to the counters of rows that already exist.
+
+    Upsert statements where the database has them, so concurrent
+    sign-outs at the same station and hour add up instead of overwriting
+    each other; a session spanning many hours is split into statements
+    within the database's parameter limit, as bulk_create splits the
+    recompute's inserts. Elsewhere each row is an UPDATE adding to the
+    counters, with an insert when no row matched.
+    """
+    counters = ('occupied_seconds', 'users')
+    fields = [model._meta.get_field(name) for name in (*keys, *extra, *counters)]
+    batch_size = min(RECOMPUTE_BATCH_SIZE, max(connection.ops.bulk_batch_size(fields, rows), 1))
+    for start in range(0, len(rows), batch_size):
+        _upsert_usage(model, keys, counters, fields, rows[start:start + batch_size])
+
+
+def _upsert_usage(model, keys, counters, fields, rows):
+    sql = counter_upsert_sql(
+        connection, model._meta.db_table, [field.column for field in fields],
+        [field.column for field in fields[:len(keys)]], counters, len(rows),
+    )
+    if sql is None:
+        for values in rows:
+            row = dict(zip((field.name for field in fields), values))
+            updated = model.objects.filter(**{name: row[name] for name in keys}).update(
+                **{name: models.F(name) + row[name] for name in counters}
+            )
+            if not updated:
+                model.objects.create(**row)
+        return
+    params = [field.get_db_prep_value(value, connection) for values in rows for field, value in zip(fields, values)]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def record_session_usage(session):
+    """Add a session the kiosk just closed to the hourly and daily rollups.
+
+    The user counts toward a bucket unless one of their other closed
+    sessions already covered it; those are found with one indexed lookup
+    of the user's sessions that ended after this one's first day began.
+    Sessions without a duration are left out.
+    """
+    if session.duration is None:
+        return
+    hours = list(hour_slices(session.started_at, session.ended_at))
+    days = list(day_slices(session.started_at, session.ended_at))
+    if not hours:
+        return
+
+    seen_hours, seen_days = set(), set()
+    if session.user_id is not None:
+        others = (
+            LabSession.objects
+            .filter(user_id=session.user_id, ended_at__gt=day_start(days[0][0]), started_at__lt=session.ended_at, duration__isnull=False)
+            .exclude(pk=session.pk)
+            .values_list('computer_station', 'started_at', 'ended_at')
+        )
+        for computer_station, started_at, ended_at in others:
+            seen_days.update(date for date, _ in day_slices(started_at, ended_at))
+            if computer_station == session.computer_station:
+                seen_hours.update(hour for hour, _ in hour_slices(started_at, ended_at))
+
+    _add_usage(StationHourUsage, ('computer_station', 'hour'), ('hour_of_day',), [
+        (session.computer_station, hour, hour.hour, seconds, int(hour not in seen_hours)) for hour, seconds in hours
+    ])
+    _add_usage(LabDayUsage, ('date',), (), [
+        (date, seconds, int(date not in seen_days)) for date, seconds in days
+    ])
+
+
+def recompute_usage(date_from=None, date_to=None, batch_size=RECOMPUTE_BATCH_SIZE):
+    """Rebuild the rollups for local dates date_from to date_to, inclusive, from closed lab sessions.
+
+    A missing bound means from the first or to the last session. Sessions
+    crossing a bound only count the part inside the range. The rows are
+    replaced in one transaction; returns (hour rows, day rows) written.
+    """
+    start = day_start(date_from) if date_from else None
+    end = day_start(date_to + timedelta(days=1)) if date_to else None
+    sessions = LabSession.objects.filter(duration__isnull=False)
+    if start is not None:
+        sessions = sessions.filter(ended_at__gt=start)
+    if end is not None:
+        sessions = sessions.filter(started_at__lt=end)
+
+    hour_seconds, hour_users = Counter(), defaultdict(set)
+    day_seconds, day_users = Counter(), defaultdict(set)
+    rows = sessions.values_list('user_id', 'student_id', 'computer_station', 'started_at', 'ended_at')
+    for user_id, student_id, computer_station, started_at, ended_at in rows.iterator(chunk_size=batch_size):
+        if start is not None:
+            started_at = max(started_at, start)
+        if end is not None:
+            ended_at = min(ended_at, end)
+        who = user_id if user_id is not None else f'student:{student_id}'
+        for hour, seconds in hour_slices(started_at, ended_at):
+            hour_seconds[computer_station, hour] += seconds
+            hour_users[computer_station, hour].add(who)
+        for date, seconds in day_slices(started_at, ended_at):
+            day_seconds[date] += seconds
+            day_users[date].add(who)
+
+    with transaction.atomic():
+        stale_hours, stale_days = StationHourUsage.objects.all(), LabDayUsage.objects.all()
+        if start is not None:
+            stale_hours, stale_days = stale_hours.filter(hour__gte=start), stale_days.filter(date__gte=date_from)
+        if end is not None:
+            stale_hours, stale_days = stale_hours.filter(hour__lt=end), stale_days.filter(date__lte=date_to)
+        stale_hours.delete()
+        stale_days.delete()
+        StationHourUsage.objects.bulk_create((
+            StationHourUsage(computer_station=computer_station, hour=hour, hour_of_day=hour.hour, occupied_seconds=seconds, users=len(hour_users[computer_station, hour]))
+            for (computer_station, hour), seconds in hour_seconds.items()
+        ), batch_size=batch_size)
+        LabDayUsage.objects.bulk_create((
+            LabDayUsage(date=date, occupied_seconds=seconds, users=len(day_users[date]))
+            for date, seconds in day_seconds.items()
+        ), batch_size=batch_size)
+    return len(hour_seconds), len(day_seconds)
+
+
+def build_heatmap(date_from, date_to):
+    """Station by hour-of-day occupancy and the lab's daily totals for local dates date_from to date_to.
+
+    Read from the rollups only, grouped by station and hour of day in the
+    database, so the cost follows the number of stations and hours, not
+    sessions.
+    Per cell, ``utilization`` is the share of the range's clock hours the
+    PC was in use and ``users`` sums the distinct users of each day's hour.
+    """
+    days = (date_to - date_from).days + 1
+    cells = (
+        StationHourUsage.objects
+        .filter(hour__gte=day_start(date_from), hour__lt=day_start(date_to + timedelta(days=1)))
+        .values('computer_station', 'hour_of_day')
+        .annotate(seconds=Sum('occupied_seconds'), users=Sum('users'))
+        .order_by()
+    )
+    stations = {}
+    for cell in cells:
+        row = stations.setdefault(cell['computer_station'], {
+            'station': cell['computer_station'],
+            'occupied_minutes': [0] * HOURS_PER_DAY,
+            'utilization': [0] * HOURS_PER_DAY,
+            'users': [0] * HOURS_PER_DAY,
+        })
+        hour = cell['hour_of_day']
+        row['occupied_minutes'][hour] = round(cell['seconds'] / 60, 1)
+        row['utilization'][hour] = round(cell['seconds'] / (days * 3600), 3)
+        row['users'][hour] = cell['users']
+
+    daily = LabDayUsage.objects.filter(date__gte=date_from, date__lte=date_to).order_by('date')
+    return {
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'days': days,
+        'hours': list(range(HOURS_PER_DAY)),
+        'stations': [stations[name] for name in sorted(stations)],
+        'daily': [
+            {'date': day.date.isoformat(), 'occupied_minutes': round(day.occupied_seconds / 60, 1), 'users': day.users}
+            for day in daily
+        ],
+    }
@@ -1,19 +1,48 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.crypto import constant_time_compare
+from django.utils.http import urlencode
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+import asyncio
+import csv
+import io
 import json
-from datetime import datetime
-from .models import ComputerUser, ComputerUnit, ActivityLog
-from django.db import models
+from datetime import datetime, timedelta
+from .models import ComputerUser, ComputerUnit
+from .archive import iter_archived_logs
+from .batch import batch_extra_queries, max_batch_size, run_user_batch
+from .dashboard import get_dashboard_snapshot
+from .events import unit_events, format_sse, SSE_HEARTBEAT_SECONDS, SSE_RETRY_MS
+from .exports import EXPORT_FIELDS, EXPORT_FORMATS, EXPORT_CHUNK_SIZE
+from .imports import IMPORT_REQUIRED_COLUMNS, IMPORT_OPTIONAL_COLUMNS, import_extra_queries, import_users
+from .labsessions import start_lab_session, end_lab_session
+from .logwriter import activity_log_writer
+from .log_filters import student_activity_logs, parse_log_filters, apply_log_filters, log_filter_query
+from .metrics import METRICS_CONTENT_TYPE, domain_metrics, request_metrics, url_names
+from .pagination import keyset_paginate
+from .profiling import PROFILE_HEADER, PROFILE_PARAM, make_profile_token, profile_path
+from .querybudget import extend_query_budget, query_budget
+from .registry import unit_registry
+from .search import search_users
+from .stations import get_stations
+from .signals import send_unit_changed
+from .signins import adjust_signed_in_count
+from .usage import build_heatmap
+from django.db import models, transaction
 
 # Create your views here.
 
+@query_budget(10)
 def login_view(request):
     """Admin login page using Django's auth_user table"""
     if request.method == 'POST':
@@ -46,12 +75,13 @@ def login_view(request):
             request.session['admin_username'] = user.username
             
             # Log the admin login in activity log
-            ActivityLog.objects.create(
+            activity_log_writer.log(
                 user=None,  # No ComputerUser relation
                 student_id=user.username,
                 full_name=user.get_full_name() or user.username,
                 action='sign-in',
                 computer_station='Admin Dashboard',
+                actor_type='admin',
                 notes=f'Admin login to dashboard - Django User: {user.username}'
             )
             
@@ -64,16 +94,18 @@ def login_view(request):
     # If GET request or failed login, show login form
     return render(request, 'login.html')
 
+@query_budget(5)
 def logout_view(request):
     """Admin logout using Django's built-in logout"""
     if request.user.is_authenticated:
         # Log the admin logout
-        ActivityLog.objects.create(
+        activity_log_writer.log(
             user=None,  # No ComputerUser relation
             student_id=request.user.username,
             full_name=request.user.get_full_name() or request.user.username,
             action='sign-out',
             computer_station='Admin Dashboard',
+            actor_type='admin',
             notes=f'Admin logout from dashboard - Django User: {request.user.username}'
         )
         
@@ -83,34 +115,47 @@ def logout_view(request):
     messages.success(request, 'You have been logged out successfully.')
     return redirect('login')
 
+# Seconds a rendered unit list stays cached. Fragment keys carry the unit
+# version, so a unit change makes the old HTML unreachable straight away.
+UNIT_FRAGMENT_TIMEOUT = 60 * 60
+
+@query_budget(4)
 def dashboard(request):
     # Check if user is logged in and is staff
     if not request.user.is_authenticated or not request.user.is_staff:
         messages.error(request, 'Please log in to access the dashboard.')
         return redirect('login')
     
-    total_users = ComputerUser.objects.count()
-    total_units = ComputerUnit.objects.count()
-    available_units = ComputerUnit.objects.filter(status='available').count()
-    occupied_units = ComputerUnit.objects.filter(status='in-use').count()
-    maintenance_units = ComputerUnit.objects.filter(status='maintenance').count()
-    available_units_list = ComputerUnit.objects.filter(status='available').order_by('unit_id')
-    occupied_units_list = ComputerUnit.objects.filter(status='in-use').order_by('unit_id')
-    maintenance_units_list = ComputerUnit.objects.filter(status='maintenance').order_by('unit_id')
+    # Counts and unit lists come from a cached snapshot that is rebuilt only
+    # after a unit or user changes
+    snapshot = get_dashboard_snapshot()
+    status_counts = snapshot['status_counts']
+    units_by_status = snapshot['units_by_status']
     context = {
-        'total_users': total_users,
-        'total_units': total_units,
-        'available_units': available_units,
-        'occupied_units': occupied_units,
-        'maintenance_units': maintenance_units,
-        'available_units_list': available_units_list,
-        'occupied_units_list': occupied_units_list,
-        'maintenance_units_list': maintenance_units_list,
+        'total_users': snapshot['total_users'],
+        'total_units': snapshot['total_units'],
+        'available_units': status_counts['available'],
+        'occupied_units': status_counts['in-use'],
+        'maintenance_units': status_counts['maintenance'],
+        'available_units_list': units_by_status['available'],
+        'occupied_units_list': units_by_status['in-use'],
+        'maintenance_units_list': units_by_status['maintenance'],
+        'units_version': snapshot['units_version'],
+        'unit_fragment_timeout': UNIT_FRAGMENT_TIMEOUT,
         'current_page': 'dashboard',
         'admin_user_name': request.user.get_full_name() or request.user.username,
     }
     return render(request, 'dashboard.html', context)
 
+# Rows per page on the computer users page
+USERS_PER_PAGE = 50
+# Columns rendered by the users table; the edit modal loads the rest on demand
+COMPUTER_USERS_PAGE_FIELDS = (
+    'id', 'student_id', 'first_name', 'last_name', 'email', 'course',
+    'access_level', 'status', 'computer_station', 'last_login', 'created_at',
+)
+
+@query_budget(4)
 def computer_users(request):
     # Check if user is logged in and is staff
     if not request.user.is_authenticated or not request.user.is_staff:
@@ -122,23 +167,12 @@ def computer_users(request):
     access_level_filter = request.GET.get('access_level', '').strip()
     status_filter = request.GET.get('status', '').strip()
     
-    # Get all users for display
-    users_queryset = ComputerUser.objects.all().order_by('-created_at')
+    # Get all users for display; id breaks ties so pages never overlap
+    users_queryset = ComputerUser.objects.all().order_by('-created_at', '-id')
     
     # Apply search filter if search query exists
     if search_query:
-        users_queryset = users_queryset.filter(
-            models.Q(first_name__icontains=search_query) |
-            models.Q(last_name__icontains=search_query) |
-            models.Q(student_id__icontains=search_query) |
-            models.Q(email__icontains=search_query) |
-            models.Q(course__icontains=search_query) |
-            models.Q(contact_number__icontains=search_query) |
-            models.Q(address__icontains=search_query) |
-            models.Q(access_level__icontains=search_query) |
-            models.Q(status__icontains=search_query) |
-            models.Q(computer_station__icontains=search_query)
-        )
+        users_queryset = search_users(users_queryset, search_query)
     
     # Apply access level filter
     if access_level_filter:
@@ -148,49 +182,69 @@ def computer_users(request):
     if status_filter:
         users_queryset = users_queryset.filter(status=status_filter)
     
-    # Convert to list to get all users (no pagination for now to show all students)
-    users = list(users_queryset)
+    # Calculate statistics in one conditional-aggregate query
+    stats = users_queryset.aggregate(
+        total_users=models.Count('id'),
+        active_users=models.Count('id', filter=models.Q(status='active')),
+        student_users=models.Count('id', filter=models.Q(access_level='student')),
+        faculty_users=models.Count('id', filter=models.Q(access_level='faculty')),
+        admin_users=models.Count('id', filter=models.Q(access_level='admin')),
+    )
     
-    # Calculate statistics
-    total_users = len(users)
-    active_users = len([user for user in users if user.status == 'active'])
-    student_users = len([user for user in users if user.access_level == 'student'])
-    faculty_users = len([user for user in users if user.access_level == 'faculty'])
-    admin_users = len([user for user in users if user.access_level == 'admin'])
+    # Paginate on the server, loading only the columns the page renders.
+    # The total is already known from the aggregate, so the paginator
+    # does not need its own COUNT query.
+    paginator = Paginator(users_queryset.only(*COMPUTER_USERS_PAGE_FIELDS), USERS_PER_PAGE)
+    paginator.count = stats['total_users']
+    users = paginator.get_page(request.GET.get('page'))
+    
+    # Keep the filters on pagination links
+    filter_query = urlencode([
+        (name, value) for name, value in (
+            ('search', search_query),
+            ('access_level', access_level_filter),
+            ('status', status_filter),
+        ) if value
+    ])
     
     context = {
-        'users': users,  # All users (filtered if search query exists)
-        'total_users': total_users,
-        'active_users': active_users,
-        'student_users': student_users,
-        'faculty_users': faculty_users,
-        'admin_users': admin_users,
+        'users': users,  # Current page of users (filtered if search query exists)
+        'total_users': stats['total_users'],
+        'active_users': stats['active_users'],
+        'student_users': stats['student_users'],
+        'faculty_users': stats['faculty_users'],
+        'admin_users': stats['admin_users'],
         'search_query': search_query,  # Pass search query to template
         'access_level_filter': access_level_filter,  # Pass access level filter to template
         'status_filter': status_filter,  # Pass status filter to template
+        'filter_query': filter_query,
         'current_page': 'computer_users',
         'admin_user_name': request.user.get_full_name() or request.user.username,
     }
     return render(request, 'computer_users.html', context)
 
+@query_budget(4)
 def computer_units(request):
     # Check if user is logged in and is staff
     if not request.user.is_authenticated or not request.user.is_staff:
         messages.error(request, 'Please log in to access this page.')
         return redirect('login')
     
-    # Get all computer units for display
-    units = ComputerUnit.objects.all().order_by('-created_at')
-    
+    # Counts come from the registry; the unit grid is only queried and
+    # rendered when its cached fragment is missing for this unit version
+    status_counts, units_version = unit_registry.status_counts()
     context = {
-        'units': units,
-        'total_units': units.count(),
-        'available_units': units.filter(status='available').count(),
+        'units': ComputerUnit.objects.all().order_by('-created_at'),
+        'total_units': sum(status_counts.values()),
+        'available_units': status_counts.get('available', 0),
+        'units_version': units_version,
+        'unit_fragment_timeout': UNIT_FRAGMENT_TIMEOUT,
         'current_page': 'computer_units',
         'admin_user_name': request.user.get_full_name() or request.user.username,
     }
     return render(request, 'computer_units.html', context)
 
+@query_budget(4)
 def add_user(request):
     """Handle form submission to add a new user"""
     # Check if user is logged in and is staff
@@ -243,6 +297,7 @@ def add_user(request):
     # If GET request, redirect to computer users page
     return redirect('computer_users')
 
+@query_budget(4)
 def edit_user(request, user_id):
     """Handle form submission to edit an existing user"""
     # Check if user is logged in and is staff
@@ -293,6 +348,7 @@ def edit_user(request, user_id):
     
     return redirect('computer_users')
 
+@query_budget(1)
 def view_user_details(request, user_id):
     """Display user details in a modal"""
     if request.method == 'GET':
@@ -312,7 +368,7 @@ def view_user_details(request, user_id):
                     'address': user.address,
                     'access_level': user.access_level,
                     'status': user.status,
-                    'computer_station': user.computer_station or 'Not Assigned',
+                    'computer_station': user.computer_station or '',
                     'last_login': user.last_login.strftime('%B %d, %Y at %I:%M %p') if user.last_login else 'Never',
                     'created_at': user.created_at.strftime('%B %d, %Y at %I:%M %p'),
                 }
@@ -325,6 +381,43 @@ def view_user_details(request, user_id):
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
 
+@query_budget(6)
+def import_users_csv(request):
+    """Bulk-create users from an uploaded CSV file"""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+    
+    upload = request.FILES.get('csv_file')
+    if upload is None:
+        return JsonResponse({'success': False, 'error': 'Please choose a CSV file to import'}, status=400)
+    
+    # Rejected rows are returned as CSV so the page can offer them for download
+    rejects = io.StringIO()
+    rejects_writer = csv.writer(rejects)
+    rejects_writer.writerow(['line', 'error', *IMPORT_REQUIRED_COLUMNS, *IMPORT_OPTIONAL_COLUMNS])
+    
+    def on_reject(line_number, row, error):
+        rejects_writer.writerow([line_number, error, *(row.get(name) or '' for name in IMPORT_REQUIRED_COLUMNS + IMPORT_OPTIONAL_COLUMNS)])
+    
+    try:
+        csv_file = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        result = import_users(csv_file, on_reject=on_reject)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return JsonResponse({'success': False, 'error': f'Could not import file: {str(e)}'}, status=400)
+    
+    # Bulk inserts grow with the file; the declared budget covers one row
+    extend_query_budget(request, import_extra_queries(result.rows))
+    return JsonResponse({
+        'success': True,
+        'rows': result.rows,
+        'imported': result.imported,
+        'rejected': result.rejected,
+        'rejects_csv': rejects.getvalue() if result.rejected else '',
+    })
+
+@query_budget(6)
 def add_computer_unit(request):
     """Handle form submission to add a new computer unit"""
     if request.method == 'POST':
@@ -360,6 +453,7 @@ def add_computer_unit(request):
     return redirect('computer_units')
 
 
+@query_budget(7)
 def edit_computer_unit(request, unit_id):
     """Handle form submission to edit an existing computer unit"""
     unit = get_object_or_404(ComputerUnit, id=unit_id)
@@ -388,9 +482,9 @@ def edit_computer_unit(request, unit_id):
     return redirect('computer_units')
 
 
+@query_budget(12)
 def user_sign_in(request):
     """Public sign-in page where a user enters Student ID and selects an available PC"""
-    available_units_qs = ComputerUnit.objects.filter(status='available').order_by('unit_id')
     is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
 
     if request.method == 'POST':
@@ -417,22 +511,32 @@ def user_sign_in(request):
             # If user is already signed in (has a computer_station), sign them out
             if user.computer_station:
                 previous_unit_id = user.computer_station
-                unit_obj = ComputerUnit.objects.filter(unit_id=previous_unit_id).first()
-                if unit_obj:
-                    unit_obj.status = 'available'
-                    unit_obj.save(update_fields=['status'])
-                user.computer_station = ''
-                user.save(update_fields=['computer_station'])
-
-                # Log sign-out
-                ActivityLog.objects.create(
-                    user=user,
-                    student_id=user.student_id,
-                    full_name=user.full_name,
-                    action='sign-out',
-                    computer_station=previous_unit_id,
-                    notes='Signed out via kiosk form'
-                )
+                now = timezone.now()
+                with transaction.atomic():
+                    # Release the user first; a concurrent sign-out that got here
+                    # before us leaves nothing to release and must not log twice.
+                    released = ComputerUser.objects.filter(
+                        pk=user.pk, computer_station=previous_unit_id
+                    ).update(computer_station='', updated_at=now)
+                    if released:
+                        ComputerUnit.objects.filter(unit_id=previous_unit_id).update(status='available', updated_at=now)
+                        # update() skips post_save, so announce the change once committed
+                        transaction.on_commit(lambda: send_unit_changed(None, previous_unit_id, 'available'))
+                        transaction.on_commit(lambda: adjust_signed_in_count(-1))
+
+                        # Close the lab session and add it to the usage rollups
+                        end_lab_session(user, now)
+
+                        # Log sign-out
+                        activity_log_writer.log(
+                            user=user,
+                            student_id=user.student_id,
+                            full_name=user.full_name,
+                            action='sign-out',
+                            computer_station=previous_unit_id,
+                            notes='Signed out via kiosk form',
+                            timestamp=now,
+                        )
 
                 signout_message = f"Signed out successfully. PC {previous_unit_id} is now available."
                 if is_ajax:
@@ -440,52 +544,112 @@ def user_sign_in(request):
                 messages.success(request, signout_message)
                 return redirect('user_sign_in')
 
-            units = list(ComputerUnit.objects.filter(status='available').order_by('unit_id').values_list('unit_id', flat=True))
+            # Served from the in-memory registry instead of querying units
+            units, units_version = unit_registry.available_units()
             if is_ajax:
-                return JsonResponse({'success': True, 'units': units, 'student_name': user.full_name})
+                return JsonResponse({'success': True, 'units': units, 'units_version': units_version, 'student_name': user.full_name})
             messages.info(request, 'Please select a PC to proceed.')
             return redirect('user_sign_in')
 
-        # Step 2: Verify unit is available and finalize sign-in
-        try:
-            unit = ComputerUnit.objects.get(unit_id=selected_unit_id, status='available')
-        except ComputerUnit.DoesNotExist:
+        # Step 2: Claim the unit and finalize sign-in as one transaction. The
+        # conditional UPDATE only matches while the unit is still available, so
+        # two students racing for the same PC cannot both win.
+        now = timezone.now()
+        error = None
+        with transaction.atomic():
+            claimed = ComputerUnit.objects.filter(
+                unit_id=selected_unit_id, status='available'
+            ).update(status='in-use', updated_at=now)
+            if not claimed:
+                # The picker offered a unit that is gone; resync the registry
+                unit_registry.invalidate()
+                error = ('Selected PC is no longer available. Please pick another one.', 409)
+            else:
+                # Assign the unit to the user, unless another request already did
+                assigned = ComputerUser.objects.filter(pk=user.pk).filter(
+                    models.Q(computer_station='') | models.Q(computer_station__isnull=True)
+                ).update(computer_station=selected_unit_id, last_login=now, updated_at=now)
+                if not assigned:
+                    transaction.set_rollback(True)
+                    error = ('You are already signed in to another PC. Please sign out first.', 409)
+                else:
+                    transaction.on_commit(lambda: send_unit_changed(None, selected_unit_id, 'in-use'))
+                    transaction.on_commit(lambda: adjust_signed_in_count(1))
+
+                    # Open a lab session
+                    start_lab_session(user, selected_unit_id, now)
+
+                    # Log sign-in
+                    activity_log_writer.log(
+                        user=user,
+                        student_id=user.student_id,
+                        full_name=user.full_name,
+                        action='sign-in',
+                        computer_station=selected_unit_id,
+                        notes=f'Signed in via kiosk form - Last login updated to {now.strftime("%B %d, %Y at %I:%M %p")}',
+                        timestamp=now,
+                    )
+
+        if error:
+            error_message, status_code = error
             if is_ajax:
-                return JsonResponse({'success': False, 'error': 'Selected PC is no longer available. Please pick another one.'}, status=409)
-            messages.error(request, 'Selected PC is no longer available. Please pick another one.')
+                return JsonResponse({'success': False, 'error': error_message}, status=status_code)
+            messages.error(request, error_message)
             return redirect('user_sign_in')
 
-        # Assign the unit to the user and mark it in use
-        unit.status = 'in-use'
-        unit.save(update_fields=['status'])
-
-        user.computer_station = unit.unit_id
-        # Use system local time for last login tracking
-        user.last_login = timezone.now()
-        user.save(update_fields=['computer_station', 'last_login'])
-
-        # Log sign-in
-        ActivityLog.objects.create(
-            user=user,
-            student_id=user.student_id,
-            full_name=user.full_name,
-            action='sign-in',
-            computer_station=unit.unit_id,
-            notes=f'Signed in via kiosk form - Last login updated to {timezone.now().strftime("%B %d, %Y at %I:%M %p")}'
-        )
-
-        success_message = f"Signed in successfully. Proceed to PC {unit.unit_id}."
+        success_message = f"Signed in successfully. Proceed to PC {selected_unit_id}."
         if is_ajax:
-            return JsonResponse({'success': True, 'message': success_message, 'unit_id': unit.unit_id})
+            return JsonResponse({'success': True, 'message': success_message, 'unit_id': selected_unit_id})
 
         messages.success(request, success_message)
         return redirect('user_sign_in')
 
+    available_units, units_version = unit_registry.available_units()
     context = {
-        'available_units': available_units_qs,
+        'available_units': available_units,
+        'units_version': units_version,
     }
     return render(request, 'userpage.html', context)
 
+@query_budget(1)
+async def unit_events_stream(request):
+    """Server-Sent Events stream of unit status changes for dashboards and kiosks.
+
+    Every stream starts with a snapshot of the available units, then receives
+    a delta (unit_id, old_status, new_status, version) for each change from
+    the shared broker. Under WSGI (runserver) a long-lived stream would pin a
+    worker thread, so only the snapshot is sent and the browser reconnects
+    after the retry interval; serve the app through ComLab_System.asgi to get
+    live pushes.
+    """
+    available_units, units_version = await sync_to_async(unit_registry.available_units)()
+    snapshot = format_sse('snapshot', {'units': available_units, 'version': units_version})
+
+    async def stream():
+        subscriber = unit_events.subscribe()
+        _, queue = subscriber
+        try:
+            yield f'retry: {SSE_RETRY_MS}\n\n'
+            yield snapshot
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_sse(event['type'], event)
+        finally:
+            unit_events.unsubscribe(subscriber)
+
+    if isinstance(request, ASGIRequest):
+        response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    else:
+        response = HttpResponse(f'retry: {SSE_RETRY_MS}\n\n{snapshot}', content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@query_budget(4)
 def logs_view(request):
     # Check if user is logged in and is staff
     if not request.user.is_authenticated or not request.user.is_staff:
@@ -493,31 +657,218 @@ def logs_view(request):
         return redirect('login')
     
     # Filter out admin activities - only show student sign-ins/sign-outs
-    logs = ActivityLog.objects.select_related('user').exclude(
-        computer_station='Admin Dashboard'
-    ).exclude(
-        notes__icontains='Admin login'
-    ).exclude(
-        notes__icontains='Admin logout'
-    ).order_by('-timestamp')
-    
-    # Optional pagination similar to users page
-    paginator = Paginator(logs, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    filters = parse_log_filters(request.GET)
+    logs = apply_log_filters(student_activity_logs(), filters).select_related('user')
+    
+    # Keyset pagination on (timestamp, id): every page is an index range scan
+    # from the cursor, so deep pages cost the same as the first one
+    page_obj = keyset_paginate(logs, ('-timestamp', '-id'), request.GET.get('cursor'), per_page=20)
     context = {
         'logs': page_obj,
-        'all_logs': logs,
+        'stations': get_stations(),
+        'filters': filters,
+        'filter_query': log_filter_query(filters),
         'current_page': 'logs',
         'admin_user_name': request.user.get_full_name() or request.user.username,
     }
     return render(request, 'logs.html', context)
 
+@query_budget(2)
+def export_logs(request):
+    """Stream the filtered activity logs as CSV or NDJSON.
+
+    Rows are exported oldest first on (timestamp, id) and read with a chunked
+    iterator, so memory stays flat however many rows match. Pass ``after``
+    (an ISO timestamp) and optionally ``after_id`` from the last row received
+    to resume an interrupted export. ``source=archive`` exports the logs
+    moved out by the archive_logs command instead; those come out in the
+    order they were archived, which a timestamp cursor cannot resume, so
+    ``after`` is refused with them.
+    """
+    # Check if user is logged in and is staff
+    if not request.user.is_authenticated or not request.user.is_staff:
+        messages.error(request, 'Please log in to access this page.')
+        return redirect('login')
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'error': 'Format must be csv or ndjson'}, status=400)
+    stream, content_type, extension = EXPORT_FORMATS[export_format]
+
+    source = request.GET.get('source', 'live')
+    if source not in ('live', 'archive'):
+        return JsonResponse({'success': False, 'error': 'Source must be live or archive'}, status=400)
+    filters = parse_log_filters(request.GET)
+    filename = f'activity_logs_{timezone.localtime().strftime("%Y%m%d_%H%M%S")}'
+
+    if source == 'archive':
+        if request.GET.get('after', '').strip():
+            return JsonResponse({'success': False, 'error': 'after cannot be used with source=archive'}, status=400)
+        # Archived logs are read straight from the compressed segments
+        response = StreamingHttpResponse(stream(iter_archived_logs(filters)), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}_archive.{extension}"'
+        return response
+
+    logs = apply_log_filters(student_activity_logs(), filters)
+
+    after = request.GET.get('after', '').strip()
+    if after:
+        try:
+            after_timestamp = parse_datetime(after)
+        except ValueError:
+            # Well formed but impossible, e.g. month 13
+            after_timestamp = None
+        if after_timestamp is None:
+            return JsonResponse({'success': False, 'error': 'after must be an ISO 8601 timestamp'}, status=400)
+        if timezone.is_naive(after_timestamp):
+            after_timestamp = timezone.make_aware(after_timestamp)
+        after_id = request.GET.get('after_id', '').strip()
+        if after_id.isdigit():
+            logs = logs.filter(timestamp__gte=after_timestamp).filter(
+                models.Q(timestamp__gt=after_timestamp) | models.Q(id__gt=int(after_id))
+            )
+        else:
+            logs = logs.filter(timestamp__gt=after_timestamp)
+
+    rows = logs.order_by('timestamp', 'id').values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    response = StreamingHttpResponse(stream(rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+@query_budget(2)
+def profiling_token(request):
+    """Issue a short-lived token that profiles any request it is added to"""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    
+    return JsonResponse({
+        'success': True,
+        'token': make_profile_token(request.user),
+        'param': PROFILE_PARAM,
+        'header': PROFILE_HEADER,
+        'expires_in': getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 600),
+    })
+
+@query_budget(2)
+def download_profile(request, profile_id):
+    """Download a saved request profile: the cProfile trace, or its summary with format=json"""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        messages.error(request, 'Please log in to access this page.')
+        return redirect('login')
+    
+    extension = 'json' if request.GET.get('format') == 'json' else 'prof'
+    path = profile_path(profile_id, extension)
+    if path is None or not path.exists():
+        return JsonResponse({'success': False, 'error': 'Profile not found'}, status=404)
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
+
+@query_budget(2)
+def metrics(request):
+    """Prometheus metrics: per-URL request counts, latency and DB time, plus unit and sign-in gauges"""
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    
+    lines = request_metrics.render(url_names()) + domain_metrics()
+    return HttpResponse('\n'.join(lines) + '\n', content_type=METRICS_CONTENT_TYPE)
+
+# API Views for Activity Logs
+@query_budget(3)
+@csrf_exempt
+@require_http_methods(["GET"])
+def get_log_stations(request):
+    """List the distinct stations used by the activity log filters"""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    
+    return JsonResponse({'stations': get_stations()})
+
+@query_budget(3)
+@csrf_exempt
+@require_http_methods(["GET"])
+def get_logs(request):
+    """Filtered, cursor-paginated student activity logs"""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    
+    filters = parse_log_filters(request.GET)
+    try:
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), 200)
+    except ValueError:
+        page_size = 20
+
+    logs = apply_log_filters(student_activity_logs(), filters).values(
+        'id', 'timestamp', 'student_id', 'full_name', 'action', 'computer_station'
+    )
+    page = keyset_paginate(logs, ('-timestamp', '-id'), request.GET.get('cursor'), per_page=page_size)
+    return JsonResponse({
+        'logs': [dict(log, timestamp=log['timestamp'].isoformat()) for log in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'filters': filters,
+    })
+
+# API Views for Lab Usage
+# Days the heatmap covers when no range is given
+USAGE_DEFAULT_DAYS = 30
+
+@query_budget(4)
+@require_http_methods(["GET"])
+def usage_heatmap(request):
+    """Station by hour-of-day occupancy heatmap and daily lab totals, served from the usage rollups"""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    
+    today = timezone.localdate()
+    dates = {}
+    for name, default in (('date_from', today - timedelta(days=USAGE_DEFAULT_DAYS - 1)), ('date_to', today)):
+        value = request.GET.get(name)
+        try:
+            dates[name] = parse_date(value) if value else default
+        except ValueError:
+            dates[name] = None
+        if dates[name] is None:
+            return JsonResponse({'success': False, 'error': f'{name} must be a date like 2025-01-31'}, status=400)
+    if dates['date_from'] > dates['date_to']:
+        return JsonResponse({'success': False, 'error': 'date_from must not be after date_to'}, status=400)
+    
+    return JsonResponse({'success': True, **build_heatmap(dates['date_from'], dates['date_to'])})
+
 # API Views for Computer Users
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+# Fields the users API can return: (columns to load, serializer for a values() row)
+USER_API_FIELDS = {
+    'id': (['id'], lambda row: row['id']),
+    'student_id': (['student_id'], lambda row: row['student_id']),
+    'first_name': (['first_name'], lambda row: row['first_name']),
+    'last_name': (['last_name'], lambda row: row['last_name']),
+    'full_name': (['first_name', 'last_name'], lambda row: f"{row['first_name']} {row['last_name']}"),
+    'email': (['email'], lambda row: row['email']),
+    'contact_number': (['contact_number'], lambda row: row['contact_number']),
+    'course': (['course'], lambda row: row['course']),
+    'address': (['address'], lambda row: row['address']),
+    'access_level': (['access_level'], lambda row: row['access_level']),
+    'status': (['status'], lambda row: row['status']),
+    'computer_station': (['computer_station'], lambda row: row['computer_station'] or 'Not Assigned'),
+    'last_login': (['last_login'], lambda row: _isoformat(row['last_login'])),
+    'created_at': (['created_at'], lambda row: _isoformat(row['created_at'])),
+    'updated_at': (['updated_at'], lambda row: _isoformat(row['updated_at'])),
+}
+USER_API_DEFAULT_PAGE_SIZE = 50
+USER_API_MAX_PAGE_SIZE = 500
+
+@query_budget(2)
 @csrf_exempt
 @require_http_methods(["GET"])
 def get_users(request):
-    """Get all users or search users - Enhanced search functionality"""
+    """Search users a page at a time.
+
+    Query parameters: search, access_level, status, cursor (from a previous
+    next_cursor/previous_cursor), page_size (default 50, max 500), fields
+    (comma-separated, default all) and include_total (default 1).
+    """
     search_query = request.GET.get('search', '').strip()
     access_level_filter = request.GET.get('access_level', '')
     status_filter = request.GET.get('status', '')
@@ -525,18 +876,9 @@ def get_users(request):
     # Start with all users
     users = ComputerUser.objects.all()
     
-    # Apply search filter if search query exists
+    # Apply search filter if search query exists (full-text index, prefix match)
     if search_query:
-        users = users.filter(
-            models.Q(first_name__icontains=search_query) |
-            models.Q(last_name__icontains=search_query) |
-            models.Q(student_id__icontains=search_query) |
-            models.Q(email__icontains=search_query) |
-            models.Q(course__icontains=search_query) |
-            models.Q(contact_number__icontains=search_query) |
-            models.Q(address__icontains=search_query) |
-            models.Q(computer_station__icontains=search_query)
-        )
+        users = search_users(users, search_query, rank=True)
     
     # Apply access level filter
     if access_level_filter:
@@ -546,39 +888,55 @@ def get_users(request):
     if status_filter:
         users = users.filter(status=status_filter)
     
-    # Order by creation date (newest first)
-    users = users.order_by('-created_at')
-    
-    users_data = []
-    for user in users:
-        users_data.append({
-            'id': user.id,
-            'student_id': user.student_id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'full_name': user.full_name,
-            'email': user.email,
-            'contact_number': user.contact_number,
-            'course': user.course,
-            'address': user.address,
-            'access_level': user.access_level,
-            'status': user.status,
-            'computer_station': user.computer_station or 'Not Assigned',
-            'last_login': user.last_login.isoformat() if user.last_login else None,
-            'created_at': user.created_at.isoformat(),
-            'updated_at': user.updated_at.isoformat(),
-        })
+    # Optional total, computed before projection; pass include_total=0 to skip the COUNT
+    include_total = request.GET.get('include_total', '1').lower() not in ('0', 'false', 'no')
+    total = users.count() if include_total else None
     
-    return JsonResponse({
-        'users': users_data, 
-        'total': len(users_data),
+    # Load only the columns behind the requested fields (plus the cursor keys)
+    requested_fields = [f.strip() for f in request.GET.get('fields', '').split(',') if f.strip()] or list(USER_API_FIELDS)
+    unknown_fields = [f for f in requested_fields if f not in USER_API_FIELDS]
+    if unknown_fields:
+        return JsonResponse({
+            'success': False,
+            'error': f'Unknown fields: {", ".join(unknown_fields)}. Allowed: {", ".join(USER_API_FIELDS)}'
+        }, status=400)
+    columns = {'id', 'created_at'}
+    for field in requested_fields:
+        columns.update(USER_API_FIELDS[field][0])
+    if search_query:
+        columns.add('search_rank')
+    users = users.values(*columns)
+    
+    try:
+        page_size = min(max(int(request.GET.get('page_size', USER_API_DEFAULT_PAGE_SIZE)), 1), USER_API_MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = USER_API_DEFAULT_PAGE_SIZE
+    
+    # Order by relevance when searching, otherwise by creation date (newest first)
+    ordering = ('search_rank', '-created_at', '-id') if search_query else ('-created_at', '-id')
+    page = keyset_paginate(users, ordering, request.GET.get('cursor'), per_page=page_size)
+    
+    users_data = [
+        {field: USER_API_FIELDS[field][1](row) for field in requested_fields}
+        for row in page
+    ]
+    
+    response = {
+        'users': users_data,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'page_size': page_size,
         'search_query': search_query,
         'filters': {
             'access_level': access_level_filter,
             'status': status_filter
         }
-    })
+    }
+    if include_total:
+        response['total'] = total
+    return JsonResponse(response)
 
+@query_budget(2)
 @csrf_exempt
 @require_http_methods(["POST"])
 def create_user(request):
@@ -641,6 +999,55 @@ def create_user(request):
             'error': str(e)
         }, status=500)
 
+@query_budget(13)
+@csrf_exempt
+@require_http_methods(["POST"])
+def batch_users(request):
+    """Create, update, change the status of and delete users in one request"""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Authentication required'}, status=401)
+    
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'Invalid JSON data'
+        }, status=400)
+    
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return JsonResponse({
+            'success': False,
+            'error': 'operations must be a non-empty list'
+        }, status=400)
+    
+    limit = max_batch_size()
+    if len(operations) > limit:
+        return JsonResponse({
+            'success': False,
+            'error': f'A batch may contain at most {limit} operations'
+        }, status=413)
+    
+    # Bulk writes grow with the batch; the declared budget covers one operation of each kind
+    extend_query_budget(request, batch_extra_queries(operations))
+    try:
+        results = run_user_batch(operations)
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+    
+    failed = sum(1 for result in results if not result['success'])
+    return JsonResponse({
+        'success': True,
+        'applied': len(results) - failed,
+        'failed': failed,
+        'results': results,
+    })
+
+@query_budget(2)
 @csrf_exempt
 @require_http_methods(["PUT"])
 def update_user(request, user_id):
@@ -697,6 +1104,7 @@ def update_user(request, user_id):
             'error': str(e)
         }, status=500)
 
+@query_budget(4)
 @csrf_exempt
 @require_http_methods(["DELETE"])
 def delete_user(request, user_id):
@@ -717,6 +1125,7 @@ def delete_user(request, user_id):
             'error': str(e)
         }, status=500)
 
+@query_budget(2)
 @csrf_exempt
 @require_http_methods(["POST"])
 def update_user_status(request, user_id):